@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Depends, WebSocket, WebSocketDisconnect, Query, Path
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks, Depends, WebSocket, WebSocketDisconnect, Query, Path
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field
@@ -43,20 +43,48 @@ app.add_middleware(
 
 # Initialize components only if not in demo mode
 whisperprint_engine = None
+whisperprint_storage = None
 privacy_guardian = None
 
 if not DEMO_MODE:
     # Import our actual components
     from whisperprint.engine import WhisperPrintEngine
+    from whisperprint.database import audit_log_cursor
+    from whisperprint.storage import AsyncStorage
     from privacy_guardian.detector import PrivacyGuardian
     
     # Initialize our components
     db_path = os.environ.get("WHISPERPRINT_DB_PATH", "whisperprint.db")
-    whisperprint_engine = WhisperPrintEngine(db_path=db_path)
-    privacy_guardian = PrivacyGuardian()
+    num_threads = os.environ.get("WHISPERPRINT_NUM_THREADS")
+    whisperprint_engine = WhisperPrintEngine(
+        db_path=db_path,
+        inference_backend=os.environ.get("WHISPERPRINT_INFERENCE_BACKEND", "torch"),
+        num_threads=int(num_threads) if num_threads else None,
+        generation_preset=os.environ.get("WHISPERPRINT_GENERATION_PRESET", "quality"),
+        onnx_cache_dir=os.environ.get("WHISPERPRINT_ONNX_CACHE_DIR")
+    )
+    # Database calls from request handlers run on storage threads, off the event loop
+    db_readers = os.environ.get("WHISPERPRINT_DB_READERS")
+    whisperprint_storage = AsyncStorage(whisperprint_engine.db, readers=int(db_readers) if db_readers else 4)
+    idle_timeout = os.environ.get("PRIVACY_GUARDIAN_IDLE_TIMEOUT")
+    rss_budget_mb = os.environ.get("PRIVACY_GUARDIAN_RSS_BUDGET_MB")
+    privacy_guardian = PrivacyGuardian(
+        models_path=os.environ.get("PRIVACY_GUARDIAN_MODELS_PATH"),
+        profile=os.environ.get("PRIVACY_GUARDIAN_PROFILE"),
+        rss_budget_mb=float(rss_budget_mb) if rss_budget_mb else None,
+        idle_timeout=float(idle_timeout) if idle_timeout else None,
+        verify_checksums=os.environ.get("PRIVACY_GUARDIAN_VERIFY_MODELS", "1") != "0",
+        manifest_sha256=os.environ.get("PRIVACY_GUARDIAN_MODELS_SHA256")
+    )
 else:
     print("Running in DEMO MODE with dummy data")
 
+@app.on_event("shutdown")
+async def close_database():
+    """Write queued audit events and close database connections."""
+    if whisperprint_storage:
+        await whisperprint_storage.close()
+
 # Store for active websocket connections (for security dashboard)
 active_connections = []
 
@@ -93,6 +121,7 @@ class IdentifyResponse(BaseModel):
     recipient_id: Optional[str]
     confidence: float
     metadata: Optional[Dict[str, Any]] = None
+    candidates: Optional[List[Dict[str, Any]]] = None
 
 class ContentCheckRequest(BaseModel):
     content: str
@@ -268,8 +297,11 @@ async def identify_document(
     Analyze a leaked document to identify the recipient it was shared with.
     Returns the identified recipient and confidence level.
     """
-    # For hackathon: Use dummy data instead of actual identification
-    result = identify_leaked_document(request.leaked_text)
+    if whisperprint_storage:
+        result = await whisperprint_storage.read(whisperprint_engine.identify_leak, request.leaked_text)
+    else:
+        # For hackathon: Use dummy data instead of actual identification
+        result = identify_leaked_document(request.leaked_text)
     
     # Broadcast event to websocket clients if a recipient was identified
     if result["recipient_id"]:
@@ -352,11 +384,19 @@ async def record_feedback(
 # Get recipients endpoint
 @app.get("/recipients", response_model=List[RecipientResponse])
 async def get_recipients(
+    response: Response,
     limit: int = Query(100, description="Maximum number of recipients to return"),
     offset: int = Query(0, description="Offset for pagination"),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor header of the previous page"),
     user: dict = Depends(check_admin_role)
 ):
     """Get a list of all recipients."""
+    if whisperprint_storage:
+        recipients = await whisperprint_storage.get_recipients(limit, offset if cursor is None else 0, cursor)
+        if len(recipients) == limit:
+            response.headers["X-Next-Cursor"] = str(recipients[-1]["id"])
+        return recipients
+    
     # For hackathon: Return mock recipients
     return MOCK_RECIPIENTS[offset:offset+limit]
 
@@ -367,21 +407,37 @@ async def get_recipient(
     user: dict = Depends(get_current_user)
 ):
     """Get details for a specific recipient by ID."""
-    # For hackathon: Find recipient in mock data
-    for recipient in MOCK_RECIPIENTS:
-        if recipient["recipient_id"] == recipient_id:
+    if whisperprint_storage:
+        recipient = await whisperprint_storage.get_recipient(recipient_id)
+        if recipient:
             return recipient
+    else:
+        # For hackathon: Find recipient in mock data
+        for recipient in MOCK_RECIPIENTS:
+            if recipient["recipient_id"] == recipient_id:
+                return recipient
     
     raise HTTPException(status_code=404, detail=f"Recipient {recipient_id} not found")
 
 # Get audit logs endpoint
 @app.get("/audit-logs", response_model=List[AuditLogResponse])
 async def get_audit_logs(
+    response: Response,
     limit: int = Query(100, description="Maximum number of logs to return"),
     event_type: Optional[str] = Query(None, description="Filter by event type"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     user: dict = Depends(check_admin_role)
 ):
-    """Get audit logs for system activity."""
+    """Get audit logs for system activity, newest first."""
+    if whisperprint_storage:
+        try:
+            logs = await whisperprint_storage.get_audit_logs(limit, event_type, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if len(logs) == limit:
+            response.headers["X-Next-Cursor"] = audit_log_cursor(logs[-1])
+        return logs
+    
     # For hackathon: Return mock audit logs
     logs = MOCK_AUDIT_LOGS
     
@@ -398,6 +454,13 @@ async def get_analytics(
     user: dict = Depends(check_admin_role)
 ):
     """Get analytics data for dashboard visualizations."""
+    if whisperprint_storage:
+        analytics = await whisperprint_storage.get_analytics(days)
+        # Detections are not persisted yet
+        analytics["detections_by_type"] = {}
+        analytics["risk_score_distribution"] = {}
+        return analytics
+    
     # For hackathon: Return mock analytics data
     return get_mock_analytics(days)
 
@@ -435,8 +498,11 @@ async def health_check():
 @app.get("/stats")
 async def get_stats(user: dict = Depends(get_current_user)):
     """Get basic system stats."""
-    # For hackathon: Return mock stats
-    analytics = get_mock_analytics()
+    if whisperprint_storage:
+        analytics = await whisperprint_storage.get_analytics()
+    else:
+        # For hackathon: Return mock stats
+        analytics = get_mock_analytics()
     return {
         "total_documents": analytics["total_documents"],
         "total_recipients": analytics["total_recipients"],
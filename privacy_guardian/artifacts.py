@@ -0,0 +1,309 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Dict, Any, Optional
+import spacy
+import torch
+from safetensors.torch import load_file, save_file
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, pipeline
+from privacy_guardian.models import MODEL_PROFILES, DEFAULT_PROFILE
+
+# Model artifact layout:
+#   manifest.json          format version, source models, quantization and per-file checksums
+#   manifest.json.sha256   SHA-256 of manifest.json
+#   spacy/                 serialized spaCy pipeline (nlp.to_disk)
+#   classifier/            tokenizer files, config and safetensors weights of the NLI model;
+#                          quantized exports store the int8 Linear weights with their scales
+MANIFEST_NAME = "manifest.json"
+MANIFEST_DIGEST_NAME = MANIFEST_NAME + ".sha256"
+QUANTIZED_WEIGHTS_NAME = "model.int8.safetensors"
+# Version 1 artifacts stored full-precision weights and quantized them at load time
+ARTIFACT_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+
+class ModelArtifactError(ValueError):
+    """A model artifact is missing, corrupted or does not match its manifest."""
+
+def _sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _collect_checksums(root: str) -> Dict[str, str]:
+    """Checksum every file below root, keyed by its POSIX-style relative path."""
+    checksums = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            full_path = os.path.join(dirpath, filename)
+            relative_path = os.path.relpath(full_path, root).replace(os.sep, "/")
+            if relative_path in (MANIFEST_NAME, MANIFEST_DIGEST_NAME):
+                continue
+            checksums[relative_path] = _sha256_file(full_path)
+    return checksums
+
+def _quantized_tensors(model: torch.nn.Module) -> Dict[str, torch.Tensor]:
+    """
+    Flatten a dynamically quantized model into plain tensors that safetensors can store.
+    
+    Each quantized Linear is stored as its int8 weight with a per-tensor scale and zero
+    point next to it; every other parameter and buffer is stored as is.
+    """
+    tensors = {}
+    quantized_prefixes = []
+    for name, module in model.named_modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            weight, bias = module.weight(), module.bias()
+            tensors[f"{name}.weight"] = weight.int_repr().contiguous()
+            tensors[f"{name}.weight_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            tensors[f"{name}.weight_zero_point"] = torch.tensor(weight.q_zero_point(), dtype=torch.int64)
+            if bias is not None:
+                tensors[f"{name}.bias"] = bias.detach().contiguous()
+            quantized_prefixes.append(name + ".")
+    
+    for name, tensor in list(model.named_parameters()) + list(model.named_buffers()):
+        if not any(name.startswith(prefix) for prefix in quantized_prefixes):
+            tensors[name] = tensor.detach().contiguous()
+    return tensors
+
+def _set_submodule(model: torch.nn.Module, name: str, module: torch.nn.Module) -> None:
+    """Replace the submodule at a dotted path."""
+    parent_name, _, leaf = name.rpartition(".")
+    setattr(model.get_submodule(parent_name), leaf, module)
+
+def _assign_tensor(model: torch.nn.Module, name: str, tensor: torch.Tensor) -> None:
+    """Point a parameter or buffer at a loaded tensor instead of copying into it."""
+    module_name, _, leaf = name.rpartition(".")
+    module = model.get_submodule(module_name)
+    if leaf in module._parameters:
+        module._parameters[leaf] = torch.nn.Parameter(tensor, requires_grad=False)
+    else:
+        module._buffers[leaf] = tensor
+
+def _load_quantized_classifier(classifier_dir: str, weights_name: str) -> torch.nn.Module:
+    """
+    Rebuild a dynamically quantized classifier from its stored int8 weights.
+    
+    The model skeleton is built on the meta device, so no full-precision weights are
+    allocated or randomly initialized; the memory-mapped tensors are then assigned to it.
+    
+    Args:
+        classifier_dir: Directory with the classifier config and weights.
+        weights_name: File name of the quantized safetensors weights.
+    
+    Returns:
+        The quantized model in eval mode.
+    """
+    config = AutoConfig.from_pretrained(classifier_dir, local_files_only=True)
+    with torch.device("meta"):
+        model = AutoModelForSequenceClassification.from_config(config)
+    
+    tensors = load_file(os.path.join(classifier_dir, weights_name), device="cpu")
+    
+    for name, module in list(model.named_modules()):
+        if not isinstance(module, torch.nn.Linear) or f"{name}.weight_scale" not in tensors:
+            continue
+        weight = torch._make_per_tensor_quantized_tensor(
+            tensors.pop(f"{name}.weight"),
+            tensors.pop(f"{name}.weight_scale").item(),
+            tensors.pop(f"{name}.weight_zero_point").item()
+        )
+        quantized = torch.ao.nn.quantized.dynamic.Linear(
+            module.in_features, module.out_features, bias_=module.bias is not None, dtype=torch.qint8
+        )
+        quantized.set_weight_bias(weight, tensors.pop(f"{name}.bias", None))
+        _set_submodule(model, name, quantized)
+    
+    for name, tensor in tensors.items():
+        _assign_tensor(model, name, tensor)
+    # Tied embeddings were stored once; point the other references back at them
+    model.tie_weights()
+    
+    missing = [
+        name for name, tensor in list(model.named_parameters()) + list(model.named_buffers())
+        if tensor.is_meta
+    ]
+    if missing:
+        raise ModelArtifactError(f"Quantized classifier weights are missing tensors: {', '.join(missing[:5])}")
+    model.eval()
+    return model
+
+def export_model_artifacts(output_dir: str, profile: str = DEFAULT_PROFILE, quantize: bool = False) -> Dict[str, Any]:
+    """
+    Export the models of a profile into a self-contained local artifact directory.
+    
+    Args:
+        output_dir: Directory to write the artifact to.
+        profile: Name of the model profile to export.
+        quantize: Whether to store the classifier with int8 dynamically quantized weights.
+    
+    Returns:
+        The written manifest.
+    """
+    settings = MODEL_PROFILES[profile]
+    os.makedirs(output_dir, exist_ok=True)
+    
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "profile": profile,
+        "created_at": datetime.now().isoformat(),
+        "spacy": {
+            "path": "spacy",
+            "source": settings["spacy_model"]
+        },
+        "classifier": None,
+        "files": {}
+    }
+    
+    # Serialize the spaCy pipeline
+    nlp = spacy.load(settings["spacy_model"])
+    nlp.to_disk(os.path.join(output_dir, "spacy"))
+    
+    # Export tokenizer and weights; safetensors lets the loader memory-map them
+    if settings["classifier_model"]:
+        classifier_dir = os.path.join(output_dir, "classifier")
+        tokenizer = AutoTokenizer.from_pretrained(settings["classifier_model"])
+        model = AutoModelForSequenceClassification.from_pretrained(settings["classifier_model"])
+        tokenizer.save_pretrained(classifier_dir)
+        
+        if quantize:
+            # The artifact holds the int8 weights themselves; loading needs no full-precision copy
+            model.eval()
+            quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            model.config.save_pretrained(classifier_dir)
+            save_file(_quantized_tensors(quantized), os.path.join(classifier_dir, QUANTIZED_WEIGHTS_NAME))
+        else:
+            model.save_pretrained(classifier_dir, safe_serialization=True)
+        
+        manifest["classifier"] = {
+            "path": "classifier",
+            "source": settings["classifier_model"],
+            "task": "zero-shot-classification",
+            "quantization": "dynamic-int8" if quantize else None,
+            "weights": QUANTIZED_WEIGHTS_NAME if quantize else None
+        }
+    
+    manifest["files"] = _collect_checksums(output_dir)
+    
+    manifest_bytes = json.dumps(manifest, indent=2).encode("utf-8")
+    with open(os.path.join(output_dir, MANIFEST_NAME), "wb") as f:
+        f.write(manifest_bytes)
+    with open(os.path.join(output_dir, MANIFEST_DIGEST_NAME), "w") as f:
+        f.write(hashlib.sha256(manifest_bytes).hexdigest() + "\n")
+    
+    return manifest
+
+def read_manifest(models_path: str, expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Read and validate the manifest of a model artifact directory.
+    
+    The manifest is checked against the digest file written next to it, which catches
+    corruption and partial edits. Anyone able to rewrite the artifact can rewrite both,
+    so deployments that must detect tampering pin the digest out of band.
+    
+    Args:
+        models_path: Path to the artifact directory.
+        expected_sha256: Optional pinned SHA-256 of manifest.json.
+    
+    Returns:
+        The parsed manifest.
+    """
+    manifest_path = os.path.join(models_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No {MANIFEST_NAME} found in {models_path}")
+    
+    with open(manifest_path, "rb") as f:
+        manifest_bytes = f.read()
+    digest = hashlib.sha256(manifest_bytes).hexdigest()
+    
+    if expected_sha256 and digest != expected_sha256.strip().lower():
+        raise ModelArtifactError(f"{MANIFEST_NAME} in {models_path} does not match the pinned digest")
+    
+    manifest = json.loads(manifest_bytes)
+    manifest["sha256"] = digest
+    
+    if manifest.get("format_version") not in SUPPORTED_FORMAT_VERSIONS:
+        raise ModelArtifactError(f"Unsupported model artifact format version: {manifest.get('format_version')}")
+    
+    # Version 1 artifacts were written without a digest file
+    digest_path = os.path.join(models_path, MANIFEST_DIGEST_NAME)
+    if os.path.exists(digest_path):
+        with open(digest_path) as f:
+            recorded = f.read().strip().lower()
+        if digest != recorded:
+            raise ModelArtifactError(f"{MANIFEST_NAME} in {models_path} does not match {MANIFEST_DIGEST_NAME}")
+    elif manifest["format_version"] >= 2 and not expected_sha256:
+        raise ModelArtifactError(f"No {MANIFEST_DIGEST_NAME} found in {models_path}")
+    
+    return manifest
+
+def verify_model_artifacts(models_path: str, manifest: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Check every file listed in the manifest against its recorded checksum.
+    
+    Every file is hashed on each call: a record of earlier verifications kept next to the
+    artifact could be rewritten by anyone able to swap the weights.
+    
+    Args:
+        models_path: Path to the artifact directory.
+        manifest: Optional already-parsed manifest.
+    """
+    manifest = manifest or read_manifest(models_path)
+    
+    for relative_path, expected in manifest["files"].items():
+        full_path = os.path.join(models_path, *relative_path.split("/"))
+        if not os.path.exists(full_path):
+            raise ModelArtifactError(f"Model artifact file missing: {relative_path}")
+        if _sha256_file(full_path) != expected:
+            raise ModelArtifactError(f"Checksum mismatch for model artifact file: {relative_path}")
+
+def load_spacy_artifact(models_path: str, manifest: Dict[str, Any]):
+    """Load the spaCy pipeline from an artifact directory."""
+    return spacy.load(os.path.join(models_path, manifest["spacy"]["path"]))
+
+def load_classifier_artifact(models_path: str, manifest: Dict[str, Any]):
+    """
+    Load the zero-shot classifier from an artifact directory without touching the network.
+    
+    Args:
+        models_path: Path to the artifact directory.
+        manifest: The parsed manifest.
+    
+    Returns:
+        A zero-shot classification pipeline, or None if the artifact has no classifier.
+    """
+    settings = manifest.get("classifier")
+    if not settings:
+        return None
+    
+    classifier_dir = os.path.join(models_path, settings["path"])
+    tokenizer = AutoTokenizer.from_pretrained(classifier_dir, local_files_only=True)
+    
+    if settings.get("weights"):
+        model = _load_quantized_classifier(classifier_dir, settings["weights"])
+    else:
+        # safetensors weights are memory-mapped rather than read into a temporary buffer
+        model = AutoModelForSequenceClassification.from_pretrained(classifier_dir, local_files_only=True)
+        model.eval()
+        if settings.get("quantization") == "dynamic-int8":
+            # Version 1 artifacts were quantized at load time
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    
+    return pipeline(settings["task"], model=model, tokenizer=tokenizer, device=-1)  # Use CPU
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Privacy-Guardian models as an offline artifact")
+    parser.add_argument("output_dir", help="Directory to write the artifact to")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(MODEL_PROFILES))
+    parser.add_argument("--quantize", action="store_true", help="Store the classifier with int8 dynamic quantization")
+    args = parser.parse_args()
+    
+    manifest = export_model_artifacts(args.output_dir, args.profile, args.quantize)
+    with open(os.path.join(args.output_dir, MANIFEST_DIGEST_NAME)) as f:
+        manifest_sha256 = f.read().strip()
+    print(f"Exported profile '{manifest['profile']}' with {len(manifest['files'])} files to {args.output_dir}")
+    print(f"Manifest SHA-256 (pin with PRIVACY_GUARDIAN_MODELS_SHA256): {manifest_sha256}")
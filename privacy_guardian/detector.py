@@ -2,9 +2,10 @@ import re
 import uuid
 import json
 from typing import Dict, List, Any, Optional, Tuple
-import spacy
-from transformers import pipeline
 from datetime import datetime
+from email.parser import HeaderParser
+from privacy_guardian.models import ModelManager, select_profile
+from privacy_guardian.secret_scanner import SecretScanner
 
 class PrivacyGuardian:
     """
@@ -14,15 +15,39 @@ class PrivacyGuardian:
     personal information, sensitive data, and potentially confidential content.
     """
     
-    def __init__(self, models_path: Optional[str] = None):
+    def __init__(
+        self,
+        models_path: Optional[str] = None,
+        profile: Optional[str] = None,
+        rss_budget_mb: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        verify_checksums: bool = True,
+        manifest_sha256: Optional[str] = None,
+        allow_fallback: bool = False
+    ):
         """
         Initialize the Privacy Guardian detector.
         
         Args:
-            models_path: Optional path to load models from. If None, will download from HuggingFace.
+            models_path: Optional model artifact directory. If None, will download from HuggingFace.
+            profile: Optional model profile name (tiny, balanced, accurate).
+            rss_budget_mb: Optional memory budget in MB used to pick a profile when none is named.
+            idle_timeout: Optional number of seconds after which unused models are unloaded.
+            verify_checksums: Whether to verify the artifact checksums before loading.
+            manifest_sha256: Optional pinned SHA-256 of the artifact manifest.
+            allow_fallback: Whether a model artifact that fails to verify or load may be
+                            replaced by the downloaded "tiny" profile instead of raising.
         """
         # Load models
-        self.load_models(models_path)
+        self.load_models(
+            models_path,
+            profile=profile,
+            rss_budget_mb=rss_budget_mb,
+            idle_timeout=idle_timeout,
+            verify_checksums=verify_checksums,
+            manifest_sha256=manifest_sha256,
+            allow_fallback=allow_fallback
+        )
         
         # Regex patterns for sensitive data
         self.patterns = {
@@ -45,34 +70,80 @@ class PrivacyGuardian:
             "CORPORATE": ["confidential", "internal", "proprietary", "trade secret", "intellectual property", "strategy", "roadmap", "unreleased", "merger", "acquisition"]
         }
         
+        # Detection pipeline per content type. "regex" lists the patterns to run (None for all);
+        # unknown content types use the "text" profile.
+        self.content_profiles = {
+            "text": {"regex": None, "ner": True, "topics": True, "secrets": False},
+            "email": {"regex": None, "ner": True, "topics": True, "secrets": False,
+                      "headers": ["EMAIL", "PHONE"]},
+            # Code skips NER and topic classification; the secret scanner replaces the generic API_KEY regex
+            "code": {"regex": ["EMAIL", "IP_ADDRESS", "CREDIT_CARD"], "ner": False, "topics": False, "secrets": True}
+        }
+        self.secret_scanner = SecretScanner()
+        
         # Feedback store for continuous learning
         self.feedback_store = []
         
-    def load_models(self, models_path: Optional[str] = None):
+    def load_models(
+        self,
+        models_path: Optional[str] = None,
+        profile: Optional[str] = None,
+        rss_budget_mb: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        verify_checksums: bool = True,
+        manifest_sha256: Optional[str] = None,
+        allow_fallback: bool = False
+    ):
         """
         Load NLP models for detection.
         
         Args:
-            models_path: Optional path to load models from.
+            models_path: Optional model artifact directory (see privacy_guardian.artifacts).
+                         When given, models are loaded offline from it and its manifest picks the profile.
+            profile: Optional model profile name (tiny, balanced, accurate).
+            rss_budget_mb: Optional memory budget in MB used to pick a profile when none is named.
+            idle_timeout: Optional number of seconds after which unused models are unloaded.
+            verify_checksums: Whether to verify the artifact checksums before loading.
+            manifest_sha256: Optional pinned SHA-256 of the artifact manifest.
+            allow_fallback: Whether a model artifact that fails to verify or load may be
+                            replaced by the downloaded "tiny" profile instead of raising.
         """
+        profile_name = select_profile(profile, rss_budget_mb)
+        
         try:
-            # Load NER model for named entity recognition
-            self.nlp = spacy.load("en_core_web_md")
+            # Load NER model and zero-shot classifier for the selected profile
+            self.models = ModelManager(
+                profile_name,
+                idle_timeout=idle_timeout,
+                models_path=models_path,
+                verify_checksums=verify_checksums,
+                manifest_sha256=manifest_sha256
+            )
+            self.models.load()
             
-            # Load zero-shot classification model for sensitive topic detection
-            self.classifier = pipeline("zero-shot-classification", 
-                                       model="facebook/bart-large-mnli", 
-                                       device=-1)  # Use CPU
-            
-            print("Privacy-Guardian models loaded successfully")
+            print(f"Privacy-Guardian models loaded successfully (profile: {self.models.profile_name})")
         except Exception as e:
+            # A bad offline artifact must not silently degrade detection
+            if models_path and not allow_fallback:
+                raise
             print(f"Error loading models: {e}")
-            # Fallback to simpler models
-            self.nlp = spacy.load("en_core_web_sm")
-            # Disable classifier if it fails to load
-            self.classifier = None
+            # Fallback to the smallest profile, which has no classifier
+            if getattr(self, "models", None):
+                self.models.close()
+            self.models = ModelManager("tiny", idle_timeout=idle_timeout)
+            self.models.load()
             print("Loaded fallback models")
     
+    @property
+    def nlp(self):
+        """The spaCy pipeline, reloaded on demand if it was unloaded while idle."""
+        return self.models.get("nlp")
+    
+    @property
+    def classifier(self):
+        """The zero-shot classifier, or None if the active profile has none."""
+        return self.models.get("classifier")
+    
     def check_content(self, content: str, content_type: str = "text") -> Dict[str, Any]:
         """
         Check content for sensitive information.
@@ -87,13 +158,31 @@ class PrivacyGuardian:
         # Generate a tracking ID for this check
         tracking_id = str(uuid.uuid4())
         
-        # Run detections
-        regex_detections = self._detect_with_regex(content)
-        ner_detections = self._detect_with_ner(content)
-        topic_detections = self._detect_sensitive_topics(content)
+        profile = self.content_profiles.get(content_type, self.content_profiles["text"])
         
-        # Combine all detections
-        all_detections = regex_detections + ner_detections + topic_detections
+        # Emails are split so headers only get address checks and the body gets the full pipeline
+        header_detections = []
+        body, body_offset, topic_text = content, 0, content
+        if profile.get("headers"):
+            headers, body, body_offset = self._split_email(content)
+            if headers:
+                header_detections = self._detect_with_regex(headers, profile["headers"])
+                subject = HeaderParser().parsestr(headers).get("Subject", "")
+                topic_text = f"{subject}\n{body}" if subject else body
+        
+        # Run detections
+        regex_detections = self._detect_with_regex(body, profile["regex"])
+        ner_detections = self._detect_with_ner(body) if profile["ner"] else []
+        topic_detections = self._detect_sensitive_topics(topic_text) if profile["topics"] else []
+        secret_detections = self.secret_scanner.scan(body) if profile["secrets"] else []
+        
+        # Combine all detections, with spans relative to the original content
+        body_detections = regex_detections + ner_detections + secret_detections
+        if body_offset:
+            for detection in body_detections:
+                start, end = detection["span"]
+                detection["span"] = (start + body_offset, end + body_offset)
+        all_detections = header_detections + body_detections + topic_detections
         
         # Calculate risk score (0.0 to 1.0)
         risk_score = self._calculate_risk_score(all_detections, content_type)
@@ -113,12 +202,32 @@ class PrivacyGuardian:
         
         return result
     
-    def _detect_with_regex(self, content: str) -> List[Dict[str, Any]]:
+    def _split_email(self, content: str) -> Tuple[str, str, int]:
+        """
+        Split a raw email into its header block and body.
+        
+        Args:
+            content: The email content.
+            
+        Returns:
+            Tuple of (headers, body, body_offset). Headers are empty if the content has no header block.
+        """
+        if not re.match(r'[!-9;-~]+:', content):
+            return "", content, 0
+        
+        separator = re.search(r'\r?\n\r?\n', content)
+        if not separator:
+            return content, "", len(content)
+        
+        return content[:separator.start()], content[separator.end():], separator.end()
+    
+    def _detect_with_regex(self, content: str, labels: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Detect sensitive information using regex patterns.
         
         Args:
             content: The text content to check.
+            labels: Optional subset of pattern labels to run. Defaults to all patterns.
             
         Returns:
             List of detections.
@@ -126,6 +235,8 @@ class PrivacyGuardian:
         detections = []
         
         for label, pattern in self.patterns.items():
+            if labels is not None and label not in labels:
+                continue
             matches = re.finditer(pattern, content)
             for match in matches:
                 detection = {
@@ -273,7 +384,17 @@ class PrivacyGuardian:
             "TOPIC_MEDICAL": 0.8,
             "TOPIC_FINANCIAL": 0.7,
             "TOPIC_LEGAL": 0.6,
-            "TOPIC_CORPORATE": 0.5
+            "TOPIC_CORPORATE": 0.5,
+            "SECRET_AWS_ACCESS_KEY": 0.9,
+            "SECRET_GITHUB_TOKEN": 0.9,
+            "SECRET_GITLAB_TOKEN": 0.9,
+            "SECRET_SLACK_TOKEN": 0.8,
+            "SECRET_STRIPE_KEY": 0.9,
+            "SECRET_GOOGLE_API_KEY": 0.8,
+            "SECRET_OPENAI_KEY": 0.8,
+            "SECRET_JWT": 0.7,
+            "SECRET_PRIVATE_KEY": 0.95,
+            "SECRET_HIGH_ENTROPY": 0.6
         }
         
         # Adjust weights based on content type
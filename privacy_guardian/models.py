@@ -0,0 +1,203 @@
+import gc
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable
+import spacy
+from transformers import pipeline
+
+# Named model profiles, ordered from the smallest footprint to the most accurate.
+# rss_mb is the approximate resident memory the loaded models add to a process.
+MODEL_PROFILES = {
+    "tiny": {
+        "spacy_model": "en_core_web_sm",
+        "classifier_model": None,  # Keyword-only topic detection
+        "rss_mb": 150
+    },
+    "balanced": {
+        "spacy_model": "en_core_web_md",
+        "classifier_model": "typeform/distilbert-base-uncased-mnli",
+        "rss_mb": 800
+    },
+    "accurate": {
+        "spacy_model": "en_core_web_md",
+        "classifier_model": "facebook/bart-large-mnli",
+        "rss_mb": 2400
+    }
+}
+
+DEFAULT_PROFILE = "accurate"
+
+def select_profile(profile: Optional[str] = None, rss_budget_mb: Optional[float] = None) -> str:
+    """
+    Pick a model profile by name or by memory budget.
+    
+    Args:
+        profile: Explicit profile name. Takes precedence over the budget.
+        rss_budget_mb: Memory budget in MB. The most accurate profile that fits is chosen.
+    
+    Returns:
+        Name of the selected profile.
+    """
+    if profile:
+        if profile not in MODEL_PROFILES:
+            raise ValueError(f"Unknown model profile '{profile}'. Available: {', '.join(MODEL_PROFILES)}")
+        return profile
+    
+    if rss_budget_mb is None:
+        return DEFAULT_PROFILE
+    
+    # Profiles are declared smallest first, so keep the last one that fits
+    selected = "tiny"
+    for name, settings in MODEL_PROFILES.items():
+        if settings["rss_mb"] <= rss_budget_mb:
+            selected = name
+    return selected
+
+class ModelManager:
+    """
+    Loads detector models on first use and unloads the ones that sit idle.
+    """
+    
+    def __init__(
+        self,
+        profile: str = DEFAULT_PROFILE,
+        idle_timeout: Optional[float] = None,
+        models_path: Optional[str] = None,
+        verify_checksums: bool = True,
+        manifest_sha256: Optional[str] = None
+    ):
+        """
+        Initialize the model manager.
+        
+        Args:
+            profile: Name of the model profile to load.
+            idle_timeout: Seconds a model may go unused before it is unloaded. None keeps models loaded.
+            models_path: Optional model artifact directory. When given, models are loaded from it
+                         instead of by name, and its manifest decides the profile.
+            verify_checksums: Whether to verify artifact checksums before the first load. Files
+                              unchanged since an earlier verification are not hashed again.
+            manifest_sha256: Optional pinned SHA-256 of the artifact manifest.
+        """
+        self.models_path = models_path
+        self.manifest = None
+        
+        if models_path:
+            # Imported here because the artifact module depends on the profile table above
+            from privacy_guardian.artifacts import read_manifest, verify_model_artifacts
+            self.manifest = read_manifest(models_path, manifest_sha256)
+            if verify_checksums:
+                verify_model_artifacts(models_path, self.manifest)
+            profile = self.manifest["profile"]
+        
+        self.profile_name = profile
+        self.profile = MODEL_PROFILES[profile]
+        self.idle_timeout = idle_timeout
+        
+        self._loaders: Dict[str, Callable[[], Any]] = {
+            "nlp": self._load_nlp,
+            "classifier": self._load_classifier
+        }
+        self._models: Dict[str, Any] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._reaper = None
+        
+        if idle_timeout:
+            self._start_reaper()
+    
+    def _load_nlp(self):
+        """Load the spaCy pipeline for this profile."""
+        if self.manifest:
+            from privacy_guardian.artifacts import load_spacy_artifact
+            return load_spacy_artifact(self.models_path, self.manifest)
+        return spacy.load(self.profile["spacy_model"])
+    
+    def _load_classifier(self):
+        """Load the zero-shot classifier for this profile, if it has one."""
+        if self.manifest:
+            from privacy_guardian.artifacts import load_classifier_artifact
+            return load_classifier_artifact(self.models_path, self.manifest)
+        if not self.profile["classifier_model"]:
+            return None
+        return pipeline("zero-shot-classification",
+                        model=self.profile["classifier_model"],
+                        device=-1)  # Use CPU
+    
+    def load(self) -> None:
+        """Eagerly load every model in the profile."""
+        for name in self._loaders:
+            self.get(name)
+    
+    def get(self, name: str) -> Any:
+        """
+        Get a model by name, loading it if needed.
+        
+        Args:
+            name: Model name ("nlp" or "classifier").
+        
+        Returns:
+            The loaded model (None if the profile has no model for this slot).
+        """
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._loaders[name]()
+            self._last_used[name] = time.monotonic()
+            return self._models[name]
+    
+    def unload(self, name: Optional[str] = None) -> None:
+        """
+        Unload one model, or all models if no name is given.
+        
+        Args:
+            name: Optional model name.
+        """
+        with self._lock:
+            names = [name] if name else list(self._models)
+            for model_name in names:
+                self._models.pop(model_name, None)
+                self._last_used.pop(model_name, None)
+        gc.collect()
+    
+    def unload_idle(self) -> List[str]:
+        """
+        Unload models that have not been used within the idle timeout.
+        
+        Returns:
+            Names of the models that were unloaded.
+        """
+        if not self.idle_timeout:
+            return []
+        
+        now = time.monotonic()
+        with self._lock:
+            idle = [name for name, last_used in self._last_used.items()
+                    if now - last_used >= self.idle_timeout and self._models.get(name) is not None]
+            for name in idle:
+                self._models.pop(name, None)
+                self._last_used.pop(name, None)
+        
+        if idle:
+            gc.collect()
+        return idle
+    
+    def loaded_models(self) -> List[str]:
+        """Get the names of the models currently held in memory."""
+        with self._lock:
+            return [name for name, model in self._models.items() if model is not None]
+    
+    def _start_reaper(self) -> None:
+        """Start the background thread that unloads idle models."""
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+        
+        def reap():
+            while not self._stop_event.wait(interval):
+                self.unload_idle()
+        
+        self._reaper = threading.Thread(target=reap, name="privacy-guardian-model-reaper", daemon=True)
+        self._reaper.start()
+    
+    def close(self) -> None:
+        """Stop the idle reaper and release all models."""
+        self._stop_event.set()
+        self.unload()
@@ -0,0 +1,54 @@
+import re
+import uuid
+import pytest
+from whisperprint.encoding import ZERO_WIDTH_PATTERN, encode_fingerprint
+from whisperprint.formats import DOCX_TEXT_ELEMENTS, MarkupFingerprinter, fingerprint_stream
+
+FINGERPRINT = encode_fingerprint(str(uuid.uuid4()))
+
+def _fingerprint(document: str, document_format: str, chunk_size: int = 7) -> str:
+    chunks = [document[i:i + chunk_size] for i in range(0, len(document), chunk_size)]
+    return ''.join(fingerprint_stream(chunks, FINGERPRINT, document_format))
+
+def _marked_gaps(output: str) -> list:
+    """The text between tags (and after the last one) that received fingerprint characters."""
+    return [gap for gap in re.split(r'<[^>]*>', output) if ZERO_WIDTH_PATTERN.search(gap)]
+
+def test_xml_leftovers_stay_inside_the_root():
+    document = '<?xml version="1.0"?>\n<root>\n  <item>Short</item>\n</root>\n'
+    output = _fingerprint(document, "xml")
+    
+    assert ZERO_WIDTH_PATTERN.sub('', output) == document
+    assert ''.join(ZERO_WIDTH_PATTERN.findall(output)) == FINGERPRINT
+    assert output.startswith('<?xml')
+    assert output.endswith('</root>\n')
+    assert [ZERO_WIDTH_PATTERN.sub('', gap) for gap in _marked_gaps(output)] == ["Short"]
+
+def test_html_leftovers_skip_table_whitespace_and_trailing_text():
+    document = (
+        "<html><body>\n<table>\n<tr>\n<td>First cell</td>\n<td>Second cell</td>\n</tr>\n</table>\n"
+        "</body></html>\n"
+    )
+    output = _fingerprint(document, "html")
+    
+    assert ZERO_WIDTH_PATTERN.sub('', output) == document
+    assert ''.join(ZERO_WIDTH_PATTERN.findall(output)) == FINGERPRINT
+    assert output.endswith("</body></html>\n")
+    assert all(not ZERO_WIDTH_PATTERN.sub('', gap).isspace() for gap in _marked_gaps(output))
+
+def test_docx_part_without_text_runs_is_not_buffered():
+    fingerprinter = MarkupFingerprinter(FINGERPRINT, "xml", DOCX_TEXT_ELEMENTS)
+    part = '<?xml version="1.0"?>\n<w:hdr><w:p><w:r><w:tab/></w:r></w:p></w:hdr>'
+    
+    # Markup before the first text run is passed through as soon as it is complete
+    assert fingerprinter.feed(part) == part
+    with pytest.raises(ValueError):
+        fingerprinter.finish()
+
+def test_docx_whitespace_run_carries_leftovers():
+    fingerprinter = MarkupFingerprinter(FINGERPRINT, "xml", DOCX_TEXT_ELEMENTS)
+    part = '<w:document><w:body><w:p><w:r><w:t xml:space="preserve"> </w:t></w:r></w:p></w:body></w:document>'
+    output = fingerprinter.feed(part) + fingerprinter.finish()
+    
+    assert ZERO_WIDTH_PATTERN.sub('', output) == part
+    assert _marked_gaps(output) == [' ' + FINGERPRINT]
@@ -0,0 +1,120 @@
+import zlib
+import sqlite3
+from whisperprint.database import FingerprintDatabase
+from whisperprint.migrations import SCHEMA_VERSION
+
+# Schema of databases written before versioned migrations
+BASELINE_SCHEMA = """
+CREATE TABLE recipients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient_id TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT
+);
+CREATE TABLE fingerprints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient_id TEXT NOT NULL,
+    uuid TEXT UNIQUE NOT NULL,
+    fingerprint TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    document_hash TEXT,
+    document_metadata TEXT,
+    FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
+);
+CREATE TABLE documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_hash TEXT UNIQUE NOT NULL,
+    original_text TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    metadata TEXT
+);
+CREATE TABLE audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    event_data TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id TEXT
+);
+INSERT INTO recipients (recipient_id) VALUES ('alice');
+INSERT INTO fingerprints (recipient_id, uuid, fingerprint) VALUES ('alice', '00000000-0000-4000-8000-000000000001', 'fp');
+"""
+
+def test_fresh_database_hot_queries_use_indexes(tmp_path):
+    db = FingerprintDatabase(str(tmp_path / "fresh.db"))
+    try:
+        assert db.schema_version == SCHEMA_VERSION
+        assert db.verify_query_plans() == []
+    finally:
+        db.close()
+
+def test_baseline_database_hot_queries_use_indexes(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    
+    db = FingerprintDatabase(path)
+    try:
+        assert db.schema_version == SCHEMA_VERSION
+        assert db.verify_query_plans() == []
+        assert db.get_recipient_by_uuid('00000000-0000-4000-8000-000000000001')['recipient_id'] == 'alice'
+    finally:
+        db.close()
+
+def test_plan_check_reports_full_scans(tmp_path):
+    db = FingerprintDatabase(str(tmp_path / "unindexed.db"))
+    try:
+        with db.transaction() as conn:
+            conn.execute("DROP INDEX idx_fingerprints_recipient_id")
+        assert any(problem.startswith("fingerprints_by_recipient:") for problem in db.verify_query_plans())
+    finally:
+        db.close()
+
+def test_duplicate_variants_are_merged(tmp_path):
+    path = str(tmp_path / "variants.db")
+    FingerprintDatabase(path).close()
+    
+    # Roll back to version 5, which stored a copy of each variant per recipient
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    DROP TABLE variant_recipients;
+    DROP TABLE variant_signatures;
+    CREATE TABLE variant_signatures (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient_id TEXT NOT NULL,
+        document_hash TEXT,
+        signature BLOB NOT NULL,
+        variant_text BLOB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    PRAGMA user_version = 5;
+    """)
+    for variant_id, recipient_id in enumerate(["alice", "bob", "carol"], start=1):
+        conn.execute(
+            "INSERT INTO variant_signatures (recipient_id, document_hash, signature, variant_text) VALUES (?, 'doc', ?, ?)",
+            (recipient_id, b"signature", zlib.compress(b"the shared variant"))
+        )
+        conn.executemany("INSERT INTO lsh_buckets (bucket_key, variant_id) VALUES (?, ?)", [(1, variant_id), (2, variant_id)])
+    conn.commit()
+    conn.close()
+    
+    db = FingerprintDatabase(path)
+    try:
+        assert db.schema_version == SCHEMA_VERSION
+        candidates = db.get_lsh_candidates([1, 2])
+        assert len(candidates) == 1
+        assert sorted(candidates[0]['recipient_ids']) == ["alice", "bob", "carol"]
+        assert candidates[0]['variant_text'] == "the shared variant"
+        
+        db.store_variant_signatures([{
+            "recipient_ids": ["dave"],
+            "document_hash": "doc",
+            "signature": b"signature",
+            "band_keys": [1, 2],
+            "variant_text": "the shared variant"
+        }])
+        candidates = db.get_lsh_candidates([1, 2])
+        assert len(candidates) == 1
+        assert sorted(candidates[0]['recipient_ids']) == ["alice", "bob", "carol", "dave"]
+    finally:
+        db.close()
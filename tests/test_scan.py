@@ -0,0 +1,69 @@
+import os
+import uuid
+import sqlite3
+import pytest
+from whisperprint.__main__ import main
+from whisperprint import scan
+from whisperprint.encoding import encode_fingerprint, decode_fingerprint_symbols
+
+def _write_dump(path: str, count: int) -> list:
+    """Write a dump with one fingerprinted line per recipient UUID."""
+    uuids = [str(uuid.uuid4()) for _ in range(count)]
+    with open(path, 'w', encoding='utf-8') as f:
+        for recipient_uuid in uuids:
+            f.write(f"Quarterly numbers. {encode_fingerprint(recipient_uuid)} Do not share.\n")
+    return uuids
+
+def test_scan_file_decodes_every_fingerprint(tmp_path):
+    path = str(tmp_path / "dump.txt")
+    uuids = _write_dump(path, 50)
+    
+    assert [finding['uuid'] for finding in scan.scan_file(path)] == uuids
+
+def test_scan_file_work_is_linear(tmp_path, monkeypatch):
+    # Count the candidate start offsets the decoder may try instead of timing the scan
+    offsets_tried = []
+    
+    def counting_decode(symbols, position=0, max_offsets=256):
+        offsets_tried[-1] += min(max_offsets, len(symbols) - position)
+        return decode_fingerprint_symbols(symbols, position, max_offsets)
+    
+    monkeypatch.setattr(scan, "decode_fingerprint_symbols", counting_decode)
+    
+    for count in (500, 2000):
+        path = str(tmp_path / f"dump-{count}.txt")
+        _write_dump(path, count)
+        offsets_tried.append(0)
+        assert len(scan.scan_file(path)) == count
+        # A bounded window per fingerprint: a rescan from every offset would be quadratic
+        assert offsets_tried[-1] <= count * scan._MAX_OFFSETS
+
+@pytest.mark.parametrize("command", [["scan", "."], ["snapshot", "out.snap"]])
+def test_cli_rejects_missing_database(tmp_path, capsys, command):
+    db_path = str(tmp_path / "missing.db")
+    
+    with pytest.raises(SystemExit) as exit_info:
+        main(command + ["--db", db_path])
+    
+    assert exit_info.value.code == 2
+    assert "does not exist" in capsys.readouterr().err
+    assert not os.path.exists(db_path)
+
+@pytest.mark.parametrize("command", [["scan", "."], ["snapshot", "out.snap"]])
+def test_cli_leaves_outdated_database_untouched(tmp_path, capsys, command):
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE recipients (id INTEGER PRIMARY KEY, recipient_id TEXT UNIQUE NOT NULL)")
+    conn.close()
+    
+    with pytest.raises(SystemExit) as exit_info:
+        main(command + ["--db", db_path])
+    
+    assert exit_info.value.code == 2
+    assert "schema version 0" in capsys.readouterr().err
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    finally:
+        conn.close()
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import argparse
+from whisperprint.database import FingerprintDatabase
+from whisperprint.migrations import SCHEMA_VERSION
+from whisperprint.scan import scan_paths, format_report
+from whisperprint.snapshot import SnapshotReader, export_snapshot
+
+def _open_existing_database(parser: argparse.ArgumentParser, path: str) -> FingerprintDatabase:
+    """Open a database that must already exist, instead of creating an empty one."""
+    if not os.path.exists(path):
+        parser.error(f"database {path} does not exist")
+    return FingerprintDatabase(path)
+
+def _open_database_for_reading(parser: argparse.ArgumentParser, path: str) -> FingerprintDatabase:
+    """Open an existing, current database read-only, without migrating or changing its journal mode."""
+    if not os.path.exists(path):
+        parser.error(f"database {path} does not exist")
+    db = FingerprintDatabase(path, read_only=True)
+    if db.schema_version < SCHEMA_VERSION:
+        db.close()
+        parser.error(
+            f"database {path} has schema version {db.schema_version}, expected {SCHEMA_VERSION}; "
+            f"upgrade it with: python -m whisperprint migrate --db {path}"
+        )
+    return db
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m whisperprint", description="WhisperPrint command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    scan_parser = subparsers.add_parser("scan", help="Scan files and directories for fingerprints and attribute them")
+    scan_parser.add_argument("paths", nargs="+", help="Files or directories to scan")
+    scan_parser.add_argument("--db", default="whisperprint.db", help="Fingerprint database used to resolve recipients")
+    scan_parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    scan_parser.add_argument("--max-gap", type=int, default=65536,
+                             help="Maximum distance in bytes between fingerprint characters of one document")
+    scan_parser.add_argument("--snapshot", help="Snapshot file consulted before the database")
+    scan_parser.add_argument("--json", action="store_true", help="Print the findings as JSON")
+    
+    snapshot_parser = subparsers.add_parser("snapshot", help="Export a memory-mapped snapshot for identify workers")
+    snapshot_parser.add_argument("output", help="Snapshot file to write")
+    snapshot_parser.add_argument("--db", default="whisperprint.db", help="Fingerprint database to export")
+    
+    compact_parser = subparsers.add_parser(
+        "compact", help="Move inline document bodies into the chunk store and delete unreferenced chunks"
+    )
+    compact_parser.add_argument("--db", default="whisperprint.db", help="Fingerprint database to compact")
+    compact_parser.add_argument("--vacuum", action="store_true", help="Run VACUUM afterwards to shrink the file")
+    
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade the database schema and check the hot query plans")
+    migrate_parser.add_argument("--db", default="whisperprint.db", help="Fingerprint database to migrate")
+    
+    archive_parser = subparsers.add_parser("archive-audit", help="Compress audit log entries of old months into archives")
+    archive_parser.add_argument("--db", default="whisperprint.db", help="Fingerprint database to archive")
+    archive_parser.add_argument("--retain-months", type=int, default=3,
+                                help="Months, including the current one, kept in the live audit log")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "scan":
+        snapshot = SnapshotReader(args.snapshot) if args.snapshot else None
+        db = _open_database_for_reading(parser, args.db)
+        findings = scan_paths(args.paths, db, args.workers, args.max_gap, snapshot)
+        print(json.dumps(findings, indent=2) if args.json else format_report(findings))
+        return 0 if any(finding["recipient_id"] for finding in findings) else 1
+    
+    if args.command == "snapshot":
+        count = export_snapshot(_open_database_for_reading(parser, args.db).iter_recipient_uuids(), args.output)
+        print(f"Wrote {count} records to {args.output}")
+        return 0
+    
+    if args.command == "compact":
+        db = _open_existing_database(parser, args.db)
+        print(f"Migrated {db.compact_documents()} documents to the chunk store")
+        print(f"Deleted {db.collect_chunks()} unreferenced chunks")
+        if args.vacuum:
+            db.connections.connection().execute("VACUUM")
+        db.close()
+        return 0
+    
+    if args.command == "migrate":
+        db = FingerprintDatabase(args.db)
+        print(f"Schema version {db.schema_version}")
+        problems = db.verify_query_plans()
+        for problem in problems:
+            print(f"Query plan without index: {problem}")
+        db.close()
+        return 1 if problems else 0
+    
+    if args.command == "archive-audit":
+        db = _open_existing_database(parser, args.db)
+        print(f"Archived {db.archive_audit_logs(args.retain_months)} audit log entries")
+        db.close()
+        return 0
+    
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import queue
+import atexit
+import weakref
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from whisperprint.connection import ConnectionManager
+
+_STOP = object()
+_WRITE_ATTEMPTS = 3
+
+# Writers still open at interpreter exit are flushed
+_WRITERS = weakref.WeakSet()
+
+@atexit.register
+def _close_writers() -> None:
+    for writer in list(_WRITERS):
+        writer.close()
+
+def _timestamp() -> str:
+    """Current UTC time in the format of SQLite's CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+class AuditWriter:
+    """
+    Group-commit writer for the audit log.
+    
+    Events are queued in memory and written by a background thread, many rows per
+    transaction, whenever batch_size events are waiting or flush_interval seconds have
+    passed. Logging an event on a hot path is an enqueue. The queue is bounded: when the
+    writer falls behind, callers block until there is room rather than dropping events.
+    
+    Events logged inside a database transaction are queued only once it commits, so rolled
+    back writes leave no audit entries. Durable events (such as compliance-critical ones)
+    bypass the queue and are written synchronously, in the caller's transaction if there is one.
+    Pending events are flushed on close() and at interpreter exit; events logged after
+    close() are written synchronously.
+    """
+    
+    def __init__(
+        self,
+        connections: ConnectionManager,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        durable_events: Optional[Set[str]] = None
+    ):
+        """
+        Initialize the audit writer.
+        
+        Args:
+            connections: Connection manager of the audit database.
+            max_queue_size: Maximum number of events waiting to be written.
+            batch_size: Maximum number of events written per transaction.
+            flush_interval: Seconds an event may wait before its batch is written.
+            durable_events: Event types that are always written synchronously.
+        """
+        self.connections = connections
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durable_events = set(durable_events or ())
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        # Events enqueued and events handled by the writer thread; flush() waits for the gap to close
+        self._enqueued = 0
+        self._written = 0
+        self._progress = threading.Condition()
+        _WRITERS.add(self)
+    
+    def _ensure_started(self) -> "queue.Queue":
+        # Called with self._lock held. The writer thread does not survive a fork; the child starts its own
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue = queue.Queue(self.max_queue_size)
+            self._enqueued = 0
+            with self._progress:
+                self._written = 0
+            self._thread = threading.Thread(target=self._run, name="whisperprint-audit", daemon=True)
+            self._thread.start()
+        return self._queue
+    
+    def _write(self, rows: List[Tuple[str, str, Optional[str], str]]) -> None:
+        with self.connections.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO audit_log (event_type, event_data, user_id, timestamp) VALUES (?, ?, ?, ?)",
+                rows
+            )
+    
+    def _write_batch(self, rows: List[Tuple[str, str, Optional[str], str]]) -> None:
+        for attempt in range(_WRITE_ATTEMPTS):
+            try:
+                self._write(rows)
+                return
+            except Exception as e:
+                print(f"Error writing {len(rows)} audit events (attempt {attempt + 1}): {e}")
+                time.sleep(self.flush_interval)
+        print(f"Dropped {len(rows)} audit events after {_WRITE_ATTEMPTS} failed attempts")
+    
+    def _run(self) -> None:
+        events = self._queue
+        stopping = False
+        while not stopping:
+            item = events.get()
+            if item is _STOP:
+                break
+            
+            # Collect more events until the batch is full or the flush interval has passed
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = events.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            self._write_batch(batch)
+            with self._progress:
+                self._written += len(batch)
+                self._progress.notify_all()
+        
+        self.connections.close()
+    
+    def _enqueue(self, rows: List[Tuple[str, str, Optional[str], str]]) -> None:
+        # Checking for close() and queueing under one lock, so no event lands in a stopped queue
+        with self._lock:
+            if not self._closed:
+                events = self._ensure_started()
+                for row in rows:
+                    events.put(row)
+                self._enqueued += len(rows)
+                return
+        self._write(rows)
+    
+    def log_many(self, events: Iterable[Tuple[str, Dict[str, Any], Optional[str]]], durable: bool = False) -> None:
+        """
+        Log several events.
+        
+        Args:
+            events: (event_type, event_data, user_id) tuples.
+            durable: Write the events synchronously instead of queueing them.
+        """
+        rows = [
+            (event_type, json.dumps(event_data), user_id, _timestamp())
+            for event_type, event_data, user_id in events
+        ]
+        if not rows:
+            return
+        
+        if self._closed or durable or any(row[0] in self.durable_events for row in rows):
+            self._write(rows)
+        else:
+            self.connections.after_commit(lambda: self._enqueue(rows))
+    
+    def log(self, event_type: str, event_data: Dict[str, Any], user_id: Optional[str] = None, durable: bool = False) -> None:
+        """
+        Log an event.
+        
+        Args:
+            event_type: Type of event (e.g., 'fingerprint_stored', 'recipient_added').
+            event_data: Data associated with the event.
+            user_id: Optional ID of the user who performed the action.
+            durable: Write the event synchronously instead of queueing it.
+        """
+        self.log_many([(event_type, event_data, user_id)], durable)
+    
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until the events queued before the call have been written.
+        
+        Events logged while waiting are not waited for, so a steady stream of new events
+        cannot hold the caller up. Must not be called inside a database transaction, which
+        would block the writer.
+        
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        
+        Returns:
+            True if the events were written, False if the timeout expired first.
+        """
+        # Read without the lock, which an enqueuer blocked on a full queue may be holding
+        target = self._enqueued
+        thread = self._thread if self._pid == os.getpid() else None
+        if thread is None or not thread.is_alive():
+            return True
+        with self._progress:
+            return self._progress.wait_for(lambda: self._written >= target, timeout)
+    
+    def close(self) -> None:
+        """Write the pending events and stop the background thread."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread if self._pid == os.getpid() else None
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
@@ -0,0 +1,135 @@
+import os
+import re
+import time
+import argparse
+import tempfile
+from itertools import combinations
+from typing import Dict, List, Any, Optional
+from whisperprint.engine import WhisperPrintEngine
+from whisperprint.inference import GENERATION_PRESETS, INFERENCE_BACKENDS, build_generation_settings
+
+SAMPLE_TEXT = (
+    "The board approved the revised budget for the next fiscal year. "
+    "Marketing spend will be reduced by twelve percent while research funding stays flat. "
+    "The merger negotiations with our main competitor are expected to close in the third quarter. "
+    "All employees must keep these figures confidential until the public announcement.\n"
+    "Please direct any questions about the restructuring plan to the finance department. "
+    "A detailed breakdown of the new cost centers will be shared at the next all-hands meeting."
+)
+
+def _words(text: str) -> set:
+    """Lower-cased word set of a text."""
+    return set(re.findall(r"\w+", text.lower()))
+
+def _jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two sets."""
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+def score_variants(source: str, variants: List[str]) -> Dict[str, float]:
+    """
+    Score paraphrase quality with cheap lexical proxies.
+    
+    Args:
+        source: The original text.
+        variants: Generated variants of the text.
+    
+    Returns:
+        Dict with "source_overlap" (meaning preservation, higher is closer to the source),
+        "diversity" (mean pairwise distance between variants) and "unchanged" (fraction of
+        variants identical to the source).
+    """
+    source_words = _words(source)
+    variant_words = [_words(variant) for variant in variants]
+    
+    overlap = sum(_jaccard(source_words, words) for words in variant_words) / len(variants)
+    pairs = list(combinations(variant_words, 2))
+    diversity = sum(1 - _jaccard(a, b) for a, b in pairs) / len(pairs) if pairs else 0.0
+    unchanged = sum(variant.strip() == source.strip() for variant in variants) / len(variants)
+    
+    return {"source_overlap": overlap, "diversity": diversity, "unchanged": unchanged}
+
+def run_benchmark(
+    text: str,
+    backends: List[str],
+    presets: List[str],
+    model_name: str = "t5-base",
+    num_variants: int = 3,
+    repeats: int = 3,
+    num_threads: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Measure paraphrase latency and quality for each backend/preset combination.
+    
+    The paraphrase cache is bypassed so every repeat runs the model.
+    
+    Args:
+        text: The text to paraphrase.
+        backends: Inference backends to compare.
+        presets: Decoding presets to compare.
+        model_name: The T5 model to load.
+        num_variants: Number of variants generated per segment.
+        repeats: Number of timed runs per combination.
+        num_threads: Optional number of intra-op threads.
+    
+    Returns:
+        One result dict per combination.
+    """
+    results = []
+    db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    
+    for backend in backends:
+        load_start = time.perf_counter()
+        engine = WhisperPrintEngine(model_name, db_path, inference_backend=backend, num_threads=num_threads)
+        # The model loads lazily; touch it so its load is part of the measurement
+        engine.backend
+        load_seconds = time.perf_counter() - load_start
+        
+        segments = [segment for segment, _ in engine._segment_text(text) if segment.strip()]
+        
+        for preset in presets:
+            settings = build_generation_settings(preset, num_variants, engine.max_segment_length)
+            
+            # Warm-up run, not timed
+            engine._paraphrase_segments(segments, settings)
+            
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                segment_variants = engine._paraphrase_segments(segments, settings)
+                timings.append(time.perf_counter() - start)
+            
+            variants = [" ".join(variants[v] for variants in segment_variants) for v in range(num_variants)]
+            result = {
+                "backend": backend,
+                "preset": preset,
+                "load_seconds": load_seconds,
+                "mean_seconds": sum(timings) / len(timings),
+                "best_seconds": min(timings)
+            }
+            result.update(score_variants(" ".join(segments), variants))
+            results.append(result)
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WhisperPrint paraphrase latency and quality")
+    parser.add_argument("--text-file", help="Text to paraphrase (defaults to a built-in sample memo)")
+    parser.add_argument("--model", default="t5-base")
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8"], choices=INFERENCE_BACKENDS)
+    parser.add_argument("--presets", nargs="+", default=list(GENERATION_PRESETS), choices=list(GENERATION_PRESETS))
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int)
+    args = parser.parse_args()
+    
+    text = SAMPLE_TEXT
+    if args.text_file:
+        with open(args.text_file) as f:
+            text = f.read()
+    
+    results = run_benchmark(text, args.backends, args.presets, args.model, args.variants, args.repeats, args.threads)
+    
+    print(f"{'backend':<12}{'preset':<10}{'load s':>8}{'mean s':>9}{'best s':>9}{'overlap':>9}{'diversity':>11}{'unchanged':>11}")
+    for r in results:
+        print(f"{r['backend']:<12}{r['preset']:<10}{r['load_seconds']:>8.2f}{r['mean_seconds']:>9.3f}{r['best_seconds']:>9.3f}"
+              f"{r['source_overlap']:>9.2f}{r['diversity']:>11.2f}{r['unchanged']:>11.2f}")
@@ -0,0 +1,199 @@
+import zlib
+import codecs
+import hashlib
+import sqlite3
+from typing import List, Iterator
+import numpy as np
+from whisperprint.connection import select_in
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("zlib", "zstd")
+# zstd is opt-in: chunks it writes can only be read where the optional zstandard package is installed
+DEFAULT_CODEC = "zlib"
+
+# Content-defined chunking parameters (bytes)
+MIN_CHUNK_SIZE = 2048
+AVERAGE_CHUNK_SIZE = 8192
+MAX_CHUNK_SIZE = 65536
+WINDOW_SIZE = 48
+
+# Random per-byte values for the rolling window hash; fixed seed so boundaries are stable across runs
+_BYTE_VALUES = np.random.RandomState(0x5EED).randint(0, 1 << 32, size=256, dtype=np.uint64)
+
+def chunk_boundaries(data: bytes) -> List[int]:
+    """
+    Split data into content-defined chunks.
+    
+    A boundary is placed wherever the rolling hash of the preceding WINDOW_SIZE bytes has
+    its low bits clear, so an edit only changes the chunks around it and the rest of a
+    revised document deduplicates against the previous revision. Chunk sizes are kept
+    between MIN_CHUNK_SIZE and MAX_CHUNK_SIZE.
+    
+    Args:
+        data: The bytes to split.
+    
+    Returns:
+        End offsets of the chunks; the last one is len(data).
+    """
+    if len(data) <= MIN_CHUNK_SIZE:
+        return [len(data)] if data else []
+    
+    # Sliding-window sum of per-byte random values, computed for all positions at once
+    values = _BYTE_VALUES[np.frombuffer(data, dtype=np.uint8)]
+    sums = np.cumsum(values)
+    window = sums[WINDOW_SIZE - 1:].copy()
+    window[1:] -= sums[:-WINDOW_SIZE]
+    mask = np.uint64(AVERAGE_CHUNK_SIZE - 1)
+    candidates = (np.nonzero((window & mask) == 0)[0] + WINDOW_SIZE).tolist()
+    
+    boundaries = []
+    start = 0
+    index = 0
+    while start < len(data):
+        if len(data) - start <= MIN_CHUNK_SIZE:
+            end = len(data)
+        else:
+            # First candidate far enough from the previous boundary, or a forced cut at the maximum size
+            while index < len(candidates) and candidates[index] < start + MIN_CHUNK_SIZE:
+                index += 1
+            limit = min(start + MAX_CHUNK_SIZE, len(data))
+            end = candidates[index] if index < len(candidates) and candidates[index] <= limit else limit
+        boundaries.append(end)
+        start = end
+    return boundaries
+
+def compress_chunk(data: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    """
+    Compress a chunk.
+    
+    Args:
+        data: The chunk bytes.
+        codec: One of CODECS ("zstd" requires the zstandard package).
+    
+    Returns:
+        The compressed bytes.
+    """
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("The zstd codec requires zstandard: pip install zstandard")
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, 9)
+    raise ValueError(f"Unknown codec '{codec}'. Available: {', '.join(CODECS)}")
+
+def decompress_chunk(data: bytes, codec: str) -> bytes:
+    """
+    Decompress a chunk written by compress_chunk.
+    
+    Args:
+        data: The compressed bytes.
+        codec: The codec the chunk was written with.
+    
+    Returns:
+        The chunk bytes.
+    """
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("Reading zstd chunks requires zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown codec '{codec}'")
+
+class BlobStore:
+    """
+    Content-addressed, compressed, deduplicated storage of document bodies in the chunks table.
+    
+    Methods take a cursor so chunks are written in the caller's transaction.
+    """
+    
+    def __init__(self, codec: str = DEFAULT_CODEC):
+        """
+        Initialize the blob store.
+        
+        Args:
+            codec: Compression codec for new chunks.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'. Available: {', '.join(CODECS)}")
+        self.codec = codec
+    
+    def put(self, cursor: sqlite3.Cursor, text: str) -> List[str]:
+        """
+        Store a text as chunks, skipping chunks that are already stored.
+        
+        Args:
+            cursor: Cursor of the open transaction.
+            text: The text to store.
+        
+        Returns:
+            The chunk list: hashes of the text's chunks, in order.
+        """
+        data = text.encode('utf-8')
+        boundaries = chunk_boundaries(data)
+        chunk_hashes = []
+        start = 0
+        for end in boundaries:
+            chunk_hashes.append(hashlib.sha256(data[start:end]).hexdigest())
+            start = end
+        
+        # Only compress the chunks that are new
+        unique_hashes = list(dict.fromkeys(chunk_hashes))
+        existing = {row[0] for row in select_in(cursor, "SELECT chunk_hash FROM chunks WHERE chunk_hash", unique_hashes)}
+        
+        start = 0
+        new_chunks = []
+        for chunk_hash, end in zip(chunk_hashes, boundaries):
+            if chunk_hash not in existing:
+                chunk = data[start:end]
+                new_chunks.append((chunk_hash, self.codec, len(chunk), compress_chunk(chunk, self.codec)))
+                existing.add(chunk_hash)
+            start = end
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO chunks (chunk_hash, codec, size, data) VALUES (?, ?, ?, ?)",
+            new_chunks
+        )
+        return chunk_hashes
+    
+    def iter_text(self, conn: sqlite3.Connection, chunk_hashes: List[str]) -> Iterator[str]:
+        """
+        Reassemble a text lazily, one chunk at a time.
+        
+        Args:
+            conn: Open database connection.
+            chunk_hashes: The chunk list returned by put().
+        
+        Yields:
+            Consecutive pieces of the text.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        cursor = conn.cursor()
+        for chunk_hash in chunk_hashes:
+            cursor.execute("SELECT codec, data FROM chunks WHERE chunk_hash = ?", (chunk_hash,))
+            row = cursor.fetchone()
+            if row is None:
+                raise KeyError(f"Missing chunk {chunk_hash}")
+            piece = decoder.decode(decompress_chunk(row[1], row[0]))
+            if piece:
+                yield piece
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+    
+    def read(self, conn: sqlite3.Connection, chunk_hashes: List[str]) -> str:
+        """
+        Reassemble a whole text.
+        
+        Args:
+            conn: Open database connection.
+            chunk_hashes: The chunk list returned by put().
+        
+        Returns:
+            The text.
+        """
+        return ''.join(self.iter_text(conn, chunk_hashes))
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe mapping with a fixed capacity that evicts the least recently used entry.
+    """
+    
+    def __init__(self, capacity: int = 100000):
+        """
+        Initialize the cache.
+        
+        Args:
+            capacity: Maximum number of entries kept in memory.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.put(key, value)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get an entry and mark it as recently used.
+        
+        Args:
+            key: The key to look up.
+            default: Value returned if the key is not cached.
+        
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace an entry, evicting the least recently used one if the cache is full.
+        
+        Args:
+            key: The key to store.
+            value: The value to store.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+    
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Iterate over a snapshot of the cached entries, least recently used first."""
+        with self._lock:
+            return iter(list(self._entries.items()))
+    
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove an entry and return its value, or default if it is not cached."""
+        with self._lock:
+            return self._entries.pop(key, default)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
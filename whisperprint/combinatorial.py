@@ -0,0 +1,159 @@
+import re
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
+from whisperprint.encoding import ReedSolomonError, rs_encode, rs_decode
+
+# The payload is the first four bytes of the recipient UUID, protected by Reed-Solomon parity
+COMBINATORIAL_DATA_BYTES = 4
+COMBINATORIAL_PARITY_BYTES = 4
+COMBINATORIAL_CODEWORD_BITS = (COMBINATORIAL_DATA_BYTES + COMBINATORIAL_PARITY_BYTES) * 8
+
+_WHITESPACE = re.compile(r'\s+')
+
+def segment_key(segment: str) -> str:
+    """
+    Hash a segment for lookup, ignoring case and whitespace differences.
+    
+    Args:
+        segment: The segment text.
+    
+    Returns:
+        Hex digest identifying the normalized segment.
+    """
+    normalized = _WHITESPACE.sub(' ', segment).strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+def _payload_bits(recipient_uuid: str) -> List[int]:
+    """Codeword bits (most significant first) for a recipient UUID."""
+    data = bytes.fromhex(recipient_uuid.replace('-', '')[:COMBINATORIAL_DATA_BYTES * 2])
+    codeword = rs_encode(data, COMBINATORIAL_PARITY_BYTES)
+    return [(byte >> (7 - bit)) & 1 for byte in codeword for bit in range(8)]
+
+class VariantTable:
+    """
+    Alternative phrasings of every segment of a document, used to encode recipients.
+    
+    Each segment with at least two distinct alternatives is a carrier slot holding
+    floor(log2(alternatives)) bits. A recipient's codeword (UUID prefix plus Reed-Solomon
+    parity) is spread over the carrier slots in order, repeating from the start when the
+    document has more capacity than the codeword needs. Rendering a recipient's copy is a
+    table lookup, and the choice pattern survives the removal of zero-width characters.
+    """
+    
+    def __init__(self, segments: List[Tuple[str, str]], options: List[List[str]]):
+        """
+        Initialize the table.
+        
+        Args:
+            segments: (segment, separator) tuples of the original document.
+            options: Distinct alternatives for each segment; the first is used where a slot carries no bits.
+        """
+        self.segments = segments
+        self.options = options
+        self.slot_bits = [len(alternatives).bit_length() - 1 if alternatives else 0 for alternatives in options]
+        self.capacity = sum(self.slot_bits)
+    
+    def choices(self, recipient_uuid: str) -> List[int]:
+        """
+        Compute the alternative chosen in every slot for a recipient.
+        
+        Args:
+            recipient_uuid: The recipient's UUID.
+        
+        Returns:
+            One alternative index per segment.
+        """
+        bits = _payload_bits(recipient_uuid)
+        position = 0
+        choices = []
+        for bit_count in self.slot_bits:
+            choice = 0
+            for _ in range(bit_count):
+                choice = (choice << 1) | bits[position % len(bits)]
+                position += 1
+            choices.append(choice)
+        return choices
+    
+    def render(self, choices: List[int]) -> str:
+        """
+        Assemble a document from per-slot choices.
+        
+        Args:
+            choices: One alternative index per segment.
+        
+        Returns:
+            The assembled text.
+        """
+        parts = []
+        for (segment, separator), alternatives, choice in zip(self.segments, self.options, choices):
+            parts.append(alternatives[choice] if alternatives else segment)
+            parts.append(separator)
+        return ''.join(parts)
+    
+    def lookup_keys(self) -> List[Tuple[str, int, int]]:
+        """
+        List the lookup key of every alternative in a carrier slot.
+        
+        Returns:
+            (segment key, slot, choice) tuples.
+        """
+        return [
+            (segment_key(alternative), slot, choice)
+            for slot, alternatives in enumerate(self.options) if self.slot_bits[slot]
+            for choice, alternative in enumerate(alternatives[:1 << self.slot_bits[slot]])
+        ]
+    
+    def decode(self, observed: Dict[int, int]) -> Optional[Tuple[bytes, float]]:
+        """
+        Recover the UUID prefix from the choices observed in a leaked copy.
+        
+        Codeword bits seen several times are decided by majority; codeword bytes with bits
+        that were never observed (sentences missing from the leak) are decoded as erasures.
+        
+        Args:
+            observed: Mapping from slot index to the observed alternative index.
+        
+        Returns:
+            Tuple of (UUID prefix bytes, coverage of the codeword bits), or None if the
+            codeword cannot be recovered.
+        """
+        votes = [[0, 0] for _ in range(COMBINATORIAL_CODEWORD_BITS)]
+        position = 0
+        for slot, bit_count in enumerate(self.slot_bits):
+            choice = observed.get(slot)
+            for shift in range(bit_count - 1, -1, -1):
+                if choice is not None:
+                    votes[position % COMBINATORIAL_CODEWORD_BITS][(choice >> shift) & 1] += 1
+                position += 1
+        
+        codeword = []
+        erasures = []
+        known_bits = 0
+        for byte_index in range(COMBINATORIAL_CODEWORD_BITS // 8):
+            value = 0
+            erased = False
+            for zeros, ones in votes[byte_index * 8:(byte_index + 1) * 8]:
+                value <<= 1
+                if zeros == ones:
+                    erased = True
+                else:
+                    value |= ones > zeros
+                    known_bits += 1
+            codeword.append(value)
+            if erased:
+                erasures.append(byte_index)
+        
+        try:
+            prefix = rs_decode(codeword, COMBINATORIAL_PARITY_BYTES, erasures)
+        except ReedSolomonError:
+            return None
+        return prefix, known_bits / COMBINATORIAL_CODEWORD_BITS
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the table for storage."""
+        return {"segments": [list(pair) for pair in self.segments], "options": self.options}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VariantTable":
+        """Load a table serialized with to_dict()."""
+        return cls([tuple(pair) for pair in data["segments"]], data["options"])
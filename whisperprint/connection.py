@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Sequence
+
+# Values bound per IN (...) list, well below SQLite's bound-parameter limit
+IN_BATCH_SIZE = 500
+
+def select_in(cursor: sqlite3.Cursor, query: str, values: Sequence[Any], batch_size: int = IN_BATCH_SIZE) -> List[tuple]:
+    """
+    Run a query that matches a column against many values, in batches.
+    
+    Args:
+        cursor: Cursor to run the query on.
+        query: SELECT statement ending with the column to match; " IN (...)" is appended.
+        values: Values to match.
+        batch_size: Number of values bound per statement.
+    
+    Returns:
+        The rows of all batches.
+    """
+    rows = []
+    for i in range(0, len(values), batch_size):
+        batch = list(values[i:i + batch_size])
+        cursor.execute(f"{query} IN ({','.join('?' * len(batch))})", batch)
+        rows.extend(cursor.fetchall())
+    return rows
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections, one per thread.
+    
+    Connections are opened on first use with WAL journaling and tuned pragmas, and kept
+    open so prepared statements are reused from each connection's statement cache.
+    Connections run in autocommit mode; writes are grouped with transaction(), which
+    nests through savepoints so the writes of one logical operation share a single commit.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        timeout: float = 30.0,
+        synchronous: str = "NORMAL",
+        cache_size_kib: int = 65536,
+        mmap_size: int = 1 << 28,
+        cached_statements: int = 256,
+        read_only: bool = False
+    ):
+        """
+        Initialize the connection manager.
+        
+        Args:
+            db_path: Path to the SQLite database file.
+            timeout: Seconds to wait for a lock held by another connection.
+            synchronous: PRAGMA synchronous level; NORMAL is safe with WAL and only syncs at checkpoints.
+            cache_size_kib: Page cache size of each connection, in KiB.
+            mmap_size: Bytes of the database file read through memory mapping.
+            cached_statements: Number of prepared statements kept per connection.
+            read_only: Open the file with mode=ro, so it is never created, written or switched to WAL.
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.read_only = read_only
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    def _open(self) -> sqlite3.Connection:
+        if self.read_only:
+            database = "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro"
+        else:
+            database = self.db_path
+        conn = sqlite3.connect(
+            database,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            uri=self.read_only
+        )
+        if not self.read_only:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's connection, opening it if needed.
+        
+        Returns:
+            An open connection in autocommit mode.
+        """
+        # Connections must not be shared with a forked child process
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._pid = os.getpid()
+                    self._connections = []
+                    self._local = threading.local()
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.callbacks = []
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block of writes atomically on the calling thread's connection.
+        
+        The outermost transaction takes the write lock up front (BEGIN IMMEDIATE) and commits
+        when the block exits; nested transactions become savepoints, so an error inside a
+        nested block only undoes that block's writes.
+        
+        Yields:
+            The calling thread's connection.
+        """
+        conn = self.connection()
+        depth = self._local.depth
+        callbacks = self._local.callbacks
+        pending_callbacks = len(callbacks)
+        savepoint = f"sp{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            del callbacks[pending_callbacks:]
+            if conn.in_transaction:
+                if depth == 0:
+                    conn.execute("ROLLBACK")
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+            raise
+        self._local.depth = depth
+        try:
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+        except sqlite3.Error:
+            if depth == 0:
+                callbacks.clear()
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            raise
+        
+        if depth == 0:
+            committed = list(callbacks)
+            callbacks.clear()
+            for callback in committed:
+                callback()
+    
+    @property
+    def in_transaction(self) -> bool:
+        """Whether the calling thread is inside transaction()."""
+        return getattr(self._local, "depth", 0) > 0
+    
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Run a callback once the calling thread's transaction commits.
+        
+        The callback is discarded if the transaction, or the savepoint it was registered
+        in, is rolled back. Outside a transaction it runs immediately.
+        
+        Args:
+            callback: Function called without arguments.
+        """
+        if self.in_transaction:
+            self._local.callbacks.append(callback)
+        else:
+            callback()
+    
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+    
+    def close_all(self) -> None:
+        """Close the connections of all threads, e.g. on shutdown."""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
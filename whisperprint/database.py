@@ -1,10 +1,81 @@
 import os
 import json
+import zlib
 import sqlite3
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Any, Iterator
+from datetime import datetime, timedelta, timezone
 import hashlib
+from whisperprint.audit import AuditWriter
+from whisperprint.blobstore import BlobStore, DEFAULT_CODEC, compress_chunk, decompress_chunk
+from whisperprint.connection import ConnectionManager, select_in
+from whisperprint.migrations import get_schema_version, migrate
+from whisperprint.similarity import variant_hash
+
+# Hot read queries; verify_query_plans() checks that each is answered from an index
+_RECIPIENT_QUERY = """
+SELECT f.recipient_id, f.uuid, f.created_at, f.document_metadata, r.metadata as recipient_metadata
+FROM fingerprints f
+JOIN recipients r ON f.recipient_id = r.recipient_id
+WHERE {condition}
+LIMIT 1
+"""
+_RECIPIENT_UUID_QUERY = "SELECT uuid FROM recipients WHERE recipient_id = ?"
+_FINGERPRINTS_BY_RECIPIENT_QUERY = "SELECT * FROM fingerprints WHERE recipient_id = ?"
+# Newest first; (timestamp, id) is a total order, and id is stored in both audit_log indexes
+_AUDIT_LOG_QUERY = "SELECT * FROM audit_log{condition} ORDER BY timestamp DESC, id DESC LIMIT ?"
+_RECIPIENTS_QUERY = "SELECT * FROM recipients{condition} ORDER BY id LIMIT ? OFFSET ?"
+_FINGERPRINTS_BY_DAY_QUERY = """
+    SELECT substr(created_at, 1, 10), COUNT(*) FROM fingerprints
+    WHERE substr(created_at, 1, 10) >= ?
+    GROUP BY substr(created_at, 1, 10)
+"""
+
+HOT_QUERIES = {
+    "recipient_by_uuid": (_RECIPIENT_QUERY.format(condition="f.uuid = ?"), ("",)),
+    "recipient_by_exact_fingerprint": (_RECIPIENT_QUERY.format(condition="f.fingerprint = ?"), ("",)),
+    "recipient_uuid": (_RECIPIENT_UUID_QUERY, ("",)),
+    "fingerprints_by_recipient": (_FINGERPRINTS_BY_RECIPIENT_QUERY, ("",)),
+    "audit_logs": (_AUDIT_LOG_QUERY.format(condition=""), (100,)),
+    "audit_logs_by_event_type": (_AUDIT_LOG_QUERY.format(condition=" WHERE event_type = ?"), ("", 100)),
+    "audit_logs_page": (_AUDIT_LOG_QUERY.format(condition=" WHERE (timestamp, id) < (?, ?)"), ("", 0, 100)),
+    "audit_logs_page_by_event_type": (
+        _AUDIT_LOG_QUERY.format(condition=" WHERE event_type = ? AND (timestamp, id) < (?, ?)"),
+        ("", "", 0, 100)
+    ),
+    "recipient": (_RECIPIENTS_QUERY.format(condition=" WHERE recipient_id = ?"), ("", 1, 0)),
+    # Offset pagination (get_recipients(offset=...)) walks the skipped rows and is left out;
+    # listings that must scale page with after_id
+    "recipients_page": (_RECIPIENTS_QUERY.format(condition=" WHERE id > ?"), (0, 100, 0)),
+    "fingerprints_by_day": (_FINGERPRINTS_BY_DAY_QUERY, ("",)),
+}
+
+# Archived audit entries are compressed in parts of at most this many rows
+AUDIT_ARCHIVE_PART_ROWS = 50000
+
+def audit_log_cursor(entry: Dict[str, Any]) -> str:
+    """
+    Make the pagination cursor that continues after an audit log entry.
+    
+    Args:
+        entry: The last entry of a page returned by get_audit_logs.
+    
+    Returns:
+        Opaque cursor for the next page.
+    """
+    return f"{entry['timestamp']}|{entry['id']}"
+
+def _parse_audit_log_cursor(cursor: str) -> Tuple[str, int]:
+    timestamp, _, entry_id = cursor.rpartition("|")
+    if not timestamp or not entry_id.isdigit():
+        raise ValueError(f"Invalid audit log cursor '{cursor}'")
+    return timestamp, int(entry_id)
+
+def _month_start(year: int, month: int) -> str:
+    """Timestamp of the first second of a month, normalizing month overflow."""
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return f"{year:04d}-{month:02d}-01 00:00:00"
 
 class FingerprintDatabase:
     """
@@ -13,69 +84,54 @@ class FingerprintDatabase:
     In a production environment, this would be replaced with a more robust database solution.
     """
     
-    def __init__(self, db_path: str = "whisperprint.db"):
+    def __init__(
+        self,
+        db_path: str = "whisperprint.db",
+        codec: str = DEFAULT_CODEC,
+        durable_audit_events: Optional[Set[str]] = None,
+        read_only: bool = False
+    ):
         """
         Initialize the fingerprint database.
         
         Args:
             db_path: Path to the SQLite database file.
+            codec: Compression codec for stored document chunks ("zlib", or "zstd", which
+                   requires the zstandard package wherever the database is read).
+            durable_audit_events: Audit event types written synchronously with the change they
+                                  record instead of through the background audit writer.
+            read_only: Open an existing database for reading only. It is neither created nor
+                       migrated, so schema_version may be older than SCHEMA_VERSION.
         """
         self.db_path = db_path
+        self.read_only = read_only
+        self.blob_store = BlobStore(codec)
+        self.connections = ConnectionManager(db_path, read_only=read_only)
+        self.audit = AuditWriter(self.connections, durable_events=durable_audit_events)
         self._initialize_database()
     
     def _initialize_database(self) -> None:
-        """Initialize the database schema if it doesn't exist."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create recipients table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS recipients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            recipient_id TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            metadata TEXT
-        )
-        ''')
-        
-        # Create fingerprints table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS fingerprints (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            recipient_id TEXT NOT NULL,
-            uuid TEXT UNIQUE NOT NULL,
-            fingerprint TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            document_hash TEXT,
-            document_metadata TEXT,
-            FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
-        )
-        ''')
-        
-        # Create documents table for tracking documents
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS documents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            document_hash TEXT UNIQUE NOT NULL,
-            original_text TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            metadata TEXT
-        )
-        ''')
-        
-        # Create audit log table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS audit_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_type TEXT NOT NULL,
-            event_data TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_id TEXT
-        )
-        ''')
+        """Create the schema, or migrate an existing database to the current schema version."""
+        if self.read_only:
+            self.schema_version = get_schema_version(self.connections)
+        else:
+            self.schema_version = migrate(self.connections)
+    
+    def transaction(self):
+        """
+        Group several writes into one transaction.
         
-        conn.commit()
-        conn.close()
+        Database methods called inside the block join it instead of committing on their own.
+        
+        Returns:
+            Context manager yielding the calling thread's connection.
+        """
+        return self.connections.transaction()
+    
+    def close(self) -> None:
+        """Write pending audit events and close the connections of all threads."""
+        self.audit.close()
+        self.connections.close_all()
     
     def add_recipient(self, recipient_id: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -89,29 +145,134 @@ class FingerprintDatabase:
             True if successful, False otherwise.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                metadata_json = json.dumps(metadata) if metadata else None
+                
+                cursor.execute(
+                    "INSERT OR IGNORE INTO recipients (recipient_id, metadata) VALUES (?, ?)",
+                    (recipient_id, metadata_json)
+                )
+                
+                success = cursor.rowcount > 0
+                
+                # Log the event
+                if success:
+                    self._log_event("recipient_added", {"recipient_id": recipient_id})
+                
+            return success
+        except Exception as e:
+            print(f"Error adding recipient: {e}")
+            return False
+    
+    def get_recipient_uuid(self, recipient_id: str) -> Optional[str]:
+        """
+        Get the UUID assigned to a recipient.
+        
+        Args:
+            recipient_id: The ID of the recipient.
+            
+        Returns:
+            The recipient's UUID, or None if the recipient is unknown or has none yet.
+        """
+        try:
+            conn = self.connections.connection()
             cursor = conn.cursor()
             
-            metadata_json = json.dumps(metadata) if metadata else None
+            cursor.execute(_RECIPIENT_UUID_QUERY, (recipient_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error getting recipient UUID: {e}")
+            return None
+    
+    def assign_recipient_uuids_many(self, recipient_ids: List[str]) -> Dict[str, str]:
+        """
+        Look up the UUIDs of many recipients, assigning new ones where needed.
+        
+        Unknown recipients are added. A UUID that is already assigned is never replaced, so
+        concurrent callers agree on one. Called inside transaction(), the assignments commit
+        together with the caller's writes.
+        
+        Args:
+            recipient_ids: The IDs of the recipients.
             
-            cursor.execute(
-                "INSERT OR IGNORE INTO recipients (recipient_id, metadata) VALUES (?, ?)",
-                (recipient_id, metadata_json)
-            )
+        Returns:
+            Dict mapping each recipient ID to its UUID, or an empty dict on error.
+        """
+        recipient_ids = list(dict.fromkeys(recipient_ids))
+        if not recipient_ids:
+            return {}
+        
+        try:
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                existing = dict(select_in(cursor, "SELECT recipient_id, uuid FROM recipients WHERE recipient_id", recipient_ids))
+                added = [recipient_id for recipient_id in recipient_ids if recipient_id not in existing]
+                unassigned = [recipient_id for recipient_id, recipient_uuid in existing.items() if recipient_uuid is None]
+                
+                new_uuids = {recipient_id: str(uuid.uuid4()) for recipient_id in added + unassigned}
+                cursor.executemany(
+                    "INSERT INTO recipients (recipient_id, uuid) VALUES (?, ?)",
+                    [(recipient_id, new_uuids[recipient_id]) for recipient_id in added]
+                )
+                cursor.executemany(
+                    "UPDATE recipients SET uuid = ? WHERE recipient_id = ? AND uuid IS NULL",
+                    [(new_uuids[recipient_id], recipient_id) for recipient_id in unassigned]
+                )
+                
+                # Log the events
+                self.audit.log_many([("recipient_added", {"recipient_id": recipient_id}, None) for recipient_id in added])
+                
+            existing.update(new_uuids)
+            return existing
+        except Exception as e:
+            print(f"Error assigning recipient UUIDs: {e}")
+            return {}
+    
+    def get_recipient_ids_by_uuids(self, recipient_uuids: List[str]) -> Dict[str, str]:
+        """
+        Resolve many recipient UUIDs at once.
+        
+        Args:
+            recipient_uuids: The UUIDs to resolve.
             
-            success = cursor.rowcount > 0
-            conn.commit()
+        Returns:
+            Dict mapping each known UUID to its recipient ID.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
             
-            # Log the event
-            if success:
-                self._log_event("recipient_added", {"recipient_id": recipient_id})
-                
-            return success
+            return dict(select_in(cursor, "SELECT uuid, recipient_id FROM recipients WHERE uuid", recipient_uuids))
         except Exception as e:
-            print(f"Error adding recipient: {e}")
-            return False
-        finally:
-            conn.close()
+            print(f"Error resolving recipient UUIDs: {e}")
+            return {}
+    
+    def get_recipient_uuids(self, limit: int) -> List[Tuple[str, str]]:
+        """
+        Get the UUIDs of the most recently added recipients.
+        
+        Args:
+            limit: Maximum number of recipients to return.
+            
+        Returns:
+            List of (recipient_id, uuid) tuples, most recent first.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT recipient_id, uuid FROM recipients WHERE uuid IS NOT NULL ORDER BY id DESC LIMIT ?",
+                (limit,)
+            )
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting recipient UUIDs: {e}")
+            return []
     
     def store_fingerprint(
         self,
@@ -135,76 +296,220 @@ class FingerprintDatabase:
             Tuple of (success, uuid).
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Ensure recipient exists
-            self.add_recipient(recipient_id)
-            
-            # Generate UUID if not provided
-            if not recipient_uuid:
-                recipient_uuid = str(uuid.uuid4())
-            
-            # Generate document hash if text is provided
-            document_hash = None
-            if document_text:
-                document_hash = hashlib.sha256(document_text.encode()).hexdigest()
+            # The recipient, document, fingerprint and audit entries are committed together
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
                 
-                # Store original document
+                # Ensure recipient exists
+                self.add_recipient(recipient_id)
+                
+                # Generate UUID if not provided
+                if not recipient_uuid:
+                    recipient_uuid = str(uuid.uuid4())
+                
+                # Generate document hash if text is provided
+                document_hash = None
+                if document_text:
+                    document_hash = hashlib.sha256(document_text.encode()).hexdigest()
+                    
+                    # Store original document
+                    metadata_json = json.dumps(document_metadata) if document_metadata else None
+                    self._store_document(cursor, document_hash, document_text, metadata_json)
+                
+                # Store fingerprint
                 metadata_json = json.dumps(document_metadata) if document_metadata else None
                 cursor.execute(
-                    "INSERT OR IGNORE INTO documents (document_hash, original_text, metadata) VALUES (?, ?, ?)",
-                    (document_hash, document_text, metadata_json)
+                    "INSERT INTO fingerprints (recipient_id, uuid, fingerprint, document_hash, document_metadata) VALUES (?, ?, ?, ?, ?)",
+                    (recipient_id, recipient_uuid, fingerprint, document_hash, metadata_json)
                 )
-            
-            # Store fingerprint
-            metadata_json = json.dumps(document_metadata) if document_metadata else None
-            cursor.execute(
-                "INSERT INTO fingerprints (recipient_id, uuid, fingerprint, document_hash, document_metadata) VALUES (?, ?, ?, ?, ?)",
-                (recipient_id, recipient_uuid, fingerprint, document_hash, metadata_json)
-            )
-            
-            conn.commit()
-            
-            # Log the event
-            self._log_event("fingerprint_stored", {
-                "recipient_id": recipient_id,
-                "uuid": recipient_uuid,
-                "document_hash": document_hash
-            })
+                
+                # Log the event
+                self._log_event("fingerprint_stored", {
+                    "recipient_id": recipient_id,
+                    "uuid": recipient_uuid,
+                    "document_hash": document_hash
+                })
             
             return True, recipient_uuid
         except Exception as e:
             print(f"Error storing fingerprint: {e}")
             return False, ""
-        finally:
-            conn.close()
     
-    def get_recipient_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+    def _store_document(
+        self,
+        cursor: sqlite3.Cursor,
+        document_hash: str,
+        document_text: str,
+        metadata_json: Optional[str]
+    ) -> None:
         """
-        Find a recipient by their document fingerprint.
+        Store a document body in the chunk store unless the document is already stored.
         
         Args:
-            fingerprint: The fingerprint to look up.
+            cursor: Cursor of the open transaction.
+            document_hash: SHA-256 of the document text.
+            document_text: The document text.
+            metadata_json: Serialized document metadata.
+        """
+        cursor.execute("SELECT 1 FROM documents WHERE document_hash = ?", (document_hash,))
+        if cursor.fetchone():
+            return
+        
+        chunk_list = self.blob_store.put(cursor, document_text)
+        cursor.execute(
+            "INSERT OR IGNORE INTO documents (document_hash, metadata, chunk_list) VALUES (?, ?, ?)",
+            (document_hash, metadata_json, json.dumps(chunk_list))
+        )
+    
+    def _existing_values(self, cursor: sqlite3.Cursor, table: str, column: str, values: List[str]) -> Set[str]:
+        """
+        Find which of many values are already present in an indexed column.
+        
+        Args:
+            cursor: Cursor of the open transaction.
+            table: Table to search.
+            column: Indexed column to match.
+            values: Values to look up.
+            
+        Returns:
+            Set of the values that are present.
+        """
+        return {row[0] for row in select_in(cursor, f"SELECT {column} FROM {table} WHERE {column}", values)}
+    
+    def add_recipients_many(self, recipients: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Add many recipients in a single transaction.
+        
+        Args:
+            recipients: List of dicts with the keyword arguments of add_recipient
+                        (recipient_id, and optionally metadata).
+            
+        Returns:
+            One status per recipient: True if it was added, False if it already existed
+            (or appeared earlier in the batch) or on error.
+        """
+        try:
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                recipient_ids = [recipient["recipient_id"] for recipient in recipients]
+                existing = self._existing_values(cursor, "recipients", "recipient_id", list(dict.fromkeys(recipient_ids)))
+                
+                statuses = []
+                rows = []
+                for recipient in recipients:
+                    recipient_id = recipient["recipient_id"]
+                    added = recipient_id not in existing
+                    statuses.append(added)
+                    if added:
+                        existing.add(recipient_id)
+                        metadata = recipient.get("metadata")
+                        rows.append((recipient_id, json.dumps(metadata) if metadata else None))
+                
+                cursor.executemany("INSERT INTO recipients (recipient_id, metadata) VALUES (?, ?)", rows)
+                self.audit.log_many([("recipient_added", {"recipient_id": recipient_id}, None) for recipient_id, _ in rows])
+            
+            return statuses
+        except Exception as e:
+            print(f"Error adding recipients: {e}")
+            return [False for _ in recipients]
+    
+    def store_fingerprints_many(self, records: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+        """
+        Store many document fingerprints in a single transaction.
+        
+        Rows are written with executemany, each distinct document is stored once, and missing
+        recipients are added in bulk. Records whose UUID belongs to another recipient, in the
+        database or earlier in the batch, are rejected up front so they do not abort the batch.
+        
+        Args:
+            records: List of dicts with the keyword arguments of store_fingerprint
+                     (recipient_id, fingerprint, and optionally recipient_uuid, document_text, document_metadata).
+            
+        Returns:
+            List of (success, uuid) tuples, one per record.
+        """
+        results = [(False, "") for _ in records]
+        try:
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # A UUID may appear on several fingerprints, but only on those of one recipient
+                pending = []
+                uuid_owners = {}
+                for index, record in enumerate(records):
+                    recipient_uuid = record.get("recipient_uuid") or str(uuid.uuid4())
+                    owner = uuid_owners.setdefault(recipient_uuid, record["recipient_id"])
+                    if not record.get("fingerprint") or owner != record["recipient_id"]:
+                        print(f"Error storing fingerprint for recipient {record['recipient_id']}: missing fingerprint or UUID of another recipient")
+                        continue
+                    pending.append((index, record, recipient_uuid))
+                
+                stored_owners = dict(select_in(cursor, "SELECT uuid, recipient_id FROM fingerprints WHERE uuid", list(uuid_owners)))
+                
+                rows = []
+                documents = {}
+                for index, record, recipient_uuid in pending:
+                    if stored_owners.get(recipient_uuid, record["recipient_id"]) != record["recipient_id"]:
+                        print(f"Error storing fingerprint for recipient {record['recipient_id']}: UUID {recipient_uuid} belongs to another recipient")
+                        continue
+                    
+                    document_text = record.get("document_text")
+                    document_metadata = record.get("document_metadata")
+                    metadata_json = json.dumps(document_metadata) if document_metadata else None
+                    
+                    # Store each distinct document only once per batch
+                    document_hash = None
+                    if document_text:
+                        document_hash = hashlib.sha256(document_text.encode()).hexdigest()
+                        documents.setdefault(document_hash, (document_text, metadata_json))
+                    
+                    rows.append((index, record["recipient_id"], recipient_uuid, record["fingerprint"], document_hash, metadata_json))
+                
+                for document_hash, (document_text, metadata_json) in documents.items():
+                    self._store_document(cursor, document_hash, document_text, metadata_json)
+                
+                # Ensure recipients exist
+                self.add_recipients_many([{"recipient_id": recipient_id} for recipient_id in dict.fromkeys(row[1] for row in rows)])
+                
+                cursor.executemany(
+                    "INSERT INTO fingerprints (recipient_id, uuid, fingerprint, document_hash, document_metadata) VALUES (?, ?, ?, ?, ?)",
+                    [row[1:] for row in rows]
+                )
+                self.audit.log_many([
+                    ("fingerprint_stored", {
+                        "recipient_id": recipient_id,
+                        "uuid": recipient_uuid,
+                        "document_hash": document_hash
+                    }, None)
+                    for _, recipient_id, recipient_uuid, _, document_hash, _ in rows
+                ])
+            
+            for row in rows:
+                results[row[0]] = (True, row[2])
+            return results
+        except Exception as e:
+            print(f"Error storing fingerprints: {e}")
+            return [(False, "") for _ in records]
+    
+    def _find_recipient(self, condition: str, params: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        """
+        Find the recipient of the first fingerprint row matching a condition.
+        
+        Args:
+            condition: SQL condition on the fingerprints table (aliased as f).
+            params: Parameters for the condition.
             
         Returns:
             Recipient information if found, None otherwise.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.connections.connection()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             # Query for the fingerprint
-            cursor.execute(
-                """
-                SELECT f.recipient_id, f.uuid, f.created_at, f.document_metadata, r.metadata as recipient_metadata
-                FROM fingerprints f
-                JOIN recipients r ON f.recipient_id = r.recipient_id
-                WHERE f.fingerprint LIKE ?
-                """,
-                (f"%{fingerprint}%",)
-            )
+            cursor.execute(_RECIPIENT_QUERY.format(condition=condition), params)
             
             row = cursor.fetchone()
             if not row:
@@ -228,8 +533,105 @@ class FingerprintDatabase:
         except Exception as e:
             print(f"Error finding recipient by fingerprint: {e}")
             return None
-        finally:
-            conn.close()
+    
+    def get_recipient_by_fingerprint(self, fingerprint: str, exact: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Find a recipient by their document fingerprint.
+        
+        Args:
+            fingerprint: The fingerprint to look up.
+            exact: If True, match the whole stored fingerprint using its index instead of
+                scanning every row for a substring match.
+            
+        Returns:
+            Recipient information if found, None otherwise.
+        """
+        if exact:
+            return self._find_recipient("f.fingerprint = ?", (fingerprint,))
+        return self._find_recipient("f.fingerprint LIKE ?", (f"%{fingerprint}%",))
+    
+    def get_recipient_by_uuid(self, recipient_uuid: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a recipient by the UUID decoded from a fingerprint.
+        
+        Args:
+            recipient_uuid: The UUID encoded in the fingerprint.
+            
+        Returns:
+            Recipient information if found, None otherwise.
+        """
+        return self._find_recipient("f.uuid = ?", (recipient_uuid,))
+    
+    def get_recipient(self, recipient_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a recipient.
+        
+        Args:
+            recipient_id: The ID of the recipient.
+            
+        Returns:
+            Recipient information, or None if the recipient is unknown.
+        """
+        recipients = self._select_recipients("recipient_id = ?", (recipient_id,), limit=1)
+        return recipients[0] if recipients else None
+    
+    def get_recipients(self, limit: int = -1, offset: int = 0, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get a page of recipients in the order they were added.
+        
+        Pages are read in constant time when continued with after_id; an offset has to
+        step over all the skipped rows.
+        
+        Args:
+            limit: Maximum number of recipients to return (-1 for all).
+            offset: Number of recipients to skip.
+            after_id: Optional "id" of the last recipient of the previous page.
+            
+        Returns:
+            List of recipient information.
+        """
+        if after_id is not None:
+            return self._select_recipients("id > ?", (after_id,), limit, offset)
+        return self._select_recipients(None, (), limit, offset)
+    
+    def _select_recipients(
+        self,
+        condition: Optional[str],
+        params: Tuple[Any, ...],
+        limit: int = -1,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the recipients matching a condition, in the order they were added.
+        
+        Args:
+            condition: SQL condition on the recipients table, or None for all recipients.
+            params: Parameters for the condition.
+            limit: Maximum number of recipients to return (-1 for all).
+            offset: Number of recipients to skip.
+            
+        Returns:
+            List of recipient information.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            where = f" WHERE {condition}" if condition else ""
+            cursor.execute(_RECIPIENTS_QUERY.format(condition=where), tuple(params) + (limit, offset))
+            
+            results = []
+            for row in cursor.fetchall():
+                result = dict(row)
+                if result.get('metadata'):
+                    result['metadata'] = json.loads(result['metadata'])
+                results.append(result)
+                
+            return results
+        except Exception as e:
+            print(f"Error getting recipients: {e}")
+            return []
     
     def get_all_recipients(self) -> List[Dict[str, Any]]:
         """
@@ -239,9 +641,9 @@ class FingerprintDatabase:
             List of recipient information.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.connections.connection()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             cursor.execute("SELECT * FROM recipients")
             rows = cursor.fetchall()
@@ -257,8 +659,6 @@ class FingerprintDatabase:
         except Exception as e:
             print(f"Error getting recipients: {e}")
             return []
-        finally:
-            conn.close()
     
     def get_fingerprints_by_recipient(self, recipient_id: str) -> List[Dict[str, Any]]:
         """
@@ -271,14 +671,11 @@ class FingerprintDatabase:
             List of fingerprint information.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.connections.connection()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
-            cursor.execute(
-                "SELECT * FROM fingerprints WHERE recipient_id = ?",
-                (recipient_id,)
-            )
+            cursor.execute(_FINGERPRINTS_BY_RECIPIENT_QUERY, (recipient_id,))
             
             rows = cursor.fetchall()
             
@@ -293,68 +690,506 @@ class FingerprintDatabase:
         except Exception as e:
             print(f"Error getting fingerprints: {e}")
             return []
-        finally:
-            conn.close()
     
-    def _log_event(self, event_type: str, event_data: Dict[str, Any], user_id: Optional[str] = None) -> bool:
+    def iter_fingerprints(self, batch_size: int = 10000, after_id: int = 0) -> Iterator[Tuple[int, str, str]]:
         """
-        Log an event to the audit log.
+        Iterate over the distinct stored fingerprints.
+        
+        A recipient has one row per fingerprinted document, so each (recipient_id, fingerprint)
+        pair is yielded once, with the ID of its latest row. Passing the highest ID seen so far
+        as after_id yields only the pairs stored since.
         
         Args:
-            event_type: Type of event (e.g., 'fingerprint_stored', 'recipient_added').
-            event_data: Data associated with the event.
-            user_id: Optional ID of the user who performed the action.
+            batch_size: Number of rows fetched from the database at a time.
+            after_id: Only consider rows with a higher ID.
+            
+        Yields:
+            Tuples of (row_id, recipient_id, fingerprint).
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT MAX(id), recipient_id, fingerprint FROM fingerprints WHERE id > ? GROUP BY recipient_id, fingerprint",
+                (after_id,)
+            )
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        except Exception as e:
+            print(f"Error reading fingerprints: {e}")
+    
+    def iter_recipient_uuids(self, batch_size: int = 10000) -> Iterator[Tuple[str, str]]:
+        """
+        Iterate over every UUID ever issued, in ascending order.
+        
+        Args:
+            batch_size: Number of rows fetched from the database at a time.
+            
+        Yields:
+            Tuples of (uuid, recipient_id).
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT uuid, recipient_id FROM fingerprints
+                UNION
+                SELECT uuid, recipient_id FROM recipients WHERE uuid IS NOT NULL
+                ORDER BY uuid
+            """)
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        except Exception as e:
+            print(f"Error reading recipient UUIDs: {e}")
+    
+    def iter_document_text(self, document_hash: str) -> Iterator[str]:
+        """
+        Read a stored document lazily, one chunk at a time.
+        
+        Args:
+            document_hash: SHA-256 of the document text.
+            
+        Yields:
+            Consecutive pieces of the document text (nothing if the document is unknown).
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT original_text, chunk_list FROM documents WHERE document_hash = ?",
+                (document_hash,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return
+            
+            original_text, chunk_list = row
+            if chunk_list:
+                yield from self.blob_store.iter_text(conn, json.loads(chunk_list))
+            elif original_text:
+                yield original_text
+        except Exception as e:
+            print(f"Error reading document: {e}")
+    
+    def get_document_text(self, document_hash: str) -> Optional[str]:
+        """
+        Read a stored document.
+        
+        Args:
+            document_hash: SHA-256 of the document text.
+            
+        Returns:
+            The document text, or None if the document is unknown.
+        """
+        pieces = list(self.iter_document_text(document_hash))
+        return ''.join(pieces) if pieces else None
+    
+    def compact_documents(self, batch_size: int = 100) -> int:
+        """
+        Move document bodies stored inline in original_text into the chunk store.
+        
+        Each batch is committed separately so the migration can be interrupted and resumed.
+        Run VACUUM afterwards to return the freed pages to the file system.
+        
+        Args:
+            batch_size: Number of documents migrated per transaction.
+            
+        Returns:
+            Number of documents migrated.
+        """
+        migrated = 0
+        try:
+            while True:
+                with self.connections.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "SELECT id, original_text FROM documents WHERE original_text IS NOT NULL AND chunk_list IS NULL LIMIT ?",
+                        (batch_size,)
+                    )
+                    rows = cursor.fetchall()
+                    
+                    for document_id, original_text in rows:
+                        chunk_list = self.blob_store.put(cursor, original_text)
+                        cursor.execute(
+                            "UPDATE documents SET chunk_list = ?, original_text = NULL WHERE id = ?",
+                            (json.dumps(chunk_list), document_id)
+                        )
+                if not rows:
+                    break
+                migrated += len(rows)
+            
+            return migrated
+        except Exception as e:
+            print(f"Error compacting documents: {e}")
+            return migrated
+    
+    def collect_chunks(self) -> int:
+        """
+        Delete chunks that no stored document references any more.
+        
+        Chunks are shared between documents, so they are left behind when documents are
+        removed or rewritten. Runs in one write transaction, which serializes it with
+        writers that reuse existing chunks.
+        
+        Returns:
+            Number of chunks deleted.
+        """
+        try:
+            with self.connections.transaction() as conn:
+                cursor = conn.execute("""
+                    DELETE FROM chunks WHERE chunk_hash NOT IN (
+                        SELECT chunk.value FROM documents, json_each(documents.chunk_list) AS chunk
+                        WHERE documents.chunk_list IS NOT NULL
+                    )
+                """)
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error collecting unreferenced chunks: {e}")
+            return 0
+    
+    def get_cached_paraphrases(self, cache_keys: List[str]) -> Dict[str, List[str]]:
+        """
+        Get cached paraphrase variants.
+        
+        Args:
+            cache_keys: The cache keys to look up.
+            
+        Returns:
+            Dict mapping each found cache key to its list of variants.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            
+            rows = select_in(cursor, "SELECT cache_key, variants FROM paraphrase_cache WHERE cache_key", cache_keys)
+            return {cache_key: json.loads(variants) for cache_key, variants in rows}
+        except Exception as e:
+            print(f"Error getting cached paraphrases: {e}")
+            return {}
+    
+    def store_cached_paraphrases(self, entries: Dict[str, List[str]]) -> bool:
+        """
+        Store paraphrase variants in the cache.
+        
+        Args:
+            entries: Dict mapping cache keys to lists of variants.
+            
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            with self.connections.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO paraphrase_cache (cache_key, variants) VALUES (?, ?)",
+                    [(cache_key, json.dumps(variants)) for cache_key, variants in entries.items()]
+                )
+            
+            return True
+        except Exception as e:
+            print(f"Error storing cached paraphrases: {e}")
+            return False
+    
+    def store_variant_signatures(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        Store MinHash signatures of delivered variants in the LSH index.
+        
+        Each distinct variant is stored and indexed once; recipients are mapped to it, so
+        a variant shared by many recipients costs one text, signature and set of buckets.
+        
+        Args:
+            records: List of dicts with recipient_ids, signature (bytes), band_keys (list of ints),
+                     and optionally document_hash and variant_text.
             
         Returns:
             True if successful, False otherwise.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                for record in records:
+                    variant_text = record.get("variant_text")
+                    key = variant_hash(record.get("document_hash"), record["signature"], variant_text)
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO variant_signatures (variant_hash, document_hash, signature, variant_text) VALUES (?, ?, ?, ?)",
+                        (
+                            key,
+                            record.get("document_hash"),
+                            record["signature"],
+                            zlib.compress(variant_text.encode("utf-8")) if variant_text else None
+                        )
+                    )
+                    if cursor.rowcount:
+                        variant_id = cursor.lastrowid
+                        cursor.executemany(
+                            "INSERT OR IGNORE INTO lsh_buckets (bucket_key, variant_id) VALUES (?, ?)",
+                            [(bucket_key, variant_id) for bucket_key in record["band_keys"]]
+                        )
+                    else:
+                        variant_id = cursor.execute(
+                            "SELECT id FROM variant_signatures WHERE variant_hash = ?", (key,)
+                        ).fetchone()[0]
+                    
+                    cursor.executemany(
+                        "INSERT OR IGNORE INTO variant_recipients (variant_id, recipient_id) VALUES (?, ?)",
+                        [(variant_id, recipient_id) for recipient_id in record["recipient_ids"]]
+                    )
+            
+            return True
+        except Exception as e:
+            print(f"Error storing variant signatures: {e}")
+            return False
+    
+    def get_lsh_candidates(self, band_keys: List[int], limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get the stored variants sharing at least one LSH bucket with a signature.
+        
+        Args:
+            band_keys: Band keys of the query signature.
+            limit: Maximum number of variants, taken in order of shared buckets.
+            
+        Returns:
+            List of candidate variants with id, recipient_ids (every recipient of the variant),
+            document_hash, signature (bytes), variant_text (decompressed) and bands (number of
+            shared buckets).
+        """
+        if not band_keys:
+            return []
+        
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            placeholders = ",".join("?" * len(band_keys))
+            cursor.execute(
+                f"""
+                SELECT v.id, v.document_hash, v.signature, v.variant_text, b.bands
+                FROM (
+                    SELECT variant_id, COUNT(*) AS bands
+                    FROM lsh_buckets
+                    WHERE bucket_key IN ({placeholders})
+                    GROUP BY variant_id
+                    ORDER BY bands DESC
+                    LIMIT ?
+                ) b
+                JOIN variant_signatures v ON v.id = b.variant_id
+                ORDER BY b.bands DESC
+                """,
+                list(band_keys) + [limit]
+            )
+            
+            results = []
+            for row in cursor.fetchall():
+                result = dict(row)
+                if result.get('variant_text'):
+                    result['variant_text'] = zlib.decompress(result['variant_text']).decode("utf-8")
+                result['recipient_ids'] = []
+                results.append(result)
+            
+            by_id = {result['id']: result for result in results}
+            if by_id:
+                placeholders = ",".join("?" * len(by_id))
+                cursor.execute(
+                    f"SELECT variant_id, recipient_id FROM variant_recipients WHERE variant_id IN ({placeholders})",
+                    list(by_id)
+                )
+                for row in cursor.fetchall():
+                    by_id[row['variant_id']]['recipient_ids'].append(row['recipient_id'])
+            
+            return results
+        except Exception as e:
+            print(f"Error getting LSH candidates: {e}")
+            return []
+    
+    def store_variant_table(
+        self,
+        document_hash: str,
+        variant_table: Dict[str, Any],
+        lookup_keys: List[Tuple[str, int, int]]
+    ) -> bool:
+        """
+        Store the variant table of a document and index its alternative phrasings.
+        
+        Args:
+            document_hash: Hash of the original document.
+            variant_table: The serialized variant table.
+            lookup_keys: (segment key, slot, choice) tuples for every alternative.
+            
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            with self.connections.transaction() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(
+                    "INSERT OR REPLACE INTO variant_tables (document_hash, variant_table) VALUES (?, ?)",
+                    (document_hash, zlib.compress(json.dumps(variant_table).encode("utf-8")))
+                )
+                cursor.execute("DELETE FROM variant_sentences WHERE document_hash = ?", (document_hash,))
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO variant_sentences (segment_key, document_hash, slot, choice) VALUES (?, ?, ?, ?)",
+                    [(key, document_hash, slot, choice) for key, slot, choice in lookup_keys]
+                )
+            
+            return True
+        except Exception as e:
+            print(f"Error storing variant table: {e}")
+            return False
+    
+    def get_variant_table(self, document_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the variant table of a document.
+        
+        Args:
+            document_hash: Hash of the original document.
+            
+        Returns:
+            The serialized variant table, or None if the document has none.
+        """
+        try:
+            conn = self.connections.connection()
             cursor = conn.cursor()
             
-            event_data_json = json.dumps(event_data)
+            cursor.execute("SELECT variant_table FROM variant_tables WHERE document_hash = ?", (document_hash,))
+            row = cursor.fetchone()
+            return json.loads(zlib.decompress(row[0]).decode("utf-8")) if row else None
+        except Exception as e:
+            print(f"Error getting variant table: {e}")
+            return None
+    
+    def find_variant_sentences(self, segment_keys: List[str]) -> List[Tuple[str, str, int, int]]:
+        """
+        Find the documents, slots and choices of alternative phrasings.
+        
+        Args:
+            segment_keys: Segment keys of the sentences to look up.
+            
+        Returns:
+            List of (segment key, document hash, slot, choice) tuples.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
             
+            return select_in(
+                cursor, "SELECT segment_key, document_hash, slot, choice FROM variant_sentences WHERE segment_key", segment_keys
+            )
+        except Exception as e:
+            print(f"Error finding variant sentences: {e}")
+            return []
+    
+    def get_recipients_by_uuid_prefix(self, prefix: str) -> List[Tuple[str, str]]:
+        """
+        Find recipients whose UUID starts with a prefix.
+        
+        Args:
+            prefix: Lower-case hex prefix of the UUID.
+            
+        Returns:
+            List of (recipient_id, uuid) tuples.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            
+            # Range scan on the uuid index; '~' sorts after every hex digit and dash
             cursor.execute(
-                "INSERT INTO audit_log (event_type, event_data, user_id) VALUES (?, ?, ?)",
-                (event_type, event_data_json, user_id)
+                "SELECT recipient_id, uuid FROM recipients WHERE uuid >= ? AND uuid < ?",
+                (prefix, prefix + "~")
             )
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error finding recipients by UUID prefix: {e}")
+            return []
+    
+    def _log_event(
+        self,
+        event_type: str,
+        event_data: Dict[str, Any],
+        user_id: Optional[str] = None,
+        durable: bool = False
+    ) -> bool:
+        """
+        Log an event to the audit log.
+        
+        The event is handed to the background audit writer, after the caller's transaction
+        commits if there is one; durable events are written synchronously instead.
+        
+        Args:
+            event_type: Type of event (e.g., 'fingerprint_stored', 'recipient_added').
+            event_data: Data associated with the event.
+            user_id: Optional ID of the user who performed the action.
+            durable: Write the event before returning, in the caller's transaction if there is one.
             
-            conn.commit()
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            self.audit.log(event_type, event_data, user_id, durable)
             return True
         except Exception as e:
             print(f"Error logging event: {e}")
             return False
-        finally:
-            conn.close()
     
-    def get_audit_logs(self, limit: int = 100, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_audit_logs(
+        self,
+        limit: int = 100,
+        event_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        flush: bool = False
+    ) -> List[Dict[str, Any]]:
         """
-        Get recent audit logs.
+        Get recent audit logs, newest first.
+        
+        Pages are read with keyset pagination on (timestamp, id): each page starts right
+        after the cursor, straight from an index, so its cost does not depend on how deep
+        the page is or how large the log is.
         
         Args:
             limit: Maximum number of logs to return.
             event_type: Optional filter for event type.
+            cursor: Optional audit_log_cursor() of the last entry of the previous page.
+            flush: Wait for the events still queued in the audit writer, so they are included.
             
         Returns:
             List of audit log entries.
+            
+        Raises:
+            ValueError: If the cursor is malformed.
         """
+        conditions = []
+        params = []
+        if event_type:
+            conditions.append("event_type = ?")
+            params.append(event_type)
+        if cursor:
+            conditions.append("(timestamp, id) < (?, ?)")
+            params.extend(_parse_audit_log_cursor(cursor))
+        params.append(limit)
+        
+        if flush:
+            self.audit.flush()
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            query = "SELECT * FROM audit_log"
-            params = []
-            
-            if event_type:
-                query += " WHERE event_type = ?"
-                params.append(event_type)
-                
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
+            condition = " WHERE " + " AND ".join(conditions) if conditions else ""
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            conn = self.connections.connection()
+            db_cursor = conn.cursor()
+            db_cursor.row_factory = sqlite3.Row
+            db_cursor.execute(_AUDIT_LOG_QUERY.format(condition=condition), params)
+            rows = db_cursor.fetchall()
             
             results = []
             for row in rows:
@@ -367,5 +1202,187 @@ class FingerprintDatabase:
         except Exception as e:
             print(f"Error getting audit logs: {e}")
             return []
-        finally:
-            conn.close() 
\ No newline at end of file
+    
+    def archive_audit_logs(self, retain_months: int = 3, now: Optional[datetime] = None) -> int:
+        """
+        Move audit entries of old months into compressed archives.
+        
+        Entries older than the start of the month retain_months months before the current
+        one are archived month by month: each month's rows are written as JSON lines,
+        compressed in parts of AUDIT_ARCHIVE_PART_ROWS rows, recorded in the audit_archives
+        catalog and deleted from audit_log in the same transaction. The live table only
+        holds recent months, and the job can be interrupted and rerun at any time.
+        
+        Args:
+            retain_months: Number of months, including the current one, kept in audit_log.
+            now: Current time (UTC), defaults to the system clock.
+            
+        Returns:
+            Number of entries archived.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = _month_start(now.year, now.month - max(retain_months, 1) + 1)
+        archived = 0
+        
+        # Queued events must be in the table before their month is archived
+        self.audit.flush()
+        try:
+            conn = self.connections.connection()
+            while True:
+                row = conn.execute("SELECT timestamp FROM audit_log ORDER BY timestamp LIMIT 1").fetchone()
+                if not row or row[0] >= cutoff:
+                    break
+                
+                month = row[0][:7]
+                start = _month_start(int(month[:4]), int(month[5:7]))
+                end = _month_start(int(month[:4]), int(month[5:7]) + 1)
+                with self.connections.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT COALESCE(MAX(part), -1) + 1 FROM audit_archives WHERE month = ?", (month,))
+                    part = cursor.fetchone()[0]
+                    
+                    cursor.execute(
+                        "SELECT id, event_type, event_data, timestamp, user_id FROM audit_log "
+                        "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id",
+                        (start, end)
+                    )
+                    while True:
+                        rows = cursor.fetchmany(AUDIT_ARCHIVE_PART_ROWS)
+                        if not rows:
+                            break
+                        data = "".join(
+                            json.dumps({"id": entry_id, "event_type": event_type, "event_data": event_data,
+                                        "timestamp": timestamp, "user_id": user_id}) + "\n"
+                            for entry_id, event_type, event_data, timestamp, user_id in rows
+                        ).encode("utf-8")
+                        conn.execute(
+                            "INSERT INTO audit_archives (month, part, codec, row_count, first_timestamp, last_timestamp, data) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (month, part, self.blob_store.codec, len(rows), rows[0][3], rows[-1][3],
+                             compress_chunk(data, self.blob_store.codec))
+                        )
+                        part += 1
+                        archived += len(rows)
+                    
+                    cursor.execute("DELETE FROM audit_log WHERE timestamp >= ? AND timestamp < ?", (start, end))
+            
+            return archived
+        except Exception as e:
+            print(f"Error archiving audit logs: {e}")
+            return archived
+    
+    def get_audit_archives(self) -> List[Dict[str, Any]]:
+        """
+        List the audit log archives.
+        
+        Returns:
+            Catalog entries with month, part, codec, row_count, first_timestamp,
+            last_timestamp and created_at, oldest first.
+        """
+        try:
+            conn = self.connections.connection()
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
+                "SELECT month, part, codec, row_count, first_timestamp, last_timestamp, created_at "
+                "FROM audit_archives ORDER BY month, part"
+            )
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting audit archives: {e}")
+            return []
+    
+    def iter_archived_audit_logs(self, month: str) -> Iterator[Dict[str, Any]]:
+        """
+        Read the archived audit entries of a month, one compressed part at a time.
+        
+        Args:
+            month: The month, as "YYYY-MM".
+            
+        Yields:
+            Audit log entries in (timestamp, id) order.
+        """
+        try:
+            conn = self.connections.connection()
+            parts = conn.execute(
+                "SELECT part FROM audit_archives WHERE month = ? ORDER BY part", (month,)
+            ).fetchall()
+            for (part,) in parts:
+                codec, data = conn.execute(
+                    "SELECT codec, data FROM audit_archives WHERE month = ? AND part = ?", (month, part)
+                ).fetchone()
+                for line in decompress_chunk(data, codec).decode("utf-8").splitlines():
+                    entry = json.loads(line)
+                    if entry.get('event_data'):
+                        entry['event_data'] = json.loads(entry['event_data'])
+                    yield entry
+        except Exception as e:
+            print(f"Error reading audit archive {month}: {e}")
+    
+    def get_analytics(self, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Summarize fingerprinting activity for the dashboard.
+        
+        Args:
+            days: Number of days, including today, covered by documents_by_day.
+            now: Current time (UTC), defaults to the system clock.
+            
+        Returns:
+            Dict with total_documents (fingerprints issued), total_recipients, and
+            documents_by_day mapping each "YYYY-MM-DD" of the period to its fingerprint count.
+        """
+        now = now or datetime.now(timezone.utc)
+        first_day = (now - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+        documents_by_day = {
+            (now - timedelta(days=offset)).strftime("%Y-%m-%d"): 0
+            for offset in range(max(days, 1))
+        }
+        try:
+            conn = self.connections.connection()
+            total_documents = conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+            total_recipients = conn.execute("SELECT COUNT(*) FROM recipients").fetchone()[0]
+            
+            # Range scan on the creation day index, which also yields the rows grouped
+            for day, count in conn.execute(_FINGERPRINTS_BY_DAY_QUERY, (first_day,)):
+                if day in documents_by_day:
+                    documents_by_day[day] = count
+            
+            return {
+                "total_documents": total_documents,
+                "total_recipients": total_recipients,
+                "documents_by_day": documents_by_day
+            }
+        except Exception as e:
+            print(f"Error getting analytics: {e}")
+            return {"total_documents": 0, "total_recipients": 0, "documents_by_day": documents_by_day}
+    
+    def explain_query_plans(self) -> Dict[str, List[str]]:
+        """
+        Get SQLite's query plan for each of the hot read queries in HOT_QUERIES.
+        
+        Returns:
+            Dict mapping each query name to the detail lines of its plan.
+        """
+        conn = self.connections.connection()
+        return {
+            name: [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+            for name, (query, params) in HOT_QUERIES.items()
+        }
+    
+    def verify_query_plans(self) -> List[str]:
+        """
+        Check that every hot read query is answered from an index.
+        
+        A plan step that scans a table without an index, or sorts rows in a temporary
+        B-tree, means an index is missing or is not being used.
+        
+        Returns:
+            Descriptions of the offending plan steps; empty if every query uses its indexes.
+        """
+        problems = []
+        for name, plan in self.explain_query_plans().items():
+            for step in plan:
+                full_scan = step.startswith("SCAN") and "USING" not in step
+                if full_scan or "TEMP B-TREE" in step:
+                    problems.append(f"{name}: {step}")
+        return problems
@@ -0,0 +1,405 @@
+import re
+import uuid
+import binascii
+from typing import Dict, List, Any, Optional, Sequence
+
+# Zero-width characters for embedding invisible fingerprints; each one carries 3 bits
+ZERO_WIDTH_CHARS = [
+    '\u200B',  # Zero-width space
+    '\u200C',  # Zero-width non-joiner
+    '\u200D',  # Zero-width joiner
+    '\u2060',  # Word joiner
+    '\u2061',  # Function application
+    '\u2062',  # Invisible times
+    '\u2063',  # Invisible separator
+    '\u2064'   # Invisible plus
+]
+ZERO_WIDTH_INDEX = {char: index for index, char in enumerate(ZERO_WIDTH_CHARS)}
+ZERO_WIDTH_PATTERN = re.compile('[' + ''.join(ZERO_WIDTH_CHARS) + ']+')
+BITS_PER_CHAR = 3
+
+# Fingerprint encodings:
+#   version 0 (legacy): ASCII bits of the 36-character UUID string, 96 characters
+#   version 1 (compact): header byte, raw 16-byte UUID and CRC-16, protected by Reed-Solomon parity
+LEGACY_VERSION = 0
+COMPACT_VERSION = 1
+COMPACT_PARITY_BYTES = 8
+COMPACT_HEADER = (COMPACT_VERSION << 4) | (COMPACT_PARITY_BYTES // 2)
+COMPACT_DATA_BYTES = 1 + 16 + 2
+COMPACT_TOTAL_BYTES = COMPACT_DATA_BYTES + COMPACT_PARITY_BYTES
+COMPACT_LENGTH = (COMPACT_TOTAL_BYTES * 8 + BITS_PER_CHAR - 1) // BITS_PER_CHAR  # 72 characters
+LEGACY_LENGTH = 36 * 8 // BITS_PER_CHAR  # 96 characters
+
+class ReedSolomonError(Exception):
+    """Raised when a Reed-Solomon codeword cannot be corrected."""
+
+# GF(2^8) arithmetic with the 0x11d primitive polynomial
+_GF_EXP = [0] * 512
+_GF_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _GF_EXP[_i] = _x
+    _GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+for _i in range(255, 512):
+    _GF_EXP[_i] = _GF_EXP[_i - 255]
+
+def _gf_mul(x: int, y: int) -> int:
+    if x == 0 or y == 0:
+        return 0
+    return _GF_EXP[_GF_LOG[x] + _GF_LOG[y]]
+
+def _gf_div(x: int, y: int) -> int:
+    if y == 0:
+        raise ZeroDivisionError()
+    if x == 0:
+        return 0
+    return _GF_EXP[(_GF_LOG[x] + 255 - _GF_LOG[y]) % 255]
+
+def _gf_pow(x: int, power: int) -> int:
+    return _GF_EXP[(_GF_LOG[x] * power) % 255]
+
+def _gf_inverse(x: int) -> int:
+    return _GF_EXP[255 - _GF_LOG[x]]
+
+def _gf_poly_scale(p: List[int], x: int) -> List[int]:
+    return [_gf_mul(coef, x) for coef in p]
+
+def _gf_poly_add(p: List[int], q: List[int]) -> List[int]:
+    result = [0] * max(len(p), len(q))
+    for i, coef in enumerate(p):
+        result[i + len(result) - len(p)] = coef
+    for i, coef in enumerate(q):
+        result[i + len(result) - len(q)] ^= coef
+    return result
+
+def _gf_poly_mul(p: List[int], q: List[int]) -> List[int]:
+    result = [0] * (len(p) + len(q) - 1)
+    for j, q_coef in enumerate(q):
+        for i, p_coef in enumerate(p):
+            result[i + j] ^= _gf_mul(p_coef, q_coef)
+    return result
+
+def _gf_poly_eval(poly: List[int], x: int) -> int:
+    y = poly[0]
+    for coef in poly[1:]:
+        y = _gf_mul(y, x) ^ coef
+    return y
+
+def _gf_poly_div(dividend: List[int], divisor: List[int]):
+    output = list(dividend)
+    for i in range(len(dividend) - (len(divisor) - 1)):
+        coef = output[i]
+        if coef != 0:
+            for j in range(1, len(divisor)):
+                if divisor[j] != 0:
+                    output[i + j] ^= _gf_mul(divisor[j], coef)
+    separator = -(len(divisor) - 1)
+    return output[:separator], output[separator:]
+
+def _rs_generator_poly(nsym: int) -> List[int]:
+    generator = [1]
+    for i in range(nsym):
+        generator = _gf_poly_mul(generator, [1, _gf_pow(2, i)])
+    return generator
+
+def rs_encode(message: bytes, nsym: int) -> bytes:
+    """
+    Append Reed-Solomon parity to a message.
+    
+    Args:
+        message: The message bytes.
+        nsym: Number of parity bytes. Corrects up to nsym erasures or nsym/2 errors.
+    
+    Returns:
+        The message followed by its parity bytes.
+    """
+    generator = _rs_generator_poly(nsym)
+    output = list(message) + [0] * nsym
+    for i in range(len(message)):
+        coef = output[i]
+        if coef != 0:
+            for j in range(1, len(generator)):
+                output[i + j] ^= _gf_mul(generator[j], coef)
+    return bytes(message) + bytes(output[len(message):])
+
+def _rs_syndromes(codeword: List[int], nsym: int) -> List[int]:
+    return [0] + [_gf_poly_eval(codeword, _gf_pow(2, i)) for i in range(nsym)]
+
+def _rs_errata_locator(coef_positions: List[int]) -> List[int]:
+    locator = [1]
+    for position in coef_positions:
+        locator = _gf_poly_mul(locator, _gf_poly_add([1], [_gf_pow(2, position), 0]))
+    return locator
+
+def _rs_correct_errata(codeword: List[int], syndromes: List[int], error_positions: List[int]) -> List[int]:
+    """Forney algorithm: compute and apply error magnitudes at known positions."""
+    coef_positions = [len(codeword) - 1 - p for p in error_positions]
+    locator = _rs_errata_locator(coef_positions)
+    _, evaluator = _gf_poly_div(_gf_poly_mul(syndromes[::-1], locator), [1] + [0] * len(locator))
+    evaluator = evaluator[::-1]
+    
+    roots = [_gf_pow(2, -(255 - position)) for position in coef_positions]
+    magnitudes = [0] * len(codeword)
+    for i, root in enumerate(roots):
+        root_inverse = _gf_inverse(root)
+        locator_prime = 1
+        for j, other in enumerate(roots):
+            if j != i:
+                locator_prime = _gf_mul(locator_prime, 1 ^ _gf_mul(root_inverse, other))
+        if locator_prime == 0:
+            raise ReedSolomonError("Could not find error magnitude")
+        y = _gf_mul(root, _gf_poly_eval(evaluator[::-1], root_inverse))
+        magnitudes[error_positions[i]] = _gf_div(y, locator_prime)
+    
+    return _gf_poly_add(codeword, magnitudes)
+
+def _rs_error_locator(syndromes: List[int], nsym: int, erase_count: int = 0) -> List[int]:
+    """Berlekamp-Massey on (Forney) syndromes."""
+    locator = [1]
+    old_locator = [1]
+    shift = len(syndromes) - nsym
+    for i in range(nsym - erase_count):
+        k = i + shift
+        delta = syndromes[k]
+        for j in range(1, len(locator)):
+            delta ^= _gf_mul(locator[-(j + 1)], syndromes[k - j])
+        old_locator = old_locator + [0]
+        if delta != 0:
+            if len(old_locator) > len(locator):
+                new_locator = _gf_poly_scale(old_locator, delta)
+                old_locator = _gf_poly_scale(locator, _gf_inverse(delta))
+                locator = new_locator
+            locator = _gf_poly_add(locator, _gf_poly_scale(old_locator, delta))
+    
+    while locator and locator[0] == 0:
+        del locator[0]
+    errors = len(locator) - 1
+    if (errors - erase_count) * 2 + erase_count > nsym:
+        raise ReedSolomonError("Too many errors to correct")
+    return locator
+
+def _rs_find_errors(locator: List[int], length: int) -> List[int]:
+    """Chien search for the roots of the error locator."""
+    positions = [length - 1 - i for i in range(length) if _gf_poly_eval(locator, _gf_pow(2, i)) == 0]
+    if len(positions) != len(locator) - 1:
+        raise ReedSolomonError("Could not locate errors")
+    return positions
+
+def _rs_forney_syndromes(syndromes: List[int], erase_positions: List[int], length: int) -> List[int]:
+    forney = list(syndromes[1:])
+    for position in erase_positions:
+        x = _gf_pow(2, length - 1 - position)
+        for j in range(len(forney) - 1):
+            forney[j] = _gf_mul(forney[j], x) ^ forney[j + 1]
+    return forney
+
+def rs_decode(codeword: Sequence[int], nsym: int, erase_positions: Optional[List[int]] = None) -> bytes:
+    """
+    Correct a Reed-Solomon codeword and return its message.
+    
+    Args:
+        codeword: The received codeword (message followed by parity).
+        nsym: Number of parity bytes.
+        erase_positions: Optional indices of bytes known to be missing.
+    
+    Returns:
+        The corrected message bytes.
+    """
+    erase_positions = sorted(set(erase_positions or []))
+    if len(erase_positions) > nsym:
+        raise ReedSolomonError("Too many erasures to correct")
+    
+    output = list(codeword)
+    for position in erase_positions:
+        output[position] = 0
+    
+    syndromes = _rs_syndromes(output, nsym)
+    if max(syndromes) == 0:
+        return bytes(output[:-nsym])
+    
+    forney = _rs_forney_syndromes(syndromes, erase_positions, len(output))
+    locator = _rs_error_locator(forney, nsym, erase_count=len(erase_positions))
+    error_positions = _rs_find_errors(locator[::-1], len(output))
+    
+    output = _rs_correct_errata(output, syndromes, erase_positions + error_positions)
+    if max(_rs_syndromes(output, nsym)) > 0:
+        raise ReedSolomonError("Could not correct codeword")
+    return bytes(output[:-nsym])
+
+def bytes_to_zero_width(data: bytes) -> str:
+    """
+    Encode bytes as zero-width characters, 3 bits per character.
+    
+    Args:
+        data: The bytes to encode.
+    
+    Returns:
+        String of zero-width characters.
+    """
+    bit_count = len(data) * 8
+    padding = -bit_count % BITS_PER_CHAR
+    value = int.from_bytes(data, "big") << padding
+    length = (bit_count + padding) // BITS_PER_CHAR
+    
+    chars = []
+    for shift in range((length - 1) * BITS_PER_CHAR, -1, -BITS_PER_CHAR):
+        chars.append(ZERO_WIDTH_CHARS[(value >> shift) & 0b111])
+    return ''.join(chars)
+
+def zero_width_to_bytes(symbols: Sequence[Optional[int]], byte_count: int):
+    """
+    Decode 3-bit symbols back to bytes.
+    
+    Args:
+        symbols: Symbol values (0-7), or None for symbols known to be missing.
+        byte_count: Number of bytes the symbols encode.
+    
+    Returns:
+        Tuple of (data, erased_byte_positions).
+    """
+    length = (byte_count * 8 + BITS_PER_CHAR - 1) // BITS_PER_CHAR
+    padding = length * BITS_PER_CHAR - byte_count * 8
+    
+    value = 0
+    erased = set()
+    for index in range(length):
+        symbol = symbols[index] if index < len(symbols) else None
+        if symbol is None:
+            symbol = 0
+            first_bit = index * BITS_PER_CHAR
+            for bit in (first_bit, first_bit + BITS_PER_CHAR - 1):
+                if bit < byte_count * 8:
+                    erased.add(bit // 8)
+        value = (value << BITS_PER_CHAR) | symbol
+    
+    return (value >> padding).to_bytes(byte_count, "big"), sorted(erased)
+
+def extract_zero_width(text: str) -> str:
+    """
+    Extract the zero-width fingerprint characters from a text, in order.
+    
+    Args:
+        text: The text to scan.
+    
+    Returns:
+        The zero-width characters found, concatenated.
+    """
+    return ''.join(ZERO_WIDTH_PATTERN.findall(text))
+
+def encode_fingerprint(recipient_uuid: str, version: int = COMPACT_VERSION) -> str:
+    """
+    Encode a recipient UUID as a zero-width fingerprint.
+    
+    Args:
+        recipient_uuid: The recipient UUID string.
+        version: Encoding version (COMPACT_VERSION or LEGACY_VERSION).
+    
+    Returns:
+        String of zero-width characters.
+    """
+    if version == LEGACY_VERSION:
+        return bytes_to_zero_width(recipient_uuid.encode("ascii"))
+    if version != COMPACT_VERSION:
+        raise ValueError(f"Unknown fingerprint encoding version: {version}")
+    
+    data = bytes([COMPACT_HEADER]) + uuid.UUID(recipient_uuid).bytes
+    data += binascii.crc_hqx(data, 0xFFFF).to_bytes(2, "big")
+    return bytes_to_zero_width(rs_encode(data, COMPACT_PARITY_BYTES))
+
+def _decode_compact(symbols: List[Optional[int]]) -> Optional[str]:
+    """Decode one aligned compact codeword, or return None."""
+    codeword, erased = zero_width_to_bytes(symbols, COMPACT_TOTAL_BYTES)
+    try:
+        data = rs_decode(codeword, COMPACT_PARITY_BYTES, erased)
+    except ReedSolomonError:
+        return None
+    
+    if data[0] != COMPACT_HEADER:
+        return None
+    if binascii.crc_hqx(data[:17], 0xFFFF) != int.from_bytes(data[17:19], "big"):
+        return None
+    return str(uuid.UUID(bytes=data[1:17]))
+
+def _decode_legacy(symbols: List[int]) -> Optional[str]:
+    """Decode one aligned legacy fingerprint, or return None."""
+    data, _ = zero_width_to_bytes(symbols, 36)
+    try:
+        return str(uuid.UUID(data.decode("ascii")))
+    except ValueError:
+        return None
+
+def decode_fingerprint(chars: str, max_offsets: int = 256) -> Optional[Dict[str, Any]]:
+    """
+    Find and decode the first fingerprint in a run of extracted zero-width characters.
+    
+    Compact fingerprints are tolerant to damage: missing trailing characters are treated as
+    erasures, corrupted characters are corrected by the Reed-Solomon parity, and a single
+    missing character in the middle is recovered by trying each possible gap.
+    
+    Args:
+        chars: Zero-width characters extracted from a document (other characters are ignored).
+        max_offsets: Maximum number of start offsets to try.
+    
+    Returns:
+        Dict with "uuid", "version", "start" and "end" (offsets into the zero-width sequence),
+        or None if no fingerprint could be decoded.
+    """
+    symbols = [ZERO_WIDTH_INDEX[c] for c in chars if c in ZERO_WIDTH_INDEX]
+    return decode_fingerprint_symbols(symbols, 0, max_offsets)
+
+def decode_fingerprint_symbols(symbols: Sequence[int], position: int = 0, max_offsets: int = 256) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first fingerprint starting within max_offsets symbols of a position.
+    
+    Only the symbols from position up to max_offsets plus one fingerprint length are read,
+    so long sequences can be decoded piece by piece in linear time.
+    
+    Args:
+        symbols: Zero-width characters converted to their indexes in ZERO_WIDTH_CHARS.
+        position: Index of the first symbol to consider.
+        max_offsets: Maximum number of start offsets to try.
+    
+    Returns:
+        Dict with "uuid", "version", "start" and "end" (indexes into symbols), or None if no
+        fingerprint could be decoded.
+    """
+    last_offset = min(len(symbols), position + max_offsets)
+    if position >= last_offset:
+        return None
+    
+    # The compact header starts with two known symbols; try offsets that match it first
+    header_symbols = bytes_to_zero_width(bytes([COMPACT_HEADER]))[:2]
+    header_prefix = [ZERO_WIDTH_INDEX[c] for c in header_symbols]
+    offsets = range(position, last_offset)
+    ordered_offsets = ([o for o in offsets if list(symbols[o:o + 2]) == header_prefix] +
+                       [o for o in offsets if list(symbols[o:o + 2]) != header_prefix])
+    
+    for offset in ordered_offsets:
+        window = list(symbols[offset:offset + COMPACT_LENGTH])
+        if len(window) < COMPACT_LENGTH - COMPACT_PARITY_BYTES:
+            continue
+        recipient_uuid = _decode_compact(window)
+        if recipient_uuid:
+            return {"uuid": recipient_uuid, "version": COMPACT_VERSION,
+                    "start": offset, "end": offset + len(window)}
+    
+    # Recover a single dropped character by re-inserting it as an erasure at each position
+    for offset in ordered_offsets[:8]:
+        window = list(symbols[offset:offset + COMPACT_LENGTH - 1])
+        for gap in range(1, len(window)):
+            recipient_uuid = _decode_compact(window[:gap] + [None] + window[gap:])
+            if recipient_uuid:
+                return {"uuid": recipient_uuid, "version": COMPACT_VERSION,
+                        "start": offset, "end": offset + len(window)}
+    
+    # Legacy fingerprints have no error correction and must be complete
+    for offset in range(position, min(len(symbols) - LEGACY_LENGTH + 1, last_offset)):
+        recipient_uuid = _decode_legacy(list(symbols[offset:offset + LEGACY_LENGTH]))
+        if recipient_uuid:
+            return {"uuid": recipient_uuid, "version": LEGACY_VERSION,
+                    "start": offset, "end": offset + LEGACY_LENGTH}
+    
+    return None
@@ -1,49 +1,238 @@
+import re
+import json
 import uuid
 import random
-from typing import List, Dict, Tuple, Optional, Any
-import torch
-from transformers import T5ForConditionalGeneration, T5Tokenizer
+import zipfile
+import hashlib
+import threading
+from typing import List, Dict, Tuple, Optional, Any, Iterable, Iterator
+import numpy as np
+from whisperprint.cache import LRUCache
+from whisperprint.combinatorial import COMBINATORIAL_DATA_BYTES, VariantTable, segment_key
 from whisperprint.database import FingerprintDatabase
+from whisperprint.encoding import (
+    ZERO_WIDTH_CHARS,
+    ZERO_WIDTH_PATTERN,
+    COMPACT_VERSION,
+    COMPACT_LENGTH,
+    encode_fingerprint,
+    decode_fingerprint,
+    extract_zero_width
+)
+from whisperprint.formats import fingerprint_docx, fingerprint_stream
+from whisperprint.insertion import insert_fingerprint
+from whisperprint.matching import FingerprintMatcher, KGramIndex
+from whisperprint.similarity import MinHasher, shingles, jaccard
+from whisperprint.snapshot import SnapshotReader
+
+# Sentence ends and line breaks; the text between them is paraphrased segment by segment
+SEGMENT_SEPARATOR = re.compile(r'(?<=[.!?])[ \t]+|\s*\n\s*')
 
 class WhisperPrintEngine:
     """
     The WhisperPrint engine for creating unique linguistic fingerprints in documents.
     """
-    def __init__(self, model_name: str = "t5-base", db_path: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = "t5-base",
+        db_path: Optional[str] = None,
+        inference_backend: str = "torch",
+        num_threads: Optional[int] = None,
+        generation_preset: str = "quality",
+        identify_only: bool = False,
+        fingerprint_version: int = COMPACT_VERSION,
+        recipient_cache_size: int = 100000,
+        preload_recipients: int = 0,
+        snapshot_path: Optional[str] = None,
+        onnx_cache_dir: Optional[str] = None
+    ):
         """
         Initialize the WhisperPrint engine with a T5 model.
         
+        The model is loaded lazily on the first call that needs paraphrasing.
+        
         Args:
             model_name: The name of the T5 model to use for paraphrasing.
             db_path: Optional path to the database file.
+            inference_backend: Inference backend ("torch", "torch-int8" or "onnx").
+            num_threads: Optional number of intra-op threads for CPU inference.
+            generation_preset: Decoding preset ("quality" or "fast").
+            identify_only: If True, the engine never loads the model and only supports identification.
+            fingerprint_version: Zero-width fingerprint encoding (COMPACT_VERSION or LEGACY_VERSION).
+            recipient_cache_size: Maximum number of recipient UUIDs kept in memory.
+            preload_recipients: Number of most recent recipients loaded into the cache at startup.
+            snapshot_path: Optional snapshot (see whisperprint.snapshot) consulted before the database
+                when identifying leaks.
+            onnx_cache_dir: Optional directory for saved ONNX exports of the onnx backend.
         """
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model_name = model_name
-        self.model = T5ForConditionalGeneration.from_pretrained(model_name).to(self.device)
-        self.tokenizer = T5Tokenizer.from_pretrained(model_name)
+        self.inference_backend = inference_backend
+        self.num_threads = num_threads
+        self.onnx_cache_dir = onnx_cache_dir
+        self.generation_preset = generation_preset
+        self.identify_only = identify_only
+        self._backend = None
+        self._backend_lock = threading.Lock()
         
         # Zero-width characters for embedding invisible fingerprints
-        self.zero_width_chars = [
-            '\u200B',  # Zero-width space
-            '\u200C',  # Zero-width non-joiner
-            '\u200D',  # Zero-width joiner
-            '\u2060',  # Word joiner
-            '\u2061',  # Function application
-            '\u2062',  # Invisible times
-            '\u2063',  # Invisible separator
-            '\u2064'   # Invisible plus
-        ]
+        self.zero_width_chars = list(ZERO_WIDTH_CHARS)
+        self.fingerprint_version = fingerprint_version
+        
+        # Segment-level paraphrasing settings
+        self.paraphrase_batch_size = 16
+        self.max_segment_length = 128
+        
+        # Bounded in-memory cache of recipient UUIDs in front of the recipients table
+        self.recipient_registry = LRUCache(recipient_cache_size)
+        
+        # Bounded multi-pattern matcher over stored legacy fingerprints (compact ones are decoded),
+        # filled from the database and caught up with newly stored rows before each query
+        self.fingerprint_matcher = FingerprintMatcher(recipient_cache_size)
+        self._matcher_last_id = 0
+        
+        # Guards the matcher and the k-gram index, which are built lazily and updated in place
+        # while identify calls run concurrently on several threads
+        self._index_lock = threading.Lock()
+        
+        # K-gram index over the distinct stored fingerprints for partial matches, built on first use
+        # and caught up with newly stored rows before each query
+        self.kgram_index = None
+        self._kgram_last_id = 0
+        # A partial match must share at least this many k-grams with a fingerprint
+        self.min_kgram_votes = 3
         
-        # Dictionary to store recipient UUIDs and their fingerprints (in-memory cache)
-        self.recipient_registry = {}
+        # MinHash signatures of delivered variants, for attribution without zero-width characters
+        self.min_hasher = MinHasher()
         
         # Initialize database
         self.db = FingerprintDatabase(db_path) if db_path else FingerprintDatabase()
+        
+        # Read-only UUID snapshot for identification without database queries
+        self.snapshot = SnapshotReader(snapshot_path) if snapshot_path else None
+        
+        if preload_recipients:
+            self.preload_recipients(preload_recipients)
+    
+    @classmethod
+    def for_identification(cls, db_path: Optional[str] = None, snapshot_path: Optional[str] = None) -> "WhisperPrintEngine":
+        """
+        Create a lightweight engine for leak identification only.
+        
+        It never loads torch or the T5 model, so it starts quickly with a small memory footprint.
+        
+        Args:
+            db_path: Optional path to the database file.
+            snapshot_path: Optional snapshot file used to resolve decoded fingerprints.
+            
+        Returns:
+            An identify-only engine.
+        """
+        return cls(db_path=db_path, identify_only=True, snapshot_path=snapshot_path)
+    
+    @property
+    def backend(self):
+        """The T5 inference backend, loaded on first access."""
+        if self._backend is None:
+            if self.identify_only:
+                raise RuntimeError("This WhisperPrintEngine was created for identification only and cannot paraphrase")
+            with self._backend_lock:
+                if self._backend is None:
+                    # Imported here so identify-only engines never import torch
+                    from whisperprint.inference import T5InferenceBackend
+                    self._backend = T5InferenceBackend(
+                        self.model_name, self.inference_backend, self.num_threads, self.onnx_cache_dir
+                    )
+        return self._backend
+    
+    @property
+    def model(self):
+        """The T5 model, loaded on first access."""
+        return self.backend.model
+    
+    @property
+    def tokenizer(self):
+        """The T5 tokenizer, loaded on first access."""
+        return self.backend.tokenizer
+    
+    @property
+    def device(self):
+        """The device the model runs on."""
+        return self.backend.device
+    
+    def _segment_text(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Split text into sentence/paragraph segments.
+        
+        Args:
+            text: The text to split.
+            
+        Returns:
+            List of (segment, separator) tuples; joining them all gives back the text.
+        """
+        segments = []
+        start = 0
+        for match in SEGMENT_SEPARATOR.finditer(text):
+            segments.append((text[start:match.start()], match.group()))
+            start = match.end()
+        segments.append((text[start:], ""))
+        return segments
+    
+    def _paraphrase_cache_key(self, segment: str, generation_settings: Dict[str, Any]) -> str:
+        """
+        Build the paraphrase cache key for a segment.
+        
+        Args:
+            segment: The segment text.
+            generation_settings: The generate() arguments used for the segment.
+            
+        Returns:
+            Hex digest identifying the segment, model and generation settings.
+        """
+        key_data = json.dumps([self.model_name, generation_settings, segment], sort_keys=True)
+        return hashlib.sha256(key_data.encode()).hexdigest()
+    
+    def _paraphrase_segments(self, segments: List[str], generation_settings: Dict[str, Any]) -> List[List[str]]:
+        """
+        Paraphrase segments in padded batches.
+        
+        Args:
+            segments: The segment texts.
+            generation_settings: Arguments passed to model.generate.
+            
+        Returns:
+            One list of variants per segment.
+        """
+        num_variants = generation_settings["num_return_sequences"]
+        results = []
+        
+        for i in range(0, len(segments), self.paraphrase_batch_size):
+            batch = segments[i:i + self.paraphrase_batch_size]
+            encoded = self.tokenizer(
+                [f"paraphrase: {segment}" for segment in batch],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=self.max_segment_length
+            )
+            encoded = {name: tensor.to(self.device) for name, tensor in encoded.items()}
+            
+            outputs = self.backend.generate(**encoded, **generation_settings)
+            decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            
+            # generate() returns num_variants consecutive sequences per input
+            for j, segment in enumerate(batch):
+                variants = decoded[j * num_variants:(j + 1) * num_variants]
+                results.append([variant.strip() or segment for variant in variants])
+        
+        return results
     
     def _generate_paraphrase(self, text: str, num_variants: int = 3) -> List[str]:
         """
         Generate paraphrased variants of the input text.
         
+        The text is paraphrased sentence by sentence in batches, and segment outputs are cached
+        in the database so shared paragraphs are only generated once.
+        
         Args:
             text: The text to paraphrase.
             num_variants: Number of variants to generate.
@@ -51,65 +240,122 @@ class WhisperPrintEngine:
         Returns:
             List of paraphrased texts.
         """
-        input_ids = self.tokenizer.encode(f"paraphrase: {text}", return_tensors="pt").to(self.device)
-        
-        # Generate multiple variants
-        outputs = self.model.generate(
-            input_ids,
-            max_length=512,
-            num_return_sequences=num_variants,
-            num_beams=num_variants,
-            temperature=0.8,
-            do_sample=True,
-            top_p=0.95,
-            top_k=50
-        )
+        segments, segment_variants = self._generate_segment_variants(text, num_variants)
+        if not segment_variants:
+            return []
+        
+        # Reassemble each variant from its segments, keeping the original separators
+        paraphrases = []
+        for v in range(num_variants):
+            parts = []
+            for segment, separator in segments:
+                variants = segment_variants.get(segment)
+                parts.append(variants[v % len(variants)] if variants else segment)
+                parts.append(separator)
+            paraphrases.append(''.join(parts))
         
-        paraphrases = [self.tokenizer.decode(output, skip_special_tokens=True) for output in outputs]
         return paraphrases
     
-    def _generate_zero_width_fingerprint(self, recipient_id: str) -> str:
+    def _generate_segment_variants(self, text: str, num_variants: int) -> Tuple[List[Tuple[str, str]], Dict[str, List[str]]]:
         """
-        Generate a zero-width character fingerprint from a recipient ID.
+        Paraphrase every distinct segment of a text, using the segment cache.
         
         Args:
-            recipient_id: Unique identifier for the recipient.
+            text: The text to paraphrase.
+            num_variants: Number of variants to generate per segment.
             
         Returns:
-            String of zero-width characters encoding the recipient ID.
+            Tuple of (segments as returned by _segment_text, dict mapping each non-empty segment to its variants).
         """
-        # Check in-memory cache first
-        if recipient_id not in self.recipient_registry:
-            # Check database for existing fingerprints
-            existing_fingerprints = self.db.get_fingerprints_by_recipient(recipient_id)
-            if existing_fingerprints:
-                # Use the UUID from the most recent fingerprint
-                recipient_uuid = existing_fingerprints[0]['uuid']
-            else:
-                # Generate new UUID and store recipient in database
-                recipient_uuid = str(uuid.uuid4())
-                self.db.add_recipient(recipient_id)
-                
-            # Cache in memory
+        from whisperprint.inference import build_generation_settings
+        generation_settings = build_generation_settings(self.generation_preset, num_variants, self.max_segment_length)
+        
+        segments = self._segment_text(text)
+        unique_segments = list(dict.fromkeys(segment for segment, _ in segments if segment.strip()))
+        if not unique_segments:
+            return segments, {}
+        
+        # Look up cached segment paraphrases
+        cache_keys = {segment: self._paraphrase_cache_key(segment, generation_settings) for segment in unique_segments}
+        cached = self.db.get_cached_paraphrases(list(cache_keys.values()))
+        segment_variants = {segment: cached[key] for segment, key in cache_keys.items() if key in cached}
+        
+        # Generate the missing segments and cache them
+        missing = [segment for segment in unique_segments if segment not in segment_variants]
+        if missing:
+            generated = self._paraphrase_segments(missing, generation_settings)
+            segment_variants.update(zip(missing, generated))
+            self.db.store_cached_paraphrases({cache_keys[segment]: variants for segment, variants in zip(missing, generated)})
+        
+        return segments, segment_variants
+    
+    def preload_recipients(self, limit: int) -> int:
+        """
+        Warm the recipient cache with the most recently added recipients.
+        
+        Args:
+            limit: Maximum number of recipients to load; capped at the cache size.
+            
+        Returns:
+            Number of recipients loaded.
+        """
+        rows = self.db.get_recipient_uuids(min(limit, self.recipient_registry.capacity))
+        # Insert oldest first so the most recent recipients end up most recently used
+        for recipient_id, recipient_uuid in reversed(rows):
             self.recipient_registry[recipient_id] = recipient_uuid
-        else:
-            recipient_uuid = self.recipient_registry[recipient_id]
-        
-        # Use the UUID string to generate a sequence of zero-width characters
-        binary_rep = ''.join(format(ord(c), '08b') for c in recipient_uuid)
-        
-        # Map binary digits to zero-width characters
-        fingerprint = ""
-        for i in range(0, len(binary_rep), 3):
-            chunk = binary_rep[i:i+3]
-            if len(chunk) < 3:
-                chunk = chunk.ljust(3, '0')
+        return len(rows)
+    
+    def _get_recipient_uuids(self, recipient_ids: List[str]) -> Dict[str, str]:
+        """
+        Get the UUIDs of many recipients, assigning and persisting new ones for unknown recipients.
+        
+        Recipients missing from the in-memory cache are resolved with one database call.
+        Called inside a database transaction, the new assignments commit with it, and the
+        cache is only updated once they have.
+        
+        Args:
+            recipient_ids: Unique identifiers for the recipients.
             
-            # Convert binary chunk to index
-            idx = int(chunk, 2) % len(self.zero_width_chars)
-            fingerprint += self.zero_width_chars[idx]
+        Returns:
+            Dict mapping each recipient ID to its UUID.
+        """
+        # Check in-memory cache first
+        recipient_uuids = {}
+        missing = []
+        for recipient_id in dict.fromkeys(recipient_ids):
+            recipient_uuid = self.recipient_registry.get(recipient_id)
+            if recipient_uuid:
+                recipient_uuids[recipient_id] = recipient_uuid
+            else:
+                missing.append(recipient_id)
+        if not missing:
+            return recipient_uuids
+        
+        # Look up or assign the rest at once (keeping UUIDs a concurrent writer stored first)
+        assigned = self.db.assign_recipient_uuids_many(missing)
+        for recipient_id in missing:
+            recipient_uuid = assigned.get(recipient_id) or str(uuid.uuid4())
+            recipient_uuids[recipient_id] = recipient_uuid
+            assigned[recipient_id] = recipient_uuid
+        
+        def remember():
+            for recipient_id in missing:
+                self.recipient_registry[recipient_id] = assigned[recipient_id]
         
-        return fingerprint
+        self.db.connections.after_commit(remember)
+        return recipient_uuids
+    
+    def _get_recipient_uuid(self, recipient_id: str) -> str:
+        """
+        Get a recipient's UUID, assigning and persisting a new one for unknown recipients.
+        
+        Args:
+            recipient_id: Unique identifier for the recipient.
+            
+        Returns:
+            The recipient's UUID.
+        """
+        return self._get_recipient_uuids([recipient_id])[recipient_id]
     
     def _insert_zero_width_fingerprint(self, text: str, fingerprint: str) -> str:
         """
@@ -122,54 +368,28 @@ class WhisperPrintEngine:
         Returns:
             Text with embedded fingerprint.
         """
-        # Split text into paragraphs
-        paragraphs = text.split('\n')
-        
-        # Insert parts of the fingerprint between paragraphs and within sentences
-        fingerprint_chars = list(fingerprint)
-        fingerprinted_text = []
+        return insert_fingerprint(text, fingerprint)
+    
+    def _variant_signature_record(self, recipient_ids: List[str], text: str, variant: str) -> Dict[str, Any]:
+        """
+        Build the LSH index record for a variant delivered to some recipients.
         
-        for paragraph in paragraphs:
-            if not paragraph.strip():
-                fingerprinted_text.append(paragraph)
-                continue
-                
-            # Add some fingerprint chars between sentences or words
-            sentences = paragraph.replace('. ', '.\n').split('\n')
-            fingerprinted_paragraph = []
-            
-            for sentence in sentences:
-                if not sentence.strip():
-                    continue
-                    
-                if fingerprint_chars:
-                    char = fingerprint_chars.pop(0)
-                    # Insert after the first word
-                    words = sentence.split(' ')
-                    if len(words) > 1:
-                        words[0] = words[0] + char
-                        sentence = ' '.join(words)
-                
-                fingerprinted_paragraph.append(sentence)
-            
-            # Join sentences back
-            paragraph = '. '.join(fingerprinted_paragraph).replace('.. ', '. ')
-            
-            # Add some fingerprint at the end of paragraph if chars remain
-            if fingerprint_chars:
-                char = fingerprint_chars.pop(0)
-                paragraph += char
-                
-            fingerprinted_text.append(paragraph)
-        
-        # If there are remaining fingerprint chars, append them to the end
-        if fingerprint_chars:
-            final_text = '\n'.join(fingerprinted_text)
-            final_text += ''.join(fingerprint_chars)
-        else:
-            final_text = '\n'.join(fingerprinted_text)
+        Args:
+            recipient_ids: Identifiers of the recipients who received the variant.
+            text: The original document text.
+            variant: The paraphrased variant the recipients received (without fingerprint).
             
-        return final_text
+        Returns:
+            Record for FingerprintDatabase.store_variant_signatures.
+        """
+        signature = self.min_hasher.signature(shingles(variant))
+        return {
+            "recipient_ids": recipient_ids,
+            "document_hash": hashlib.sha256(text.encode()).hexdigest(),
+            "signature": signature.tobytes(),
+            "band_keys": self.min_hasher.band_keys(signature),
+            "variant_text": variant
+        }
     
     def create_fingerprinted_document(
         self, 
@@ -194,24 +414,248 @@ class WhisperPrintEngine:
         # Select one variant (or use original if no good variants)
         selected_variant = paraphrases[0] if paraphrases else text
         
-        # Generate and insert zero-width fingerprint
-        fingerprint = self._generate_zero_width_fingerprint(recipient_id)
+        # Assign the UUID and store fingerprint and variant signature in database, in one transaction
+        signature_record = self._variant_signature_record([recipient_id], text, selected_variant)
+        with self.db.transaction():
+            recipient_uuid = self._get_recipient_uuid(recipient_id)
+            fingerprint = encode_fingerprint(recipient_uuid, self.fingerprint_version)
+            success, _ = self.db.store_fingerprint(
+                recipient_id=recipient_id,
+                fingerprint=fingerprint,
+                recipient_uuid=recipient_uuid,
+                document_text=text,
+                document_metadata=document_metadata
+            )
+            self.db.store_variant_signatures([signature_record])
+        
+        if not success:
+            print(f"Warning: Failed to store fingerprint for recipient {recipient_id} in database")
+        
+        # Insert zero-width fingerprint
         fingerprinted_text = self._insert_zero_width_fingerprint(selected_variant, fingerprint)
+        return fingerprinted_text, recipient_uuid
+    
+    def create_fingerprinted_documents(
+        self,
+        text: str,
+        recipient_ids: List[str],
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Tuple[str, str]]:
+        """
+        Create fingerprinted versions of one document for many recipients.
+        
+        The paraphrase variants are generated once and shared round-robin across recipients,
+        so model cost does not grow with the number of recipients.
+        
+        Args:
+            text: The original document text.
+            recipient_ids: Identifiers of the recipients.
+            document_metadata: Optional metadata about the document.
+            
+        Returns:
+            Dict mapping each recipient ID to a tuple of (fingerprinted_text, recipient_uuid).
+        """
+        # Generate paraphrased variants once for all recipients
+        paraphrases = self._generate_paraphrase(text)
+        variants = paraphrases if paraphrases else [text]
+        
+        recipient_ids = list(dict.fromkeys(recipient_ids))
+        variant_recipients = {}
+        for index, recipient_id in enumerate(recipient_ids):
+            variant_recipients.setdefault(index % len(variants), []).append(recipient_id)
+        
+        # Each distinct variant is signed and stored once, mapped to all its recipients
+        signature_records = [
+            self._variant_signature_record(variant_recipient_ids, text, variants[variant_index])
+            for variant_index, variant_recipient_ids in variant_recipients.items()
+        ]
+        
+        # Assign UUIDs and store all fingerprints and signatures in one database transaction
+        with self.db.transaction():
+            recipient_uuids = self._get_recipient_uuids(recipient_ids)
+            records = [
+                {
+                    "recipient_id": recipient_id,
+                    "fingerprint": encode_fingerprint(recipient_uuids[recipient_id], self.fingerprint_version),
+                    "recipient_uuid": recipient_uuids[recipient_id],
+                    "document_text": text,
+                    "document_metadata": document_metadata
+                }
+                for recipient_id in recipient_ids
+            ]
+            statuses = self.db.store_fingerprints_many(records)
+            self.db.store_variant_signatures(signature_records)
+        for record, (success, _) in zip(records, statuses):
+            if not success:
+                print(f"Warning: Failed to store fingerprint for recipient {record['recipient_id']} in database")
+        
+        # Insert zero-width fingerprints
+        results = {}
+        for index, record in enumerate(records):
+            fingerprinted_text = self._insert_zero_width_fingerprint(variants[index % len(variants)], record["fingerprint"])
+            results[record["recipient_id"]] = (fingerprinted_text, record["recipient_uuid"])
+        
+        return results
+    
+    def create_combinatorial_documents(
+        self,
+        text: str,
+        recipient_ids: List[str],
+        num_variants: int = 4,
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Tuple[str, str]]:
+        """
+        Create fingerprinted versions of one document by choosing a phrasing per sentence.
+        
+        Alternatives for every sentence are generated once per document and stored as a
+        variant table. Each recipient's copy picks one alternative per sentence according to
+        their UUID (see VariantTable), so the model cost does not depend on the number of
+        recipients and the phrasing alone identifies the recipient, even without the
+        zero-width fingerprint that is inserted as well.
+        
+        Args:
+            text: The original document text.
+            recipient_ids: Identifiers of the recipients.
+            num_variants: Alternatives per sentence, including the original; powers of two use all of them.
+            document_metadata: Optional metadata about the document.
+            
+        Returns:
+            Dict mapping each recipient ID to a tuple of (fingerprinted_text, recipient_uuid).
+        """
+        if num_variants < 2:
+            raise ValueError("num_variants must be at least 2")
+        
+        # Generate the alternatives once, keeping only phrasings that stay distinct after normalization
+        # (the model often reproduces the original, so it is asked for a full set of variants)
+        segments, segment_variants = self._generate_segment_variants(text, num_variants)
+        options = []
+        for segment, _ in segments:
+            if not segment.strip():
+                options.append([])
+                continue
+            alternatives = {}
+            for alternative in [segment] + segment_variants.get(segment, []):
+                alternatives.setdefault(segment_key(alternative), alternative)
+            options.append(list(alternatives.values())[:num_variants])
+        
+        table = VariantTable(segments, options)
+        if table.capacity < COMBINATORIAL_DATA_BYTES * 8:
+            print(f"Warning: Document carries only {table.capacity} bits in its phrasing; "
+                  f"recipients cannot be identified from phrasing alone")
+        
+        document_hash = hashlib.sha256(text.encode()).hexdigest()
+        if not self.db.store_variant_table(document_hash, table.to_dict(), table.lookup_keys()):
+            print("Warning: Failed to store variant table in database")
+        
+        # Assign UUIDs and store all fingerprints in one database transaction
+        recipient_ids = list(dict.fromkeys(recipient_ids))
+        with self.db.transaction():
+            recipient_uuids = self._get_recipient_uuids(recipient_ids)
+            records = [
+                {
+                    "recipient_id": recipient_id,
+                    "fingerprint": encode_fingerprint(recipient_uuids[recipient_id], self.fingerprint_version),
+                    "recipient_uuid": recipient_uuids[recipient_id],
+                    "document_text": text,
+                    "document_metadata": document_metadata
+                }
+                for recipient_id in recipient_ids
+            ]
+            statuses = self.db.store_fingerprints_many(records)
+        for record, (success, _) in zip(records, statuses):
+            if not success:
+                print(f"Warning: Failed to store fingerprint for recipient {record['recipient_id']} in database")
+        
+        # Render each recipient's phrasing and insert the zero-width fingerprint
+        results = {}
+        for record in records:
+            variant = table.render(table.choices(record["recipient_uuid"]))
+            fingerprinted_text = self._insert_zero_width_fingerprint(variant, record["fingerprint"])
+            results[record["recipient_id"]] = (fingerprinted_text, record["recipient_uuid"])
+        
+        return results
+    
+    def stream_fingerprinted_document(
+        self,
+        chunks: Iterable[str],
+        recipient_id: str,
+        document_metadata: Optional[Dict[str, Any]] = None,
+        document_format: str = "text"
+    ) -> Iterator[str]:
+        """
+        Fingerprint a large document chunk by chunk without paraphrasing it.
+        
+        Only the zero-width fingerprint is inserted, so memory use does not depend on document size.
+        The fingerprint is stored before the first chunk is yielded, so a copy that is only
+        partly read (e.g. an aborted download) can still be traced.
+        
+        Args:
+            chunks: Chunks of the document, e.g. lines of a file opened in text mode.
+            recipient_id: Identifier for the recipient.
+            document_metadata: Optional metadata about the document.
+            document_format: "text", "html", "xml" or "markdown"; markup is preserved and
+                             only text runs are fingerprinted.
+            
+        Yields:
+            Fingerprinted chunks.
+        """
+        with self.db.transaction():
+            recipient_uuid = self._get_recipient_uuid(recipient_id)
+            fingerprint = encode_fingerprint(recipient_uuid, self.fingerprint_version)
+            
+            success, _ = self.db.store_fingerprint(
+                recipient_id=recipient_id,
+                fingerprint=fingerprint,
+                recipient_uuid=recipient_uuid,
+                document_metadata=document_metadata
+            )
+        
+        if not success:
+            print(f"Warning: Failed to store fingerprint for recipient {recipient_id} in database")
+        
+        yield from fingerprint_stream(chunks, fingerprint, document_format)
+    
+    def fingerprint_docx_file(
+        self,
+        input_path: str,
+        output_path: str,
+        recipient_id: str,
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Write a fingerprinted copy of a DOCX file.
+        
+        The body text is fingerprinted in a single streaming pass over the archive;
+        formatting, styles and all other parts of the file are left untouched.
+        
+        Args:
+            input_path: The DOCX file to fingerprint.
+            output_path: Where to write the recipient's copy.
+            recipient_id: Identifier for the recipient.
+            document_metadata: Optional metadata about the document.
+            
+        Returns:
+            True if the copy was written and the fingerprint stored, False otherwise.
+        """
+        recipient_uuid = self._get_recipient_uuid(recipient_id)
+        fingerprint = encode_fingerprint(recipient_uuid, self.fingerprint_version)
+        
+        try:
+            fingerprint_docx(input_path, output_path, fingerprint)
+        except (OSError, zipfile.BadZipFile, ValueError) as e:
+            print(f"Error fingerprinting {input_path}: {e}")
+            return False
         
-        # Store fingerprint in database
-        recipient_uuid = self.recipient_registry[recipient_id]
         success, _ = self.db.store_fingerprint(
             recipient_id=recipient_id,
             fingerprint=fingerprint,
             recipient_uuid=recipient_uuid,
-            document_text=text,
             document_metadata=document_metadata
         )
         
         if not success:
             print(f"Warning: Failed to store fingerprint for recipient {recipient_id} in database")
-        
-        return fingerprinted_text, recipient_uuid
+        return success
     
     def identify_leaked_document(self, leaked_text: str) -> Optional[str]:
         """
@@ -224,25 +668,274 @@ class WhisperPrintEngine:
             The recipient ID if identified, None otherwise.
         """
         # Extract zero-width characters
-        extracted_chars = ''.join(c for c in leaked_text if c in self.zero_width_chars)
+        extracted_chars = extract_zero_width(leaked_text)
         
         if not extracted_chars:
             return None
         
-        # First try database lookup
+        # Decode the recipient UUID directly and resolve it from the snapshot or with an indexed point lookup
+        decoded = decode_fingerprint(extracted_chars)
+        if decoded and self.snapshot:
+            recipient_id = self.snapshot.lookup(decoded['uuid'])
+            if recipient_id:
+                return recipient_id
+        if decoded:
+            recipient_info = self.db.get_recipient_by_uuid(decoded['uuid'])
+            if recipient_info:
+                return recipient_info['recipient_id']
+        
+        # Fall back to a substring search of the stored fingerprints
         recipient_info = self.db.get_recipient_by_fingerprint(extracted_chars)
         if recipient_info:
             return recipient_info['recipient_id']
             
-        # Fall back to in-memory cache if database lookup fails
-        for recipient_id, recipient_uuid in self.recipient_registry.items():
-            fingerprint = self._generate_zero_width_fingerprint(recipient_id)
+        # Fall back to the fingerprints issued by this engine, found in one pass over the extracted characters
+        return self._match_issued_fingerprints(extracted_chars)
+    
+    def _match_issued_fingerprints(self, extracted_chars: str) -> Optional[str]:
+        """Find the recipient whose stored legacy fingerprint occurs most often in the characters."""
+        with self._index_lock:
+            return self._get_fingerprint_matcher().best_match(extracted_chars)
+    
+    def _get_fingerprint_matcher(self) -> FingerprintMatcher:
+        """
+        Get the legacy fingerprint matcher, adding the fingerprints stored since the last call.
+        
+        Fingerprints stored by other processes are picked up too, so workers that only
+        identify match the same fingerprints as the one that issued them.
+        
+        Must be called with self._index_lock held.
+        """
+        for row_id, recipient_id, fingerprint in self.db.iter_fingerprints(after_id=self._matcher_last_id):
+            if len(fingerprint) != COMPACT_LENGTH and fingerprint not in self.fingerprint_matcher:
+                self.fingerprint_matcher.add(fingerprint, recipient_id)
+            self._matcher_last_id = max(self._matcher_last_id, row_id)
+        return self.fingerprint_matcher
+    
+    def _rank_kgram_candidates(self, extracted_chars: str, limit: int) -> List[Dict[str, Any]]:
+        """Rank recipients by the fingerprint k-grams found in the characters."""
+        with self._index_lock:
+            return self._get_kgram_index().rank(extracted_chars, limit, self.min_kgram_votes)
+    
+    def _get_kgram_index(self) -> KGramIndex:
+        """
+        Get the k-gram index, indexing the fingerprints stored since the last call.
+        
+        Must be called with self._index_lock held.
+        """
+        if self.kgram_index is None:
+            self.kgram_index = KGramIndex()
+            self._kgram_last_id = 0
+        
+        # Rows stored by any process since the last call; a single range scan on the primary key
+        for row_id, recipient_id, fingerprint in self.db.iter_fingerprints(after_id=self._kgram_last_id):
+            self.kgram_index.add(fingerprint, recipient_id)
+            self._kgram_last_id = max(self._kgram_last_id, row_id)
+        return self.kgram_index
+    
+    def rank_leak_candidates(self, leaked_text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank likely recipients of a leaked fragment that carries only part of a fingerprint.
+        
+        Args:
+            leaked_text: The text from the leaked document.
+            limit: Maximum number of candidates to return.
+            
+        Returns:
+            Candidates ordered by descending confidence, each with "recipient_id", "votes" and "confidence".
+        """
+        extracted_chars = extract_zero_width(leaked_text)
+        if not extracted_chars:
+            return []
+        return self._rank_kgram_candidates(extracted_chars, limit)
+    
+    def identify_by_phrasing(self, leaked_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Identify the recipient of a combinatorially fingerprinted document from its phrasing.
+        
+        The leaked sentences are looked up to find the document and the alternative chosen in
+        each slot; missing sentences become erasures when decoding the UUID prefix.
+        
+        Args:
+            leaked_text: The text from the leaked document (zero-width characters are ignored).
             
-            # Simple matching for now - in a real implementation, this would be more sophisticated
-            if fingerprint in extracted_chars:
-                return recipient_id
-                
-        return None
+        Returns:
+            Dict with "recipient_id", "confidence" and "document_hash", or None if not identified.
+        """
+        clean_text = ZERO_WIDTH_PATTERN.sub('', leaked_text)
+        keys = list(dict.fromkeys(segment_key(segment) for segment, _ in self._segment_text(clean_text) if segment.strip()))
+        rows = self.db.find_variant_sentences(keys)
+        if not rows:
+            return None
+        
+        # The document sharing the most sentences with the leak
+        document_keys = {}
+        for key, document_hash, _, _ in rows:
+            document_keys.setdefault(document_hash, set()).add(key)
+        document_hash = max(document_keys, key=lambda document: len(document_keys[document]))
+        
+        # Slots observed with two different choices (repeated sentences) are treated as missing
+        observed = {}
+        conflicting = set()
+        for _, row_document, slot, choice in rows:
+            if row_document != document_hash:
+                continue
+            if observed.get(slot, choice) != choice:
+                conflicting.add(slot)
+            observed[slot] = choice
+        for slot in conflicting:
+            del observed[slot]
+        
+        table_data = self.db.get_variant_table(document_hash)
+        if not table_data or not observed:
+            return None
+        table = VariantTable.from_dict(table_data)
+        
+        decoded = table.decode(observed)
+        if not decoded:
+            return None
+        prefix, coverage = decoded
+        
+        # Confirm candidates by how well their full choice pattern matches the leak
+        best_id, best_agreement = None, 0.0
+        for recipient_id, recipient_uuid in self.db.get_recipients_by_uuid_prefix(prefix.hex()):
+            expected = table.choices(recipient_uuid)
+            agreement = sum(expected[slot] == choice for slot, choice in observed.items()) / len(observed)
+            if agreement > best_agreement:
+                best_id, best_agreement = recipient_id, agreement
+        
+        if best_agreement < 0.5:
+            return None
+        
+        return {"recipient_id": best_id, "confidence": best_agreement * coverage, "document_hash": document_hash}
+    
+    def _score_variants(self, leaked_text: str) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Score the delivered variants retrieved from the LSH index against a leaked text.
+        
+        Args:
+            leaked_text: The text from the leaked document.
+            
+        Returns:
+            (similarity, variant) pairs, each variant as returned by get_lsh_candidates.
+        """
+        leak_shingles = shingles(ZERO_WIDTH_PATTERN.sub('', leaked_text))
+        if not leak_shingles:
+            return []
+        
+        signature = self.min_hasher.signature(leak_shingles)
+        scored = []
+        for candidate in self.db.get_lsh_candidates(self.min_hasher.band_keys(signature)):
+            if candidate.get('variant_text'):
+                similarity = jaccard(leak_shingles, shingles(candidate['variant_text']))
+            else:
+                stored = np.frombuffer(candidate['signature'], dtype=np.uint32)
+                similarity = self.min_hasher.estimate_similarity(signature, stored)
+            scored.append((similarity, candidate))
+        return scored
+    
+    def _rank_recipients(self, scored: List[Tuple[float, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Rank every recipient of the scored variants by the best similarity among their variants."""
+        best = {}
+        for similarity, candidate in scored:
+            for recipient_id in candidate['recipient_ids']:
+                if recipient_id not in best or similarity > best[recipient_id]['similarity']:
+                    best[recipient_id] = {
+                        "recipient_id": recipient_id,
+                        "document_hash": candidate['document_hash'],
+                        "similarity": similarity
+                    }
+        return sorted(best.values(), key=lambda candidate: candidate['similarity'], reverse=True)
+    
+    def rank_by_similarity(self, leaked_text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank likely recipients of a leaked text by its similarity to the variants they received.
+        
+        This works without any zero-width characters: candidates are retrieved from the LSH
+        index of variant signatures and rescored with the exact Jaccard similarity of their text.
+        
+        Args:
+            leaked_text: The text from the leaked document.
+            limit: Maximum number of candidates to return.
+            
+        Returns:
+            Candidates ordered by descending similarity, each with "recipient_id", "document_hash"
+            and "similarity".
+        """
+        return self._rank_recipients(self._score_variants(leaked_text))[:limit]
+    
+    def identify_leak(self, leaked_text: str, limit: int = 5) -> Dict[str, Any]:
+        """
+        Identify the recipient of a leaked document along with a confidence score.
+        
+        A fingerprint that decodes or matches in full identifies its recipient with confidence 1.0.
+        Otherwise the surviving fingerprint k-grams vote for candidate recipients, and if no
+        fingerprint characters survived the text is matched against the delivered variants.
+        A variant match shared by several recipients leaves recipient_id None, with the
+        confidence divided among them.
+        
+        Args:
+            leaked_text: The text from the leaked document.
+            limit: Maximum number of candidates returned for partial matches.
+            
+        Returns:
+            Dict with "recipient_id" (None if not identified), "confidence", "metadata" and "candidates".
+        """
+        extracted_chars = extract_zero_width(leaked_text)
+        
+        if extracted_chars:
+            decoded = decode_fingerprint(extracted_chars)
+            if decoded and self.snapshot:
+                recipient_id = self.snapshot.lookup(decoded['uuid'])
+                if recipient_id:
+                    return {"recipient_id": recipient_id, "confidence": 1.0, "metadata": None, "candidates": []}
+            if decoded:
+                recipient_info = self.db.get_recipient_by_uuid(decoded['uuid'])
+                if recipient_info:
+                    return {
+                        "recipient_id": recipient_info['recipient_id'],
+                        "confidence": 1.0,
+                        "metadata": recipient_info.get('recipient_metadata'),
+                        "candidates": []
+                    }
+            
+            recipient_id = self._match_issued_fingerprints(extracted_chars)
+            if recipient_id:
+                return {"recipient_id": recipient_id, "confidence": 1.0, "metadata": None, "candidates": []}
+            
+            candidates = self._rank_kgram_candidates(extracted_chars, limit)
+            if candidates:
+                return {
+                    "recipient_id": candidates[0]['recipient_id'],
+                    "confidence": candidates[0]['confidence'],
+                    "metadata": None,
+                    "candidates": candidates
+                }
+        
+        # Linguistic attribution: the per-sentence choice pattern, then similarity to the delivered variant
+        phrasing = self.identify_by_phrasing(leaked_text)
+        if phrasing:
+            return {
+                "recipient_id": phrasing['recipient_id'],
+                "confidence": phrasing['confidence'],
+                "metadata": None,
+                "candidates": []
+            }
+        
+        candidates = self._rank_recipients(self._score_variants(leaked_text))
+        if not candidates:
+            return {"recipient_id": None, "confidence": 0.0, "metadata": None, "candidates": []}
+        
+        # Recipients who received the same variant cannot be told apart: the ties are counted
+        # over every recipient of the best variants, and none of them is named
+        top_similarity = candidates[0]['similarity']
+        tied = sum(1 for candidate in candidates if candidate['similarity'] == top_similarity)
+        return {
+            "recipient_id": candidates[0]['recipient_id'] if tied == 1 else None,
+            "confidence": top_similarity / tied,
+            "metadata": None,
+            "candidates": candidates[:limit]
+        }
     
     def get_all_recipients(self) -> List[Dict[str, Any]]:
         """
@@ -253,15 +946,26 @@ class WhisperPrintEngine:
         """
         return self.db.get_all_recipients()
     
-    def get_audit_logs(self, limit: int = 100, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_audit_logs(
+        self,
+        limit: int = 100,
+        event_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        flush: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Get audit logs from the system.
         
         Args:
             limit: Maximum number of logs to return.
             event_type: Optional filter for event type.
+            cursor: Optional cursor of the previous page's last entry (see audit_log_cursor).
+            flush: Include the audit events that are still queued.
             
         Returns:
             List of audit log entries.
+            
+        Raises:
+            ValueError: If the cursor is malformed.
         """
-        return self.db.get_audit_logs(limit, event_type) 
\ No newline at end of file
+        return self.db.get_audit_logs(limit, event_type, cursor, flush) 
\ No newline at end of file
@@ -0,0 +1,417 @@
+import re
+import codecs
+import shutil
+import zipfile
+from typing import Iterable, Iterator, Optional, Set
+from whisperprint.insertion import FingerprintInserter, insert_fingerprint_stream
+
+DOCUMENT_FORMATS = ("text", "html", "xml", "markdown")
+
+# Markup tokens: comments, CDATA, processing instructions, declarations and tags (quoted attributes may contain '>')
+_MARKUP_TOKEN = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<![^>]*>'
+    r'|</?[A-Za-z][^\s/>]*(?:[^>"\']|"[^"]*"|\'[^\']*\')*>',
+    re.S
+)
+_TAG_NAME = re.compile(r'</?([^\s/>]+)')
+# Characters that can follow '<' at the start of a markup token
+_TOKEN_START = re.compile(r'<[!?/A-Za-z]')
+# A '<' with no complete token after this many characters is treated as text
+_MAX_TOKEN_LENGTH = 1 << 20
+
+# HTML elements whose content is not rendered as body text
+_HTML_SKIPPED = {"head", "script", "style", "textarea", "template", "title", "noscript"}
+_HTML_RAW_TEXT = {"script", "style", "textarea", "title"}
+_HTML_VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# DOCX body text lives in <w:t> runs of word/document.xml
+DOCX_TEXT_ELEMENTS = {"w:t"}
+DOCX_DOCUMENT_PART = "word/document.xml"
+
+# Markdown syntax that must not receive fingerprint characters
+_MARKDOWN_FENCE = re.compile(r' {0,3}(`{3,}|~{3,})')
+_MARKDOWN_BLOCK_PREFIX = re.compile(r'[ \t]*(?:(?:>|(?:[-*+]|\d{1,9}[.)]|#{1,6})(?=[ \t\r\n]|$))[ \t]*)*')
+_MARKDOWN_LINK_DEFINITION = re.compile(r' {0,3}\[[^\]]+\]:')
+_MARKDOWN_INLINE = re.compile(r'(`+).*?\1|<[^>\n]*>|\]\([^)\n]*\)')
+
+class _StructuredFingerprinter:
+    """
+    Base class for incremental fingerprinting of documents with markup.
+    
+    Text runs go through a FingerprintInserter; everything else passes through unchanged.
+    While fingerprint characters remain, markup that follows the most recent text run is
+    held back, so the characters left over at the end of the document can still be placed
+    inside that text run. Nothing is held back before the first text run, and at most
+    _MAX_TOKEN_LENGTH characters after it: beyond that the leftovers are placed right away.
+    """
+    
+    def __init__(self, fingerprint: str):
+        self._inserter = FingerprintInserter(fingerprint)
+        self._has_text = False
+        self._trailing = []
+        self._trailing_length = 0
+        self._output = []
+    
+    def _release_trailing(self) -> None:
+        self._output.extend(self._trailing)
+        self._trailing = []
+        self._trailing_length = 0
+    
+    def _emit(self, fingerprinted: str) -> None:
+        if fingerprinted:
+            self._release_trailing()
+            self._output.append(fingerprinted)
+    
+    def _text(self, text: str) -> None:
+        if text:
+            self._has_text = True
+            self._emit(self._inserter.feed(text))
+    
+    def _markup(self, markup: str) -> None:
+        if not markup:
+            return
+        # A carriage return held back by the inserter belongs before this markup
+        self._emit(self._inserter.flush())
+        if self._inserter.remaining and self._has_text:
+            self._trailing.append(markup)
+            self._trailing_length += len(markup)
+            if self._trailing_length > _MAX_TOKEN_LENGTH:
+                # Place the leftovers at the end of the last text run instead of buffering further
+                self._output.append(self._inserter.finish())
+                self._release_trailing()
+        else:
+            self._release_trailing()
+            self._output.append(markup)
+    
+    def _drain(self) -> str:
+        output = ''.join(self._output)
+        self._output = []
+        return output
+    
+    def finish(self) -> str:
+        """
+        Finish the document.
+        
+        Returns:
+            The remaining output, including any fingerprint characters not placed yet.
+        
+        Raises:
+            ValueError: If the document has no text run that could carry the fingerprint.
+        """
+        if self._inserter.remaining and not self._has_text:
+            raise ValueError("The document has no text to carry the fingerprint")
+        self._output.append(self._inserter.finish())
+        self._release_trailing()
+        return self._drain()
+
+class MarkupFingerprinter(_StructuredFingerprinter):
+    """
+    Incremental fingerprinting of HTML or XML.
+    
+    The input is tokenized as it arrives and every tag, comment and declaration is copied
+    byte for byte; fingerprint characters only go into text nodes. In HTML, text inside
+    head, script, style and similar elements and anything after </body> is left alone. In
+    XML, only text inside the root element is fingerprinted, and text_elements restricts
+    fingerprinting to the content of the named elements (such as DOCX_TEXT_ELEMENTS).
+    Whitespace-only text counts as a text run only inside one of those named elements;
+    elsewhere it is indentation (or, between table tags, would be moved by HTML parsers).
+    """
+    
+    def __init__(self, fingerprint: str, mode: str = "html", text_elements: Optional[Set[str]] = None):
+        """
+        Initialize the fingerprinter.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint to insert.
+            mode: "html" or "xml".
+            text_elements: XML only; qualified names of the elements whose text is fingerprinted.
+                           All text inside the root element is fingerprinted if omitted.
+        """
+        if mode not in ("html", "xml"):
+            raise ValueError(f"Unknown markup mode '{mode}'. Available: html, xml")
+        super().__init__(fingerprint)
+        self.mode = mode
+        self.text_elements = text_elements
+        self._buffer = ''
+        self._depth = 0
+        self._open_elements = 0
+        self._after_body = False
+        self._node_has_text = False
+        self._raw_text = None
+    
+    def _is_text_run(self, text: str) -> bool:
+        whitespace = text.isspace() and not self._node_has_text
+        self._node_has_text = self._node_has_text or not text.isspace()
+        if self.mode == "html":
+            return self._depth == 0 and not self._after_body and not whitespace
+        if self.text_elements is None:
+            return self._open_elements > 0 and not whitespace
+        return self._depth > 0
+    
+    def _tag(self, token: str) -> None:
+        self._markup(token)
+        self._node_has_text = False
+        if token.startswith(('<!', '<?')):
+            return
+        
+        name = _TAG_NAME.match(token).group(1)
+        closing = token.startswith('</')
+        self_closing = token.endswith('/>')
+        if self.mode == "html":
+            name = name.lower()
+            if closing and name in ("body", "html"):
+                self._after_body = True
+            if name in _HTML_VOID or self_closing or name not in _HTML_SKIPPED:
+                return
+            if closing:
+                self._depth = max(self._depth - 1, 0)
+            else:
+                self._depth += 1
+                if name in _HTML_RAW_TEXT:
+                    self._raw_text = name
+            return
+        
+        if not self_closing:
+            self._open_elements = max(self._open_elements - 1, 0) if closing else self._open_elements + 1
+        if self.text_elements is not None and name in self.text_elements and not self_closing:
+            self._depth = max(self._depth - 1, 0) if closing else self._depth + 1
+    
+    def _tokenize(self, final: bool) -> None:
+        buffer = self._buffer
+        position = 0
+        while position < len(buffer):
+            if self._raw_text:
+                # Script and style content passes through up to the closing tag
+                closing_tag = '</' + self._raw_text
+                end = buffer.lower().find(closing_tag, position)
+                if end < 0:
+                    keep = 0 if final else len(closing_tag) - 1
+                    end = max(position, len(buffer) - keep)
+                    self._markup(buffer[position:end])
+                    position = end
+                    break
+                self._markup(buffer[position:end])
+                self._raw_text = None
+                position = end
+            
+            start = buffer.find('<', position)
+            if start < 0:
+                start = len(buffer)
+            if start > position:
+                text = buffer[position:start]
+                # Whitespace so far: whether it is a text run depends on what follows
+                unfinished = start == len(buffer) and not final and len(text) < _MAX_TOKEN_LENGTH
+                if unfinished and text.isspace() and not self._node_has_text:
+                    break
+                if self._is_text_run(text):
+                    self._text(text)
+                else:
+                    self._markup(text)
+                position = start
+            if position == len(buffer):
+                break
+            
+            match = _MARKUP_TOKEN.match(buffer, position)
+            if match:
+                self._tag(match.group())
+                position = match.end()
+                continue
+            
+            # An unfinished token waits for more input; a stray '<' is text
+            incomplete = len(buffer) - position < 2 or _TOKEN_START.match(buffer, position)
+            if incomplete and not final and len(buffer) - position < _MAX_TOKEN_LENGTH:
+                break
+            if self._is_text_run('<'):
+                self._text('<')
+            else:
+                self._markup('<')
+            position += 1
+        
+        self._buffer = buffer[position:]
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Process the next chunk of the document.
+        
+        Args:
+            chunk: The next piece of markup.
+        
+        Returns:
+            Fingerprinted output that is ready.
+        """
+        self._buffer += chunk
+        self._tokenize(final=False)
+        return self._drain()
+    
+    def finish(self) -> str:
+        """
+        Finish the document.
+        
+        Returns:
+            The remaining output, including any fingerprint characters not placed yet.
+        """
+        self._tokenize(final=True)
+        return super().finish()
+
+class MarkdownFingerprinter(_StructuredFingerprinter):
+    """
+    Incremental fingerprinting of Markdown.
+    
+    The input is processed line by line. Code blocks, inline code, link targets, inline HTML,
+    link definitions and block markers (headings, list bullets, quotes) are copied unchanged
+    so the rendered structure is preserved; fingerprint characters go into the prose.
+    """
+    
+    def __init__(self, fingerprint: str):
+        """
+        Initialize the fingerprinter.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint to insert.
+        """
+        super().__init__(fingerprint)
+        self._buffer = ''
+        self._fence = None
+        self._previous_blank = True
+        self._in_indented_code = False
+    
+    def _line(self, line: str) -> None:
+        fence = _MARKDOWN_FENCE.match(line)
+        if self._fence:
+            if fence and fence.group(1).startswith(self._fence) and not line[fence.end():].strip():
+                self._fence = None
+            self._markup(line)
+            return
+        if fence:
+            self._fence = fence.group(1)
+            self._markup(line)
+            return
+        
+        blank = not line.strip()
+        indented = line.startswith(('    ', '\t'))
+        self._in_indented_code = indented and not blank and (self._previous_blank or self._in_indented_code)
+        self._previous_blank = blank
+        if self._in_indented_code or _MARKDOWN_LINK_DEFINITION.match(line):
+            self._markup(line)
+            return
+        
+        prefix = _MARKDOWN_BLOCK_PREFIX.match(line).end()
+        self._markup(line[:prefix])
+        position = prefix
+        for match in _MARKDOWN_INLINE.finditer(line, prefix):
+            self._text(line[position:match.start()])
+            self._markup(match.group())
+            position = match.end()
+        self._text(line[position:])
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Process the next chunk of the document.
+        
+        Args:
+            chunk: The next piece of Markdown.
+        
+        Returns:
+            Fingerprinted output that is ready.
+        """
+        self._buffer += chunk
+        lines = self._buffer.splitlines(keepends=True)
+        if lines and not lines[-1].endswith(('\n', '\r')):
+            self._buffer = lines.pop()
+        else:
+            self._buffer = ''
+        # A carriage return may be the first half of a split '\r\n'
+        if lines and lines[-1].endswith('\r'):
+            self._buffer = lines.pop() + self._buffer
+        
+        # Extremely long lines are processed without waiting for their end
+        if len(self._buffer) > _MAX_TOKEN_LENGTH:
+            lines.append(self._buffer)
+            self._buffer = ''
+        
+        for line in lines:
+            self._line(line)
+        return self._drain()
+    
+    def finish(self) -> str:
+        """
+        Finish the document.
+        
+        Returns:
+            The remaining output, including any fingerprint characters not placed yet.
+        """
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ''
+        return super().finish()
+
+def fingerprint_stream(chunks: Iterable[str], fingerprint: str, document_format: str = "text") -> Iterator[str]:
+    """
+    Insert a fingerprint into a document of the given format, chunk by chunk.
+    
+    Args:
+        chunks: Pieces of the document, in order.
+        fingerprint: The zero-width character fingerprint to insert.
+        document_format: One of DOCUMENT_FORMATS.
+    
+    Yields:
+        Pieces of the fingerprinted document; empty pieces are skipped.
+    """
+    if document_format == "text":
+        yield from insert_fingerprint_stream(chunks, fingerprint)
+        return
+    if document_format == "html":
+        fingerprinter = MarkupFingerprinter(fingerprint, "html")
+    elif document_format == "xml":
+        fingerprinter = MarkupFingerprinter(fingerprint, "xml")
+    elif document_format == "markdown":
+        fingerprinter = MarkdownFingerprinter(fingerprint)
+    else:
+        raise ValueError(f"Unknown document format '{document_format}'. Available: {', '.join(DOCUMENT_FORMATS)}")
+    
+    for chunk in chunks:
+        output = fingerprinter.feed(chunk)
+        if output:
+            yield output
+    output = fingerprinter.finish()
+    if output:
+        yield output
+
+def fingerprint_docx(input_path: str, output_path: str, fingerprint: str, block_size: int = 1 << 16) -> None:
+    """
+    Insert a fingerprint into the body text of a DOCX file.
+    
+    The archive is rewritten entry by entry. Every entry except the main document part is
+    copied unchanged; the main document is decoded, fingerprinted and recompressed as a
+    stream, so neither the archive nor the document XML is held in memory.
+    
+    Args:
+        input_path: The DOCX file to fingerprint.
+        output_path: Where to write the fingerprinted copy.
+        fingerprint: The zero-width character fingerprint to insert.
+        block_size: Size of the blocks read from the archive.
+    
+    Raises:
+        ValueError: If the main document has no body text to carry the fingerprint.
+    """
+    with zipfile.ZipFile(input_path) as source, zipfile.ZipFile(output_path, 'w') as target:
+        for info in source.infolist():
+            target_info = zipfile.ZipInfo(info.filename, info.date_time)
+            target_info.compress_type = info.compress_type
+            target_info.external_attr = info.external_attr
+            target_info.comment = info.comment
+            
+            with source.open(info) as src, target.open(target_info, 'w', force_zip64=info.file_size > (1 << 30)) as dst:
+                if info.filename != DOCX_DOCUMENT_PART:
+                    shutil.copyfileobj(src, dst, block_size)
+                    continue
+                
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                fingerprinter = MarkupFingerprinter(fingerprint, "xml", DOCX_TEXT_ELEMENTS)
+                while True:
+                    block = src.read(block_size)
+                    if not block:
+                        break
+                    dst.write(fingerprinter.feed(decoder.decode(block)).encode('utf-8'))
+                dst.write(fingerprinter.feed(decoder.decode(b'', final=True)).encode('utf-8'))
+                dst.write(fingerprinter.finish().encode('utf-8'))
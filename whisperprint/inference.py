@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+from typing import Dict, Any, Optional
+import torch
+from transformers import AutoTokenizer, T5ForConditionalGeneration
+
+# Decoding presets for paraphrase generation. "quality" is the original beam-sample search with
+# one beam per variant; "fast" samples each variant in a single pass without beam bookkeeping.
+GENERATION_PRESETS = {
+    "quality": {
+        "num_beams": None,  # One beam per requested variant
+        "do_sample": True,
+        "temperature": 0.8,
+        "top_p": 0.95,
+        "top_k": 50
+    },
+    "fast": {
+        "num_beams": 1,
+        "do_sample": True,
+        "temperature": 0.8,
+        "top_p": 0.9,
+        "top_k": 40
+    }
+}
+
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx")
+
+# ONNX exports are written here once, one subdirectory per model, and loaded on later starts
+DEFAULT_ONNX_CACHE_DIR = "onnx-cache"
+
+def build_generation_settings(preset: str, num_variants: int, max_length: int) -> Dict[str, Any]:
+    """
+    Build model.generate arguments from a decoding preset.
+    
+    Args:
+        preset: Name of the decoding preset.
+        num_variants: Number of sequences to return per input.
+        max_length: Maximum output length in tokens.
+    
+    Returns:
+        Keyword arguments for generate().
+    """
+    if preset not in GENERATION_PRESETS:
+        raise ValueError(f"Unknown generation preset '{preset}'. Available: {', '.join(GENERATION_PRESETS)}")
+    
+    settings = dict(GENERATION_PRESETS[preset])
+    if settings["num_beams"] is None:
+        settings["num_beams"] = num_variants
+    settings["num_return_sequences"] = num_variants
+    settings["max_length"] = max_length
+    return settings
+
+class T5InferenceBackend:
+    """
+    Loads a T5 paraphrase model for one of several inference backends.
+    
+    - torch: the plain PyTorch model (GPU if available)
+    - torch-int8: PyTorch with int8 dynamic quantization of the linear layers (CPU)
+    - onnx: an onnxruntime encoder/decoder exported through optimum (CPU)
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "t5-base",
+        backend: str = "torch",
+        num_threads: Optional[int] = None,
+        onnx_cache_dir: Optional[str] = None
+    ):
+        """
+        Initialize the inference backend.
+        
+        Args:
+            model_name: The name of the T5 model to load.
+            backend: One of INFERENCE_BACKENDS.
+            num_threads: Optional number of intra-op threads for CPU inference.
+            onnx_cache_dir: Directory holding exported ONNX models, defaults to DEFAULT_ONNX_CACHE_DIR.
+        """
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}'. Available: {', '.join(INFERENCE_BACKENDS)}")
+        
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_cache_dir = onnx_cache_dir or DEFAULT_ONNX_CACHE_DIR
+        
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        
+        # The Rust-backed fast tokenizer handles padded batches much faster than T5Tokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        
+        if backend == "onnx":
+            self.device = torch.device("cpu")
+            self.model = self._load_onnx_model(model_name, num_threads)
+        else:
+            use_cuda = backend == "torch" and torch.cuda.is_available()
+            self.device = torch.device("cuda" if use_cuda else "cpu")
+            
+            model = T5ForConditionalGeneration.from_pretrained(model_name)
+            model.eval()
+            if backend == "torch-int8":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.model = model.to(self.device)
+    
+    def _load_onnx_model(self, model_name: str, num_threads: Optional[int]):
+        """
+        Load the model as an onnxruntime seq2seq model.
+        
+        The first start exports the model and saves the export to the cache directory;
+        later starts load the saved ONNX files instead of exporting again.
+        """
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise ImportError("The onnx backend requires optimum[onnxruntime]: pip install optimum[onnxruntime]")
+        
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+        
+        export_dir = os.path.join(self.onnx_cache_dir, model_name.replace("/", "--"))
+        if os.path.exists(os.path.join(export_dir, "config.json")):
+            return ORTModelForSeq2SeqLM.from_pretrained(export_dir, session_options=session_options)
+        
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, session_options=session_options)
+        
+        # Save to a temporary directory and rename it into place, so an interrupted export or
+        # another worker exporting at the same time never leaves a partial cache entry
+        os.makedirs(self.onnx_cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.onnx_cache_dir)
+        try:
+            model.save_pretrained(staging_dir)
+            os.replace(staging_dir, export_dir)
+        except OSError as e:
+            print(f"Could not cache ONNX export in {export_dir}: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        return model
+    
+    def generate(self, **kwargs):
+        """
+        Run generation without autograd bookkeeping.
+        
+        Args:
+            **kwargs: Arguments passed to model.generate (tensors must already be on self.device).
+        
+        Returns:
+            The generated token ids.
+        """
+        with torch.inference_mode():
+            return self.model.generate(**kwargs)
@@ -0,0 +1,170 @@
+import re
+from typing import Iterable, Iterator
+
+# While a sentence still waits for its fingerprint character: the first space after a word, or a line end
+_AWAITING_SLOT = re.compile(r'(?<=[^\s.]) |\r?\n')
+# Once the sentence has its character: the next sentence boundary or line end
+_SENTENCE_END = re.compile(r'\. |\r?\n')
+
+class FingerprintInserter:
+    """
+    Single-pass, incremental insertion of a zero-width fingerprint into text.
+    
+    One fingerprint character goes after the first word of each sentence and one at the end
+    of each non-empty line; characters left over when the text ends are appended at the end.
+    The text itself is never modified. Text can be fed in arbitrary chunks, and the output
+    of all feed() calls followed by finish() is the fingerprinted text.
+    """
+    
+    def __init__(self, fingerprint: str):
+        """
+        Initialize the inserter.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint to insert.
+        """
+        self.fingerprint = fingerprint
+        self._next = 0
+        self._awaiting = True
+        self._line_has_text = False
+        self._prev = ''
+        self._pending = ''
+    
+    @property
+    def remaining(self) -> int:
+        """Number of fingerprint characters not yet inserted."""
+        return len(self.fingerprint) - self._next
+    
+    def _take(self) -> str:
+        char = self.fingerprint[self._next]
+        self._next += 1
+        return char
+    
+    def feed(self, text: str) -> str:
+        """
+        Process the next chunk of text.
+        
+        Args:
+            text: The next chunk of the document.
+        
+        Returns:
+            The fingerprinted chunk.
+        """
+        # Hold back a trailing carriage return until we know whether a line feed follows
+        text = self._pending + text
+        self._pending = ''
+        if text.endswith('\r'):
+            self._pending = '\r'
+            text = text[:-1]
+        
+        return self._process(text)
+    
+    def flush(self) -> str:
+        """
+        Release a held-back carriage return as plain text.
+        
+        For callers that interleave other output (such as markup) between chunks of text.
+        
+        Returns:
+            The released text, if any.
+        """
+        pending = self._pending
+        self._pending = ''
+        return self._process(pending)
+    
+    def _process(self, text: str) -> str:
+        if not text:
+            return ''
+        
+        # Keep the previous character in front so look-behinds work across chunk boundaries
+        buf = self._prev + text
+        pos = start = len(self._prev)
+        output = []
+        
+        if not self._awaiting and self._prev == '.' and text[0] == ' ':
+            self._awaiting = True
+            pos += 1
+        
+        while self._next < len(self.fingerprint):
+            pattern = _AWAITING_SLOT if self._awaiting else _SENTENCE_END
+            match = pattern.search(buf, pos)
+            if not match:
+                if self._awaiting and not self._line_has_text:
+                    self._line_has_text = len(buf) > pos and not buf[pos:].isspace()
+                break
+            
+            index = match.start()
+            if match.group().endswith('\n'):
+                # Line end: one character if the line had any text
+                if self._awaiting and not self._line_has_text:
+                    self._line_has_text = index > pos and not buf[pos:index].isspace()
+                if self._line_has_text:
+                    output.append(buf[start:index])
+                    output.append(self._take())
+                    start = index
+                self._awaiting = True
+                self._line_has_text = False
+            elif self._awaiting:
+                # First space after the first word of the sentence
+                output.append(buf[start:index])
+                output.append(self._take())
+                start = index
+                self._awaiting = False
+                self._line_has_text = True
+            else:
+                # Sentence boundary
+                self._awaiting = True
+            pos = match.end()
+        
+        output.append(buf[start:])
+        self._prev = text[-1]
+        return ''.join(output)
+    
+    def finish(self) -> str:
+        """
+        Finish the document.
+        
+        Returns:
+            The fingerprint characters that go after the last chunk.
+        """
+        output = [self._pending]
+        self._pending = ''
+        if self.remaining and self._line_has_text:
+            output.append(self._take())
+        output.append(self.fingerprint[self._next:])
+        self._next = len(self.fingerprint)
+        return ''.join(output)
+
+def insert_fingerprint(text: str, fingerprint: str) -> str:
+    """
+    Insert a zero-width fingerprint into text.
+    
+    Args:
+        text: The text to fingerprint.
+        fingerprint: The zero-width character fingerprint.
+    
+    Returns:
+        Text with embedded fingerprint.
+    """
+    inserter = FingerprintInserter(fingerprint)
+    return inserter.feed(text) + inserter.finish()
+
+def insert_fingerprint_stream(chunks: Iterable[str], fingerprint: str) -> Iterator[str]:
+    """
+    Insert a zero-width fingerprint into a stream of text chunks.
+    
+    Args:
+        chunks: Chunks of the document, e.g. lines of a file opened in text mode.
+        fingerprint: The zero-width character fingerprint.
+    
+    Yields:
+        Fingerprinted chunks.
+    """
+    inserter = FingerprintInserter(fingerprint)
+    for chunk in chunks:
+        output = inserter.feed(chunk)
+        if output:
+            yield output
+    tail = inserter.finish()
+    if tail:
+        yield tail
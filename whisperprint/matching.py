@@ -0,0 +1,243 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+class FingerprintMatcher:
+    """
+    Reverse map from fingerprint to recipient with an Aho-Corasick automaton over the fingerprints.
+    
+    Fingerprints are added incrementally to the map and the trie; the failure links are
+    rebuilt lazily on the first search after a change. A search finds every registered
+    fingerprint embedded in a text in a single pass, independent of how many are registered.
+    
+    The trie costs a node per fingerprint character, so the matcher holds at most
+    max_fingerprints: once full, the oldest quarter is evicted and the trie rebuilt.
+    It is a fallback for legacy (version 0) fingerprints only; compact fingerprints are
+    decoded exactly and resolved with an indexed UUID lookup.
+    """
+    
+    def __init__(self, max_fingerprints: int = 10000):
+        """
+        Initialize an empty matcher.
+        
+        Args:
+            max_fingerprints: Maximum number of fingerprints held.
+        """
+        self.max_fingerprints = max(max_fingerprints, 1)
+        self.recipients = {}  # fingerprint -> recipient ID, oldest first
+        self._reset()
+    
+    def _reset(self) -> None:
+        """Start an empty trie."""
+        self._goto = [{}]  # Trie transitions per node
+        self._fail = [0]
+        self._output = [None]  # Fingerprint ending at each node
+        self._dict_link = [0]  # Nearest node on the failure chain with an output
+        self._dirty = False
+    
+    def __len__(self) -> int:
+        return len(self.recipients)
+    
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self.recipients
+    
+    def add(self, fingerprint: str, recipient_id: str) -> None:
+        """
+        Register a fingerprint.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint.
+            recipient_id: The recipient it was issued to.
+        """
+        if not fingerprint:
+            return
+        
+        if fingerprint in self.recipients:
+            self.recipients[fingerprint] = recipient_id
+            return
+        
+        if len(self.recipients) >= self.max_fingerprints:
+            self._evict_oldest(max(self.max_fingerprints // 4, 1))
+        
+        self.recipients[fingerprint] = recipient_id
+        self._insert(fingerprint)
+    
+    def _evict_oldest(self, count: int) -> None:
+        """Drop the oldest fingerprints and rebuild the trie from the rest."""
+        for fingerprint in list(self.recipients)[:count]:
+            del self.recipients[fingerprint]
+        self._reset()
+        for fingerprint in self.recipients:
+            self._insert(fingerprint)
+    
+    def _insert(self, fingerprint: str) -> None:
+        """Add a fingerprint's path to the trie."""
+        node = 0
+        for char in fingerprint:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+            node = next_node
+        self._output[node] = fingerprint
+        self._dirty = True
+    
+    def get(self, fingerprint: str) -> Optional[str]:
+        """
+        Look up the recipient of an exact fingerprint.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint.
+        
+        Returns:
+            The recipient ID if registered, None otherwise.
+        """
+        return self.recipients.get(fingerprint)
+    
+    def _build(self) -> None:
+        """Compute failure and output links breadth-first."""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._dict_link[child] = 0
+            queue.append(child)
+        
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._dict_link[child] = fail if self._output[fail] is not None else self._dict_link[fail]
+                queue.append(child)
+        
+        self._dirty = False
+    
+    def find_all(self, text: str) -> List[Tuple[int, str, str]]:
+        """
+        Find every registered fingerprint occurring in a text.
+        
+        Args:
+            text: The text to scan, typically the zero-width characters extracted from a document.
+        
+        Returns:
+            List of (start offset, fingerprint, recipient ID) in order of occurrence.
+        """
+        if not self.recipients:
+            return []
+        if self._dirty:
+            self._build()
+        
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            
+            hit = node if output[node] is not None else dict_link[node]
+            while hit:
+                fingerprint = output[hit]
+                matches.append((index - len(fingerprint) + 1, fingerprint, self.recipients[fingerprint]))
+                hit = dict_link[hit]
+        
+        return matches
+    
+    def best_match(self, text: str) -> Optional[str]:
+        """
+        Find the recipient whose fingerprint occurs most often in a text.
+        
+        Args:
+            text: The text to scan.
+        
+        Returns:
+            The recipient ID if any fingerprint was found, None otherwise.
+        """
+        counts = {}
+        for _, _, recipient_id in self.find_all(text):
+            counts[recipient_id] = counts.get(recipient_id, 0) + 1
+        if not counts:
+            return None
+        return max(counts, key=counts.get)
+
+class KGramIndex:
+    """
+    Inverted index from fingerprint k-grams to recipients for partial-fingerprint attribution.
+    
+    Fragments of a leaked document carry only some of the fingerprint characters, and characters
+    may be lost in between. Every run of k consecutive characters that survives still votes for
+    the recipients whose fingerprints contain it, so a query only touches the posting lists of
+    its own k-grams. K-grams shared by more than max_postings recipients (such as the fixed
+    header of the compact encoding) carry no information and are dropped from the index.
+    """
+    
+    def __init__(self, k: int = 12, max_postings: int = 64):
+        """
+        Initialize an empty index.
+        
+        Args:
+            k: Length of the indexed k-grams, in zero-width characters.
+            max_postings: K-grams shared by more recipients than this are not indexed.
+        """
+        self.k = k
+        self.max_postings = max_postings
+        self.postings = {}  # k-gram -> set of recipient IDs, or None once too common
+        self.fingerprint_count = 0
+    
+    def add(self, fingerprint: str, recipient_id: str) -> None:
+        """
+        Index the k-grams of a fingerprint.
+        
+        Args:
+            fingerprint: The zero-width character fingerprint.
+            recipient_id: The recipient it was issued to.
+        """
+        postings = self.postings
+        for start in range(len(fingerprint) - self.k + 1):
+            gram = fingerprint[start:start + self.k]
+            recipients = postings.get(gram, ())
+            if recipients is None:
+                continue
+            if not recipients:
+                postings[gram] = {recipient_id}
+            elif len(recipients) >= self.max_postings and recipient_id not in recipients:
+                postings[gram] = None
+            else:
+                recipients.add(recipient_id)
+        self.fingerprint_count += 1
+    
+    def rank(self, zero_width_chars: str, limit: int = 5, min_votes: int = 1) -> List[Dict[str, Any]]:
+        """
+        Rank recipients by the share of the query's k-grams found in their fingerprints.
+        
+        Args:
+            zero_width_chars: The zero-width characters extracted from a leaked document.
+            limit: Maximum number of candidates to return.
+            min_votes: Candidates with fewer matching k-grams are left out.
+        
+        Returns:
+            Candidates ordered by descending confidence, each with "recipient_id", "votes"
+            and "confidence" (votes divided by the number of distinct query k-grams).
+        """
+        grams = {zero_width_chars[start:start + self.k] for start in range(len(zero_width_chars) - self.k + 1)}
+        if not grams:
+            return []
+        
+        votes = {}
+        for gram in grams:
+            for recipient_id in self.postings.get(gram) or ():
+                votes[recipient_id] = votes.get(recipient_id, 0) + 1
+        
+        qualified = [(recipient_id, count) for recipient_id, count in votes.items() if count >= min_votes]
+        ranked = heapq.nlargest(limit, qualified, key=lambda item: item[1])
+        return [
+            {"recipient_id": recipient_id, "votes": count, "confidence": count / len(grams)}
+            for recipient_id, count in ranked
+        ]
@@ -0,0 +1,315 @@
+import zlib
+import sqlite3
+from typing import Callable, List, Tuple
+from whisperprint.connection import ConnectionManager
+from whisperprint.similarity import variant_hash
+
+def _create_base_schema(cursor: sqlite3.Cursor) -> None:
+    """Version 1: the tables, including upgrades of databases created before schema versioning."""
+    # Create recipients table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS recipients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient_id TEXT UNIQUE NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metadata TEXT,
+        uuid TEXT
+    )
+    ''')
+    
+    # Create fingerprints table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient_id TEXT NOT NULL,
+        uuid TEXT UNIQUE NOT NULL,
+        fingerprint TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        document_hash TEXT,
+        document_metadata TEXT,
+        FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
+    )
+    ''')
+    
+    # Create documents table for tracking documents
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_hash TEXT UNIQUE NOT NULL,
+        original_text TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        metadata TEXT,
+        chunk_list TEXT
+    )
+    ''')
+    
+    # Create chunk table for the deduplicated, compressed document store
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS chunks (
+        chunk_hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+    ''')
+    
+    # Create paraphrase cache table (segment outputs keyed by segment, model and settings)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS paraphrase_cache (
+        cache_key TEXT PRIMARY KEY,
+        variants TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Create variant signature table (MinHash signature and compressed text of each delivered variant)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS variant_signatures (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient_id TEXT NOT NULL,
+        document_hash TEXT,
+        signature BLOB NOT NULL,
+        variant_text BLOB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
+    )
+    ''')
+    
+    # Create LSH bucket table (one row per signature band)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lsh_buckets (
+        bucket_key INTEGER NOT NULL,
+        variant_id INTEGER NOT NULL,
+        PRIMARY KEY (bucket_key, variant_id)
+    ) WITHOUT ROWID
+    ''')
+    
+    # Create variant table store for combinatorial fingerprinting (one table per document)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS variant_tables (
+        document_hash TEXT PRIMARY KEY,
+        variant_table BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Create lookup from each alternative phrasing to its document, slot and choice
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS variant_sentences (
+        segment_key TEXT NOT NULL,
+        document_hash TEXT NOT NULL,
+        slot INTEGER NOT NULL,
+        choice INTEGER NOT NULL,
+        PRIMARY KEY (segment_key, document_hash, slot, choice)
+    ) WITHOUT ROWID
+    ''')
+    
+    # Create audit log table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_type TEXT NOT NULL,
+        event_data TEXT NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        user_id TEXT
+    )
+    ''')
+    
+    # Databases created before recipients carried their UUID: add the column and
+    # backfill it from the recipient's first fingerprint
+    cursor.execute("PRAGMA table_info(recipients)")
+    if "uuid" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE recipients ADD COLUMN uuid TEXT")
+        cursor.execute('''
+        UPDATE recipients SET uuid = (
+            SELECT f.uuid FROM fingerprints f
+            WHERE f.recipient_id = recipients.recipient_id
+            ORDER BY f.id
+            LIMIT 1
+        )
+        ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_recipients_uuid ON recipients (uuid)")
+    
+    # Databases created before the chunk store keep their bodies in original_text until compacted
+    cursor.execute("PRAGMA table_info(documents)")
+    if "chunk_list" not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE documents ADD COLUMN chunk_list TEXT")
+    
+    # Index for exact fingerprint lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_fingerprint ON fingerprints (fingerprint)")
+
+def _index_hot_queries(cursor: sqlite3.Cursor) -> None:
+    """Version 2: indexes for the per-recipient fingerprint listing and the audit log queries."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_recipient_id ON fingerprints (recipient_id)")
+    # Filtered and unfiltered audit log pages are read newest first straight from these indexes
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_event_type_timestamp ON audit_log (event_type, timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log (timestamp)")
+
+def _allow_reused_uuids(cursor: sqlite3.Cursor) -> None:
+    """
+    Version 3: let a recipient's UUID appear on several fingerprints.
+    
+    Recipients keep one UUID across documents, so the UNIQUE constraint on fingerprints.uuid
+    rejected every document after a recipient's first. SQLite cannot drop a constraint, so the
+    table is rebuilt; a trigger still keeps a UUID from being shared by two recipients.
+    """
+    cursor.execute('''
+    CREATE TABLE fingerprints_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient_id TEXT NOT NULL,
+        uuid TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        document_hash TEXT,
+        document_metadata TEXT,
+        FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
+    )
+    ''')
+    cursor.execute('''
+    INSERT INTO fingerprints_new (id, recipient_id, uuid, fingerprint, created_at, document_hash, document_metadata)
+    SELECT id, recipient_id, uuid, fingerprint, created_at, document_hash, document_metadata FROM fingerprints
+    ''')
+    cursor.execute("DROP TABLE fingerprints")
+    cursor.execute("ALTER TABLE fingerprints_new RENAME TO fingerprints")
+    
+    cursor.execute("CREATE INDEX idx_fingerprints_uuid ON fingerprints (uuid, recipient_id)")
+    cursor.execute("CREATE INDEX idx_fingerprints_fingerprint ON fingerprints (fingerprint)")
+    cursor.execute("CREATE INDEX idx_fingerprints_recipient_id ON fingerprints (recipient_id)")
+    cursor.execute('''
+    CREATE TRIGGER fingerprints_uuid_owner BEFORE INSERT ON fingerprints
+    WHEN EXISTS (SELECT 1 FROM fingerprints WHERE uuid = NEW.uuid AND recipient_id != NEW.recipient_id)
+    BEGIN
+        SELECT RAISE(ABORT, 'UUID belongs to another recipient');
+    END
+    ''')
+
+def _create_audit_archives(cursor: sqlite3.Cursor) -> None:
+    """Version 4: catalog of compressed monthly audit log archives."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS audit_archives (
+        month TEXT NOT NULL,
+        part INTEGER NOT NULL,
+        codec TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        first_timestamp TIMESTAMP NOT NULL,
+        last_timestamp TIMESTAMP NOT NULL,
+        data BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (month, part)
+    )
+    ''')
+
+def _index_fingerprint_days(cursor: sqlite3.Cursor) -> None:
+    """Version 5: index fingerprints by creation day, so per-day counts are grouped without a sort."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_created_day ON fingerprints (substr(created_at, 1, 10))")
+
+def _deduplicate_variants(cursor: sqlite3.Cursor) -> None:
+    """
+    Version 6: store each distinct variant once and map recipients to it.
+    
+    Recipients who receive the same paraphrase used to get their own copy of its text,
+    signature and LSH buckets. The signatures table is rebuilt keyed on variant_hash and
+    duplicate rows are merged into the first; their buckets are identical and are dropped.
+    """
+    cursor.execute('''
+    CREATE TABLE variant_signatures_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        variant_hash TEXT UNIQUE NOT NULL,
+        document_hash TEXT,
+        signature BLOB NOT NULL,
+        variant_text BLOB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Old variant ID -> ID of the first row with the same variant
+    surviving_ids = {}
+    ids_by_hash = {}
+    recipients = []
+    rows = cursor.execute(
+        "SELECT id, recipient_id, document_hash, signature, variant_text, created_at FROM variant_signatures ORDER BY id"
+    ).fetchall()
+    for variant_id, recipient_id, document_hash, signature, variant_text, created_at in rows:
+        text = zlib.decompress(variant_text).decode("utf-8") if variant_text else None
+        key = variant_hash(document_hash, signature, text)
+        if key not in ids_by_hash:
+            cursor.execute(
+                "INSERT INTO variant_signatures_new (id, variant_hash, document_hash, signature, variant_text, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (variant_id, key, document_hash, signature, variant_text, created_at)
+            )
+            ids_by_hash[key] = variant_id
+        surviving_ids[variant_id] = ids_by_hash[key]
+        recipients.append((ids_by_hash[key], recipient_id, created_at))
+    
+    duplicate_ids = [(variant_id,) for variant_id, surviving_id in surviving_ids.items() if variant_id != surviving_id]
+    cursor.executemany("DELETE FROM lsh_buckets WHERE variant_id = ?", duplicate_ids)
+    
+    cursor.execute("DROP TABLE variant_signatures")
+    cursor.execute("ALTER TABLE variant_signatures_new RENAME TO variant_signatures")
+    
+    cursor.execute('''
+    CREATE TABLE variant_recipients (
+        variant_id INTEGER NOT NULL,
+        recipient_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (variant_id, recipient_id),
+        FOREIGN KEY (variant_id) REFERENCES variant_signatures (id),
+        FOREIGN KEY (recipient_id) REFERENCES recipients (recipient_id)
+    ) WITHOUT ROWID
+    ''')
+    cursor.executemany(
+        "INSERT OR IGNORE INTO variant_recipients (variant_id, recipient_id, created_at) VALUES (?, ?, ?)",
+        recipients
+    )
+
+# Ordered (version, migration) pairs; append new migrations, never edit applied ones
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Cursor], None]]] = [
+    (1, _create_base_schema),
+    (2, _index_hot_queries),
+    (3, _allow_reused_uuids),
+    (4, _create_audit_archives),
+    (5, _index_fingerprint_days),
+    (6, _deduplicate_variants),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(connections: ConnectionManager) -> int:
+    """
+    Read the schema version of a database.
+    
+    Args:
+        connections: Connection manager of the database.
+    
+    Returns:
+        The version of the last migration applied (0 for a new or unversioned database).
+    """
+    return connections.connection().execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(connections: ConnectionManager) -> int:
+    """
+    Bring a database up to SCHEMA_VERSION.
+    
+    The version is kept in PRAGMA user_version. Each pending migration runs in its own
+    transaction together with the version bump, and the version is re-read under the
+    write lock, so concurrent processes opening the same database apply each migration once.
+    
+    Args:
+        connections: Connection manager of the database.
+    
+    Returns:
+        The schema version after migrating.
+    """
+    for version, migration in MIGRATIONS:
+        if get_schema_version(connections) >= version:
+            continue
+        with connections.transaction() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            migration(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+    
+    version = get_schema_version(connections)
+    if version > SCHEMA_VERSION:
+        print(f"Warning: Database schema version {version} is newer than this version of WhisperPrint ({SCHEMA_VERSION})")
+    return version
@@ -0,0 +1,188 @@
+import os
+import re
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+from whisperprint.database import FingerprintDatabase
+from whisperprint.encoding import ZERO_WIDTH_CHARS, decode_fingerprint_symbols
+from whisperprint.snapshot import SnapshotReader
+
+# UTF-8 encodings of the fingerprint characters, matched directly on the raw bytes
+ZERO_WIDTH_BYTES_PATTERN = re.compile(
+    b'(?:' + b'|'.join(re.escape(char.encode('utf-8')) for char in ZERO_WIDTH_CHARS) + b')+'
+)
+_BYTES_TO_SYMBOL = {char.encode('utf-8'): index for index, char in enumerate(ZERO_WIDTH_CHARS)}
+_CHAR_BYTES = 3  # Every fingerprint character is three bytes in UTF-8
+_MAX_OFFSETS = 256
+
+def iter_files(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Expand files and directories (recursively) into file paths.
+    
+    Args:
+        paths: Files and directories to scan.
+    
+    Yields:
+        Paths of regular files.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        elif os.path.isfile(path):
+            yield path
+
+def _segment_runs(data, max_gap: int) -> Iterator[List[int]]:
+    """
+    Group zero-width characters into clusters of nearby characters.
+    
+    Fingerprint characters are spread over a document (one per sentence or line), so runs
+    closer than max_gap bytes belong to the same candidate.
+    
+    Yields:
+        Lists of byte offsets, one per zero-width character in the cluster.
+    """
+    cluster = []
+    last_end = None
+    for match in ZERO_WIDTH_BYTES_PATTERN.finditer(data):
+        start, end = match.span()
+        if cluster and start - last_end > max_gap:
+            yield cluster
+            cluster = []
+        cluster.extend(range(start, end, _CHAR_BYTES))
+        last_end = end
+    if cluster:
+        yield cluster
+
+def scan_file(path: str, max_gap: int = 65536) -> List[Dict[str, Any]]:
+    """
+    Find and decode the fingerprints in one file.
+    
+    The file is memory-mapped and scanned as raw UTF-8 bytes, so it is never decoded or
+    loaded into memory as a whole.
+    
+    Args:
+        path: The file to scan.
+        max_gap: Maximum distance in bytes between fingerprint characters of one document.
+    
+    Returns:
+        One finding per decoded fingerprint or undecodable cluster, with "path",
+        "start_offset"/"end_offset" (byte offsets of the first character and just past
+        the last one), "uuid" (None if undecodable), "version" and "characters".
+    """
+    findings = []
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return findings
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offsets in _segment_runs(data, max_gap):
+                    symbols = [_BYTES_TO_SYMBOL[data[offset:offset + _CHAR_BYTES]] for offset in offsets]
+                    findings.extend(_decode_cluster(path, symbols, offsets))
+    except OSError as e:
+        print(f"Error scanning {path}: {e}")
+    return findings
+
+def _decode_cluster(path: str, symbols: List[int], offsets: List[int]) -> List[Dict[str, Any]]:
+    """
+    Decode consecutive fingerprints from a cluster of zero-width characters.
+    
+    Each step decodes a bounded window and advances past it, so the cost is linear in the
+    size of the cluster.
+    """
+    findings = []
+    position = 0
+    while position < len(symbols):
+        decoded = decode_fingerprint_symbols(symbols, position, _MAX_OFFSETS)
+        if not decoded:
+            # Nothing starts in this window; damaged fingerprints may be followed by intact ones
+            position += _MAX_OFFSETS
+            continue
+        start = decoded['start']
+        end = min(decoded['end'], len(symbols))
+        findings.append({
+            "path": path,
+            "start_offset": offsets[start],
+            "end_offset": offsets[end - 1] + _CHAR_BYTES,
+            "uuid": decoded['uuid'],
+            "version": decoded['version'],
+            "characters": end - start
+        })
+        position = end
+    
+    if not findings:
+        findings.append({
+            "path": path,
+            "start_offset": offsets[0],
+            "end_offset": offsets[-1] + _CHAR_BYTES,
+            "uuid": None,
+            "version": None,
+            "characters": len(symbols)
+        })
+    return findings
+
+def scan_paths(
+    paths: Iterable[str],
+    db: Optional[FingerprintDatabase] = None,
+    workers: Optional[int] = None,
+    max_gap: int = 65536,
+    snapshot: Optional[SnapshotReader] = None
+) -> List[Dict[str, Any]]:
+    """
+    Scan files and directories for fingerprints and attribute them to recipients.
+    
+    Files are scanned in a process pool; the decoded UUIDs are then resolved against the
+    database in batches.
+    
+    Args:
+        paths: Files and directories to scan.
+        db: Database used to resolve UUIDs; findings are not attributed if omitted.
+        workers: Number of worker processes (defaults to the CPU count; 1 scans in-process).
+        max_gap: Maximum distance in bytes between fingerprint characters of one document.
+        snapshot: Optional snapshot consulted before the database.
+    
+    Returns:
+        Findings as returned by scan_file, each with an added "recipient_id" (None if unknown).
+    """
+    files = list(iter_files(paths))
+    findings = []
+    if workers == 1 or len(files) <= 1:
+        for path in files:
+            findings.extend(scan_file(path, max_gap))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for file_findings in executor.map(scan_file, files, [max_gap] * len(files), chunksize=4):
+                findings.extend(file_findings)
+    
+    uuids = list({finding['uuid'] for finding in findings if finding['uuid']})
+    recipients = snapshot.lookup_many(uuids) if snapshot else {}
+    missing = [recipient_uuid for recipient_uuid in uuids if recipient_uuid not in recipients]
+    if db and missing:
+        recipients.update(db.get_recipient_ids_by_uuids(missing))
+    for finding in findings:
+        finding['recipient_id'] = recipients.get(finding['uuid'])
+    
+    return findings
+
+def format_report(findings: List[Dict[str, Any]]) -> str:
+    """
+    Format findings as a plain-text attribution report.
+    
+    Args:
+        findings: Findings returned by scan_paths.
+    
+    Returns:
+        The report, one line per finding followed by a summary.
+    """
+    lines = [f"{'path':<40} {'start':>12} {'end':>12}  {'uuid':<36}  recipient"]
+    for finding in findings:
+        lines.append(
+            f"{finding['path']:<40} {finding['start_offset']:>12} {finding['end_offset']:>12}  "
+            f"{finding['uuid'] or '(undecodable)':<36}  {finding.get('recipient_id') or '-'}"
+        )
+    
+    attributed = sum(1 for finding in findings if finding.get('recipient_id'))
+    recipients = len({finding['recipient_id'] for finding in findings if finding.get('recipient_id')})
+    lines.append(f"{len(findings)} fingerprints found, {attributed} attributed to {recipients} recipients")
+    return '\n'.join(lines)
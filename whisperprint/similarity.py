@@ -0,0 +1,121 @@
+import re
+import zlib
+import hashlib
+from typing import List, Optional, Set
+import numpy as np
+
+# Modulus of the universal hash family used to simulate the permutations (a Mersenne prime)
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD = re.compile(r'\w+')
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """
+    Hash the word n-grams of a text.
+    
+    Args:
+        text: The text to shingle.
+        size: Number of words per shingle. Texts shorter than this are shingled by word.
+    
+    Returns:
+        Set of 32-bit shingle hashes.
+    """
+    words = _WORD.findall(text.lower())
+    size = min(size, len(words)) or 1
+    return {
+        zlib.crc32(' '.join(words[start:start + size]).encode('utf-8'))
+        for start in range(len(words) - size + 1)
+    }
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def variant_hash(document_hash: Optional[str], signature: bytes, variant_text: Optional[str] = None) -> str:
+    """
+    Key of a delivered variant, shared by every recipient who received the same text.
+    
+    Args:
+        document_hash: Hash of the original document.
+        signature: MinHash signature of the variant, used when its text is not stored.
+        variant_text: The variant text.
+    
+    Returns:
+        Hex SHA-256 of the document hash and the variant text (or signature).
+    """
+    digest = hashlib.sha256((document_hash or "").encode("utf-8") + b"\0")
+    digest.update(variant_text.encode("utf-8") if variant_text is not None else signature)
+    return digest.hexdigest()
+
+class MinHasher:
+    """
+    MinHash signatures and LSH band keys for paraphrase variants.
+    
+    Signatures use num_perm simulated permutations and are split into bands of equal width;
+    two texts share a band key when all rows of that band agree, which happens with high
+    probability once their Jaccard similarity exceeds roughly (1 / bands) ** (1 / rows).
+    The permutations are derived from a fixed seed, so signatures stay comparable across runs.
+    """
+    
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        """
+        Initialize the hasher.
+        
+        Args:
+            num_perm: Number of MinHash permutations (signature length).
+            bands: Number of LSH bands; must divide num_perm.
+            seed: Seed for the permutation parameters.
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        """
+        Compute the MinHash signature of a shingle set.
+        
+        Args:
+            shingle_set: 32-bit shingle hashes, as returned by shingles().
+        
+        Returns:
+            Array of num_perm uint32 minimum hash values.
+        """
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        # (a * x + b) mod p for every shingle and permutation at once; a < 2^31 and x < 2^32 cannot overflow
+        hashed = (np.outer(values, self._a) + self._b) % np.uint64(_MERSENNE_PRIME)
+        return (hashed.min(axis=0) & np.uint64(_MAX_HASH)).astype(np.uint32)
+    
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """
+        Compute the LSH bucket key of each band of a signature.
+        
+        Args:
+            signature: A signature returned by signature().
+        
+        Returns:
+            One signed 64-bit key per band; the band index is part of the key.
+        """
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(rows, digest_size=8, person=band.to_bytes(2, 'big')).digest()
+            keys.append(int.from_bytes(digest, 'big', signed=True))
+        return keys
+    
+    @staticmethod
+    def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimate the Jaccard similarity of two texts from their signatures."""
+        return float(np.mean(a == b))
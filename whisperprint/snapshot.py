@@ -0,0 +1,163 @@
+import os
+import mmap
+import uuid
+import struct
+import tempfile
+from typing import Dict, List, Optional, Iterable, Tuple
+
+# File layout: header, fixed-size records sorted by UUID bytes, then the recipient ID strings.
+# Header: magic, record count, offset of the string area. Record: UUID bytes, string offset, string length.
+SNAPSHOT_MAGIC = b'WPSNAP01'
+_HEADER = struct.Struct('<8sQQ')
+_RECORD = struct.Struct('<16sQI')
+
+def export_snapshot(rows: Iterable[Tuple[str, str]], path: str) -> int:
+    """
+    Write a sorted binary snapshot of recipient UUIDs.
+    
+    The snapshot is written to a temporary file and moved into place, so readers never
+    see a partial file.
+    
+    Args:
+        rows: (uuid, recipient_id) tuples in ascending UUID order, e.g. from
+              FingerprintDatabase.iter_recipient_uuids().
+        path: Destination file.
+    
+    Returns:
+        Number of records written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    count = 0
+    try:
+        with os.fdopen(fd, 'wb') as output, tempfile.TemporaryFile() as strings:
+            output.write(_HEADER.pack(SNAPSHOT_MAGIC, 0, 0))
+            string_offsets = {}
+            string_size = 0
+            previous_key = None
+            
+            for recipient_uuid, recipient_id in rows:
+                key = uuid.UUID(recipient_uuid).bytes
+                if previous_key is not None and key <= previous_key:
+                    if key == previous_key:
+                        continue
+                    raise ValueError("Snapshot rows must be sorted by UUID")
+                previous_key = key
+                
+                # Store each recipient ID once
+                offset = string_offsets.get(recipient_id)
+                encoded = recipient_id.encode('utf-8')
+                if offset is None:
+                    offset = string_size
+                    string_offsets[recipient_id] = offset
+                    strings.write(encoded)
+                    string_size += len(encoded)
+                
+                output.write(_RECORD.pack(key, offset, len(encoded)))
+                count += 1
+            
+            string_area = _HEADER.size + count * _RECORD.size
+            strings.seek(0)
+            while True:
+                block = strings.read(1 << 20)
+                if not block:
+                    break
+                output.write(block)
+            
+            output.seek(0)
+            output.write(_HEADER.pack(SNAPSHOT_MAGIC, count, string_area))
+        
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    
+    return count
+
+class SnapshotReader:
+    """
+    Memory-mapped reader for snapshots written by export_snapshot.
+    
+    Lookups binary-search the mapped records directly, so opening a snapshot is instant
+    and its pages are shared through the OS page cache by every process that maps it.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a snapshot.
+        
+        Args:
+            path: The snapshot file.
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, self._count, self._string_area = _HEADER.unpack_from(self._data, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self._data.close()
+            raise ValueError(f"{path} is not a WhisperPrint snapshot")
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __enter__(self) -> "SnapshotReader":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _key_at(self, index: int) -> bytes:
+        start = _HEADER.size + index * _RECORD.size
+        return self._data[start:start + 16]
+    
+    def lookup(self, recipient_uuid: str) -> Optional[str]:
+        """
+        Find the recipient of a UUID.
+        
+        Args:
+            recipient_uuid: The UUID decoded from a fingerprint.
+        
+        Returns:
+            The recipient ID, or None if the UUID is not in the snapshot.
+        """
+        try:
+            key = uuid.UUID(recipient_uuid).bytes
+        except ValueError:
+            return None
+        
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        
+        if low == self._count or self._key_at(low) != key:
+            return None
+        
+        _, offset, length = _RECORD.unpack_from(self._data, _HEADER.size + low * _RECORD.size)
+        start = self._string_area + offset
+        return self._data[start:start + length].decode('utf-8')
+    
+    def lookup_many(self, recipient_uuids: List[str]) -> Dict[str, str]:
+        """
+        Find the recipients of many UUIDs.
+        
+        Args:
+            recipient_uuids: UUIDs decoded from fingerprints.
+        
+        Returns:
+            Dict mapping each UUID found to its recipient ID.
+        """
+        results = {}
+        for recipient_uuid in recipient_uuids:
+            recipient_id = self.lookup(recipient_uuid)
+            if recipient_id is not None:
+                results[recipient_uuid] = recipient_id
+        return results
+    
+    def close(self) -> None:
+        """Unmap the snapshot."""
+        self._data.close()
@@ -0,0 +1,131 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from whisperprint.database import FingerprintDatabase
+
+class AsyncStorage:
+    """
+    Asynchronous interface to fingerprint storage for event-loop code such as the API.
+    
+    Every call runs on dedicated database threads and is awaited, so blocking SQLite I/O
+    never stalls the event loop. Writes are queued to a single writer thread, which
+    serializes them without lock contention; reads run on a small pool of reader threads,
+    each with its own connection, and proceed alongside writes under WAL.
+    
+    The backend is any object with the methods of FingerprintDatabase, so another
+    database (or an async driver behind the same methods) can be plugged in later.
+    """
+    
+    def __init__(self, backend: Optional[Any] = None, readers: int = 4):
+        """
+        Initialize the storage.
+        
+        Args:
+            backend: Storage backend, defaults to a FingerprintDatabase at the default path.
+            readers: Number of reader threads.
+        """
+        self.backend = backend if backend is not None else FingerprintDatabase()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisperprint-db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=max(readers, 1), thread_name_prefix="whisperprint-db-reader")
+    
+    async def _call(self, executor: ThreadPoolExecutor, method: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(method, *args, **kwargs))
+    
+    async def read(self, method: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking read on a reader thread.
+        
+        Reads run concurrently, so the method must be safe to call from several threads;
+        WhisperPrintEngine.identify_leak is.
+        
+        Args:
+            method: The function to run, e.g. a backend or engine method.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+        
+        Returns:
+            The method's result.
+        """
+        return await self._call(self._readers, method, *args, **kwargs)
+    
+    async def write(self, method: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking write on the writer thread.
+        
+        Args:
+            method: The function to run, e.g. a backend or engine method.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+        
+        Returns:
+            The method's result.
+        """
+        return await self._call(self._writer, method, *args, **kwargs)
+    
+    async def add_recipient(self, recipient_id: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Add a recipient; see FingerprintDatabase.add_recipient."""
+        return await self.write(self.backend.add_recipient, recipient_id, metadata)
+    
+    async def add_recipients_many(self, recipients: List[Dict[str, Any]]) -> List[bool]:
+        """Add many recipients; see FingerprintDatabase.add_recipients_many."""
+        return await self.write(self.backend.add_recipients_many, recipients)
+    
+    async def get_recipient(self, recipient_id: str) -> Optional[Dict[str, Any]]:
+        """Get a recipient; see FingerprintDatabase.get_recipient."""
+        return await self.read(self.backend.get_recipient, recipient_id)
+    
+    async def get_recipients(self, limit: int = -1, offset: int = 0, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get a page of recipients; see FingerprintDatabase.get_recipients."""
+        return await self.read(self.backend.get_recipients, limit, offset, after_id)
+    
+    async def store_fingerprint(
+        self,
+        recipient_id: str,
+        fingerprint: str,
+        recipient_uuid: Optional[str] = None,
+        document_text: Optional[str] = None,
+        document_metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[bool, str]:
+        """Store a fingerprint; see FingerprintDatabase.store_fingerprint."""
+        return await self.write(
+            self.backend.store_fingerprint, recipient_id, fingerprint, recipient_uuid, document_text, document_metadata
+        )
+    
+    async def store_fingerprints_many(self, records: List[Dict[str, Any]]) -> List[Tuple[bool, str]]:
+        """Store many fingerprints; see FingerprintDatabase.store_fingerprints_many."""
+        return await self.write(self.backend.store_fingerprints_many, records)
+    
+    async def get_recipient_by_uuid(self, recipient_uuid: str) -> Optional[Dict[str, Any]]:
+        """Find the recipient of a decoded UUID; see FingerprintDatabase.get_recipient_by_uuid."""
+        return await self.read(self.backend.get_recipient_by_uuid, recipient_uuid)
+    
+    async def get_recipient_by_fingerprint(self, fingerprint: str, exact: bool = False) -> Optional[Dict[str, Any]]:
+        """Find the recipient of a fingerprint; see FingerprintDatabase.get_recipient_by_fingerprint."""
+        return await self.read(self.backend.get_recipient_by_fingerprint, fingerprint, exact)
+    
+    async def get_fingerprints_by_recipient(self, recipient_id: str) -> List[Dict[str, Any]]:
+        """List a recipient's fingerprints; see FingerprintDatabase.get_fingerprints_by_recipient."""
+        return await self.read(self.backend.get_fingerprints_by_recipient, recipient_id)
+    
+    async def get_audit_logs(
+        self,
+        limit: int = 100,
+        event_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        flush: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get a page of audit logs; see FingerprintDatabase.get_audit_logs."""
+        return await self.read(self.backend.get_audit_logs, limit, event_type, cursor, flush)
+    
+    async def get_analytics(self, days: int = 30) -> Dict[str, Any]:
+        """Summarize fingerprinting activity; see FingerprintDatabase.get_analytics."""
+        return await self.read(self.backend.get_analytics, days)
+    
+    async def close(self) -> None:
+        """Finish the queued calls, then close the backend."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._readers.shutdown, wait=True))
+        await loop.run_in_executor(None, functools.partial(self._writer.shutdown, wait=True))
+        await loop.run_in_executor(None, self.backend.close)